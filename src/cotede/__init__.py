@@ -9,10 +9,12 @@ package is convenient to use via `import cotede`.
 
 # Public subpackages/modules
 from . import anomaly_detection, datasets, fuzzy, qctests, utils
-from .misc import combined_flag, make_qc_index
+from .misc import FlagTable, combined_flag, make_qc_index
+from .plan import QCPlan, compile_plan
 
 # Core classes
-from .qc import ProfileQC, ProfileQCed
+from .qc import ProfileQC, ProfileQCCollection, ProfileQCed, ProfilesQCPandasCollection, qc_many
+from .timeseries import StreamingQC, TimeSeriesQC
 
 # Version: prefer setuptools_scm generated file if present, otherwise fall
 # back to a simple default. setuptools_scm can write a `cotede/version.py`
@@ -26,13 +28,21 @@ except Exception:
 __all__ = [
 	"ProfileQC",
 	"ProfileQCed",
+	"ProfileQCCollection",
+	"ProfilesQCPandasCollection",
+	"TimeSeriesQC",
+	"StreamingQC",
+	"qc_many",
 	"datasets",
 	"qctests",
 	"fuzzy",
 	"anomaly_detection",
 	"utils",
 	"combined_flag",
+	"FlagTable",
 	"make_qc_index",
+	"QCPlan",
+	"compile_plan",
 	"__version__",
 ]
 
@@ -2,6 +2,7 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 
 from .anomaly_detection import (
+    FitCache,
     calibrate4flags,
     calibrate_anomaly_detection,
     estimate_anomaly,
@@ -11,9 +12,11 @@ from .anomaly_detection import (
     i2b_flags,
     rank_files,
     split_data_groups,
+    threshold_errors,
 )
 
 __all__ = [
+    'FitCache',
     'calibrate4flags',
     'calibrate_anomaly_detection',
     'estimate_anomaly',
@@ -22,5 +25,6 @@ __all__ = [
     'human_calibrate_mistakes',
     'i2b_flags',
     'rank_files',
-    'split_data_groups'
+    'split_data_groups',
+    'threshold_errors',
 ]
@@ -35,6 +35,12 @@ Target: Initially two main functionalities
     - The output would be a list to feed the Human Q.C. system
 """
 
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
 import numpy as np
 from numpy import ma
@@ -43,11 +49,74 @@ from numpy import ma
 from scipy.stats import exponweib
 
 from cotede.humanqc import HumanQC
+from cotede.qc import ProfilesQCPandasCollection
 
 # from scipy.stats import kstest
 
+module_logger = logging.getLogger(__name__)
+
+
+class FitCache:
+    """ Fitted exponweib parameters by data hash and q
 
-def fit_tests(features, q=0.90, verbose=False):
+        A fit started from the default guess is deterministic, so the same
+          sample with the same q always gives the same parameters, and
+          iterative calibrations only need to fit the features whose data
+          changed. Fits started from a warm_start guess can differ, so
+          fit_tests() doesn't store them. If filename is given, the cache
+          is loaded from, and saved to, that JSON file, so it persists
+          between sessions.
+    """
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.params = {}
+        self.modified = False
+        if (filename is not None) and os.path.exists(filename):
+            with open(filename) as f:
+                self.params = json.load(f)
+
+    @staticmethod
+    def key(samp, q):
+        """ Hash of the sample (as float64) and q """
+        h = hashlib.sha1(np.ascontiguousarray(samp, dtype='f8').tobytes())
+        h.update(repr(float(q)).encode())
+        return h.hexdigest()
+
+    def __contains__(self, key):
+        return key in self.params
+
+    def __getitem__(self, key):
+        return self.params[key]
+
+    def __setitem__(self, key, value):
+        self.params[key] = value
+        self.modified = True
+
+    def __len__(self):
+        return len(self.params)
+
+    def save(self):
+        """ Write the cache to filename, if there is anything new """
+        if (self.filename is None) or not self.modified:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+        tmp = f"{self.filename}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.params, f)
+        os.replace(tmp, self.filename)
+        self.modified = False
+
+
+def _fit_exponweib(samp, guess=None):
+    """ Fit exponweib to samp, starting from guess if given """
+    if guess is None:
+        return tuple(float(p) for p in exponweib.fit(samp))
+    param = exponweib.fit(samp, *guess[:-2], loc=guess[-2], scale=guess[-1])
+    return tuple(float(p) for p in param)
+
+
+def fit_tests(features, q=0.90, verbose=False, n_jobs=1, cache=None,
+              warm_start=None):
     """
 
         Input:
@@ -60,10 +129,25 @@ def fit_tests(features, q=0.90, verbose=False):
           q: The lowest percentile to be considered. For example, .90
               means that only the top 10% data (i.e. percentiles higher
               than .90) are considered in the fitting.
+
+          n_jobs: Number of worker processes used to fit the features in
+              parallel. By default the features are fitted in the current
+              process. If None, use all the available CPUs.
+
+          cache: A FitCache, or the name of its JSON file. Features whose
+              sample and q were already fitted are not fitted again.
+
+          warm_start: Parameters from a previous fit, like a previous
+              output of fit_tests(), used as the initial guess of the
+              features that are not in the cache. These fits are not
+              added to the cache.
     """
     assert (q >= 0) & (q < 1), "q must be in [0, 1)"
+    if (cache is not None) and not isinstance(cache, FitCache):
+        cache = FitCache(cache)
 
     output = {}
+    samples = {}
     for f in features:
         # Sample only valid values
         samp = ma.compressed(features[f][np.isfinite(features[f])])
@@ -72,11 +156,46 @@ def fit_tests(features, q=0.90, verbose=False):
         # Restricts to the top q values
         samp = samp[samp > qlimit]
         if samp.any():
-            param = exponweib.fit(samp)
-            output[f] = {'param': param,
-                    'qlimit': qlimit}
+            samples[f] = (samp, qlimit)
+
+    keys = {}
+    pending = []
+    for f, (samp, qlimit) in samples.items():
+        if cache is not None:
+            keys[f] = FitCache.key(samp, q)
+            if keys[f] in cache:
+                output[f] = {'param': tuple(cache[keys[f]]), 'qlimit': qlimit}
+                continue
+        pending.append(f)
+
+    guesses = [None] * len(pending)
+    if warm_start is not None:
+        guesses = [tuple(warm_start[f]['param']) if f in warm_start else None
+                   for f in pending]
+    samps = [samples[f][0] for f in pending]
+
+    n_jobs = n_jobs or os.process_cpu_count() or 1
+    if (n_jobs == 1) or (len(pending) <= 1):
+        params = map(_fit_exponweib, samps, guesses)
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(pending))) as executor:
+            params = list(executor.map(_fit_exponweib, samps, guesses))
+
+    for f, guess, param in zip(pending, guesses, params, strict=True):
+        output[f] = {'param': param, 'qlimit': samples[f][1]}
+        if (cache is not None) and (guess is None):
+            cache[keys[f]] = param
+    module_logger.debug(
+        f"Fitted {len(pending)} of {len(samples)} features")
+    if cache is not None:
+        cache.save()
+
+    # Keep the order of features
+    output = {f: output[f] for f in samples}
 
-        if verbose is True:
+    if verbose is True:
+        for f, (samp, _) in samples.items():
+            param = output[f]['param']
             x = np.linspace(samp.min(), samp.max(), 100)
             pdf_fitted = exponweib.pdf(x, *param[:-2], loc=param[-2], scale=param[-1])
             plt.plot(x, pdf_fitted, 'b-')
@@ -139,26 +258,63 @@ def estimate_anomaly(features, params, method='produtorium'):
     return prob
 
 
-def estimate_p_optimal(prob, binflag, verbose=False):
-    """ ATENTION: I'm not happy with this. Improve it
+def threshold_errors(prob, binflag, thresholds):
+    """ Count the misclassifications for many thresholds at once
+
+        A good measurement (binflag True) with probability lower than the
+          threshold is a false negative, while a bad measurement (binflag
+          False) with probability higher than the threshold is a false
+          positive. Masked values, in either prob or binflag, and NaN are
+          ignored.
+
+        Both groups are sorted once and the counts for all the thresholds
+          are given by searchsorted, hence it costs O((N + M) log N) for N
+          measurements and M thresholds.
+
+        Output: false_negative, false_positive, both int arrays with the
+          same size of thresholds.
+    """
+    valid = ~ma.getmaskarray(binflag) & ~ma.getmaskarray(prob)
+    binflag = np.asarray(ma.getdata(binflag), dtype='bool')
+    prob = np.asarray(ma.getdata(prob), dtype='f8')
+    valid &= ~np.isnan(prob)
+
+    good = np.sort(prob[valid & binflag])
+    bad = np.sort(prob[valid & ~binflag])
+    thresholds = np.asarray(thresholds)
+
+    false_negative = np.searchsorted(good, thresholds, side='left')
+    false_positive = bad.size - np.searchsorted(bad, thresholds, side='right')
+    return false_negative, false_positive
+
+
+def estimate_p_optimal(prob, binflag, verbose=False, resolution=0.1):
+    """ Threshold on prob that best separates good and bad measurements
+
+        The candidate thresholds go from 0 down to the lowest probability of
+          a good measurement, in steps of resolution. If resolution is None,
+          every distinct probability in that range is a candidate, so the
+          optimal threshold is exact.
+
+        Output: p_optimal, err_ratio
+
+        ATENTION: I'm not happy with this. Improve it
 
         Maybe use flag as input, and optimize to give 3 thresholds
     """
     assert prob.shape == binflag.shape
     assert binflag.dtype == 'bool'
 
-    err = []
+    # The nonzero is necessary in case binflag is a masked array.
     p_limit = prob[np.nonzero(binflag)].min() - 0.1
-    P = -np.arange(0, -p_limit, 0.1)
-    N = P.size
-    err = np.empty(N)
-    false_negative = np.empty(N)
-    false_positive = np.empty(N)
-    for i, p in enumerate(P):
-        # The nonzero is necessary in case binflag is a masked array.
-        false_negative[i] = np.nonzero(prob[np.nonzero(binflag)] < p)[0].size
-        false_positive[i] = np.nonzero(prob[np.nonzero(~binflag)] > p)[0].size
-        err[i] = false_negative[i] + false_positive[i]
+    if resolution is None:
+        P = ma.compressed(prob)
+        P = np.unique(P[(P > p_limit) & (P < 0)])[::-1]
+        P = np.concatenate([[0.0], P])
+    else:
+        P = -np.arange(0, -p_limit, resolution)
+    false_negative, false_positive = threshold_errors(prob, binflag, P)
+    err = false_negative + false_positive
 
     if verbose is True:
         plt.plot(P, err , 'b')
@@ -167,7 +323,8 @@ def estimate_p_optimal(prob, binflag, verbose=False):
     return P[err.argmin()], float(err.min())/prob.size#, {'P': P, 'err': err}
 
 
-def calibrate4flags(flags, features, q=0.90, verbose=False):
+def calibrate4flags(flags, features, q=0.90, verbose=False, n_jobs=1,
+                    cache=None, warm_start=None):
     """ Adjust coeficients for Anomaly Detection to best reproduce given flags
 
         Inputs:
@@ -182,6 +339,7 @@ def calibrate4flags(flags, features, q=0.90, verbose=False):
             q: The top q extreme tests results to be used on Anom. Detect.
                  For example q=0 will use all the data, while q=0.9 (default)
                  will use the percentile of 0.9, i.e. the top 10% values.
+            n_jobs, cache, warm_start: Passed on to fit_tests().
 
             Output: Returns a dictionary with
                 err:
@@ -204,7 +362,8 @@ def calibrate4flags(flags, features, q=0.90, verbose=False):
     assert len(features[features.keys()[0]]) == len(binflags)
 
     indices = split_data_groups(binflags)
-    params = fit_tests(features[indices['fit']], q=q)
+    params = fit_tests(features[indices['fit']], q=q, n_jobs=n_jobs,
+            cache=cache, warm_start=warm_start)
     prob = estimate_anomaly(features, params)
 
     if verbose is True:
@@ -319,7 +478,7 @@ def i2b_flags(flags, good_flags=None, bad_flags=None):
     return output
 
 
-def calibrate_anomaly_detection(datadir, varname, cfg=None):
+def calibrate_anomaly_detection(datadir, varname, cfg=None, cache=None):
     """ Calibrate coefficientes for Anomaly Detection
 
         Input:
@@ -327,6 +486,8 @@ def calibrate_anomaly_detection(datadir, varname, cfg=None):
             varname: Variable to calibrate. For example: TEMP
             cfg: CoTeDe's QC configuration. Can be None for CoTeDe's default
                 a name for one of the preset configuration files, or a dict
+            cache: Parquet file to keep the QC results of datadir, so that
+                a recalibration only evaluates new or modified files.
 
         Output:
             false_negative:
@@ -344,7 +505,8 @@ def calibrate_anomaly_detection(datadir, varname, cfg=None):
 
     assert type(varname) is str, "varname must be a string"
 
-    db = ProfilesQCPandasCollection(datadir, cfg=cfg, saveauxiliary=True)
+    db = ProfilesQCPandasCollection(datadir, cfg=cfg, saveauxiliary=True,
+            cache=cache)
 
     assert varname in db.keys(), f"db does not contain variable {varname}"
 
@@ -363,7 +525,7 @@ def calibrate_anomaly_detection(datadir, varname, cfg=None):
     #binflags = i2b_flags(flags)
 
     result = calibrate4flags(db.flags[varname][ind],
-            db.auxiliary[varname][ind], q=0.90, verbose=False)
+            db.features[varname][ind], q=0.90, verbose=False)
 
     #ind = ma.masked_all(len(flags), dtype='bool')
     #ind[(flags == 1) | (flags == 2)] = True
@@ -400,11 +562,23 @@ def calibrate_anomaly_detection(datadir, varname, cfg=None):
     return result
 
 
-def human_calibrate_mistakes(data, varname, flagname, featuresnames, niter=5):
+def human_calibrate_mistakes(data, varname, flagname, featuresnames, niter=5,
+                             cache=None, n_jobs=1):
     """
+
+        data is a table with the measurements, flags and features of many
+          profiles, like ProfilesQCPandasCollection(datadir).to_frame(varname).
+
+        cache is a FitCache, or the name of its JSON file, shared by all
+          the iterations. Each iteration also starts its fits from the
+          parameters of the previous one.
+
+        n_jobs is the number of worker processes used by fit_tests().
     """
     q = 0.90
     assert varname in data
+    if not isinstance(cache, FitCache):
+        cache = FitCache(cache)
 
     #data['id'] = range(data.shape[0])
     #data.set_index('id', drop=True, inplace=True)
@@ -418,7 +592,8 @@ def human_calibrate_mistakes(data, varname, flagname, featuresnames, niter=5):
     data.loc[data.human_flag == 'good', 'flag_calibrating'] = 1
     data.loc[data.human_flag == 'bad', 'flag_calibrating'] = 4
 
-    result = calibrate4flags(data['flag_calibrating'], data[featuresnames], q=q)
+    result = calibrate4flags(data['flag_calibrating'], data[featuresnames], q=q,
+            n_jobs=n_jobs, cache=cache)
 
     error_log = [{'err': result['n_err'],
         'err_ratio': result['err_ratio'],
@@ -467,7 +642,8 @@ def human_calibrate_mistakes(data, varname, flagname, featuresnames, niter=5):
         data.loc[data.human_flag == 'bad', 'flag_calibrating'] = 4
         data.loc[data.human_flag == 'doubt', 'flag_calibrating'] = 0
 
-        result = calibrate4flags(data['flag_calibrating'], data[featuresnames], q=q)
+        result = calibrate4flags(data['flag_calibrating'], data[featuresnames], q=q,
+                n_jobs=n_jobs, cache=cache, warm_start=result['params'])
 
 
         error_log.append({'err': result['n_err'],
@@ -484,7 +660,7 @@ def human_calibrate_mistakes(data, varname, flagname, featuresnames, niter=5):
     return result
 
 
-def rank_files(datadir, varname, cfg=None):
+def rank_files(datadir, varname, cfg=None, cache=None, n_jobs=1):
     """
         Ordered list from datadir files of probably bad data
 
@@ -508,13 +684,14 @@ def rank_files(datadir, varname, cfg=None):
 
     assert type(varname) is str
 
-    db = ProfilesQCPandasCollection(datadir, cfg=cfg, saveauxiliary=True)
+    db = ProfilesQCPandasCollection(datadir, cfg=cfg, saveauxiliary=True,
+            cache=cache)
 
     # hardlimit_flags = ['global_range']
     ind = db.flags[varname]['global_range'] == 1
-    features = db.auxiliary[varname][ind]
+    features = db.features[varname][ind]
 
-    params = fit_tests(features, q=.85)
+    params = fit_tests(features, q=.85, n_jobs=n_jobs)
     # Note that I'm already filtering to positions ind, i.e. valid
     #   global range limits. Global range is too obvious and should
     #   be left aside.
@@ -74,3 +74,34 @@ def defuzz(x, mfx, mode):
 
     else:
         raise ValueError(f'The input for `mode`, {mode}, was incorrect.')
+
+
+def defuzz_bisector(x, mfx):
+    """
+    Bisector of area for many membership functions at once.
+
+    Parameters
+    ----------
+    x : 1d array, length N
+        Independent variable.
+    mfx : 2d array, shape (M, N)
+        One fuzzy membership function per row.
+
+    Returns
+    -------
+    u : 1d array, length M
+        The same values as defuzz(x, mfx[i], 'bisector') for each row, or
+        NaN where the total area is zero.
+
+    """
+    x = np.asarray(x).ravel()
+    mfx = np.atleast_2d(mfx)
+    assert mfx.shape[1] == len(x), 'Length of x and fuzzy membership function must be \
+                          identical.'
+
+    tot_area = mfx.sum(axis=1)
+    # cumsum accumulates in the same order as the scalar loop in defuzz.
+    reached = mfx.cumsum(axis=1) >= (tot_area / 2.)[:, None]
+    u = x[reached.argmax(axis=1)].astype('f8')
+    u[tot_area == 0] = np.nan
+    return u
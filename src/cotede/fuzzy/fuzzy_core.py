@@ -10,9 +10,12 @@
 
 import numpy as np
 
-from .defuzz import defuzz
+from .defuzz import defuzz_bisector
 from .membership_functions import smf, trapmf, trimf, zmf
 
+# Number of measurements aggregated at once, bounding the (N x 100) temporary arrays.
+CHUNK_SIZE = 10000
+
 
 def fuzzyfy(data, features, output, require="all"):
     """
@@ -110,11 +113,13 @@ def fuzzy_uncertainty(data, features, output, require="all"):
     # This would be the regular fuzzy approach.
     uncertainty = np.nan * np.ones(np.shape(idx)[1:])
     valid = np.nonzero(idx.all(axis=0))[0]
-    for i in valid:
-        aggregated = np.zeros(N_out)
+    # Aggregate the output memberships of all valid measurements as one
+    # (N x N_out) matrix per chunk and take the bisector of every row.
+    for start in range(0, valid.size, CHUNK_SIZE):
+        chunk = valid[start:start + CHUNK_SIZE]
+        aggregated = np.zeros((chunk.size, N_out))
         for m in rules:
-            aggregated = np.fmax(aggregated, np.fmin(rules[m][i], Q[m]))
-        if aggregated.sum() > 0:
-            uncertainty[i] = defuzz(output_range, aggregated, "bisector")
+            aggregated = np.fmax(aggregated, np.fmin(rules[m][chunk][:, None], Q[m][None, :]))
+        uncertainty[chunk] = defuzz_bisector(output_range, aggregated)
 
     return uncertainty
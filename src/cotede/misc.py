@@ -19,15 +19,111 @@ def combined_flag(flags, criteria=None):
     """
     assert hasattr(flags, 'keys')
 
+    if isinstance(flags, FlagTable):
+        return flags.combined(criteria)
+
     if criteria is None:
         criteria = list(flags.keys())
 
     output = np.asanyarray(flags[criteria[0]])
+    if len(criteria) == 1:
+        return output
+
     for c in criteria[1:]:
         assert len(flags[c]) == len(output)
-        output = np.max([output, flags[c]], axis=0)
+    return np.max(np.array([flags[c] for c in criteria]), axis=0)
+
+
+class FlagTable:
+    """Flags of one variable, for several tests, in a single int8 array
+
+    Behaves like a dictionary of flags, {test: flags}, but all the flags are
+    stored as rows of one contiguous (n_tests x n_samples) array, so that the
+    combined flag is a single max(axis=0) and the whole table can be exported
+    without copying.
+
+    Parameters
+    ----------
+    shape : int or tuple
+        Shape of the flags of each test, i.e. of the variable evaluated.
+
+    Example
+    -------
+    >>> flags = FlagTable(3)
+    >>> flags["global_range"] = [1, 1, 4]
+    >>> flags["spike"] = [1, 3, 1]
+    >>> flags.combined()
+    array([1, 3, 4], dtype=int8)
+    """
+
+    def __init__(self, shape, capacity=16):
+        self.shape = tuple(np.atleast_1d(shape).astype(int)) if np.ndim(shape) else (int(shape),)
+        self.size = int(np.prod(self.shape))
+        self._data = np.zeros((capacity, self.size), dtype="i1")
+        self._index = {}
+
+    @property
+    def array(self):
+        """The (n_tests x n_samples) array of flags, in the order of keys()"""
+        return self._data[:len(self._index)]
+
+    def keys(self):
+        return self._index.keys()
+
+    def values(self):
+        return [self[k] for k in self._index]
+
+    def items(self):
+        return [(k, self[k]) for k in self._index]
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __getitem__(self, key):
+        return self._data[self._index[key]].reshape(self.shape)
+
+    def __setitem__(self, key, value):
+        if key not in self._index:
+            if len(self._index) == self._data.shape[0]:
+                data = np.zeros((2 * self._data.shape[0], self.size), dtype="i1")
+                data[:len(self._index)] = self.array
+                self._data = data
+            self._index[key] = len(self._index)
+        self._data[self._index[key]] = np.broadcast_to(value, self.shape).reshape(-1)
+
+    def __delitem__(self, key):
+        i = self._index.pop(key)
+        self._data[i:len(self._index)] = self._data[i + 1:len(self._index) + 1]
+        self._index = {k: n for n, k in enumerate(self._index)}
+
+    def __repr__(self):
+        return f"FlagTable({list(self._index)}, shape={self.shape})"
+
+    def combined(self, criteria=None):
+        """Maximum flag among the criteria, by default all of them"""
+        if criteria is None:
+            table = self.array
+        else:
+            table = self._data[[self._index[c] for c in criteria]]
+        return table.max(axis=0, initial=0).reshape(self.shape)
+
+    def to_frame(self):
+        """Flags as a pandas DataFrame with one column per test, without copying"""
+        import pandas as pd
+
+        return pd.DataFrame(self.array.T, columns=list(self._index), copy=False)
+
+    def to_arrow(self):
+        """Flags as a pyarrow Table with one int8 column per test, without copying"""
+        import pyarrow as pa
 
-    return output
+        return pa.table([pa.array(row) for row in self.array], names=list(self._index))
 
 
 def make_qc_index(flags, criteria, type="anytrue"):
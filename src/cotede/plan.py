@@ -0,0 +1,391 @@
+"""Execution plans for ProfileQC
+
+A QC configuration is resolved once into a QCPlan: for each variable of the
+configuration an ordered list of QCStep, each one bound to its QC check
+and to its already validated configuration. ProfileQC then only runs the
+steps, instead of looking up the catalog of tests and inspecting each
+procedure for every variable of every profile.
+
+Each step is timed. The time of each step of a profile is available with
+ProfileQC.step_timing(), the accumulated time of all the profiles evaluated
+with a plan with QCPlan.report(), and any callable registered with
+QCPlan.add_hook() is called after every step.
+"""
+
+import logging
+import numbers
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from cotede import qctests
+from cotede.utils.config import _cached_cfg
+
+module_logger = logging.getLogger(__name__)
+
+# Configuration keys of a QC check that must be numeric
+THRESHOLD_KEY = re.compile(r"(threshold|minval|maxval|_max|_min)$")
+
+
+class QCStep:
+    """One QC check bound to its configuration
+
+    Parameters
+    ----------
+    name : str
+        Name of the step, usually the criterion in the QC configuration.
+    func : callable
+        Called as func(pqc, varname, cfg) to evaluate the ProfileQC pqc,
+        storing its flags and features.
+    cfg : dict, optional
+        Configuration of the check.
+    """
+
+    __slots__ = ("name", "func", "cfg")
+
+    def __init__(self, name, func, cfg=None):
+        self.name = name
+        self.func = func
+        self.cfg = cfg
+
+    def __call__(self, pqc, varname):
+        return self.func(pqc, varname, self.cfg)
+
+    def __repr__(self):
+        return f"QCStep({self.name!r}, {getattr(self.func, '__name__', self.func)!r})"
+
+
+def _store(pqc, varname, y):
+    """Keep the features and flags of an evaluated QC check"""
+    if pqc.saveauxiliary:
+        for f in y.features.keys():
+            pqc.features[varname][f] = y.features[f]
+    for f in y.flags:
+        pqc.flags[varname][f] = y.flags[f]
+
+
+def _procedure_step(Procedure):
+    """Step function for a QC check from the catalog"""
+    if issubclass(Procedure, qctests.core.QCCheckVar):
+        def run(pqc, varname, cfg):
+            y = Procedure(pqc.input, varname=varname, cfg=cfg, autoflag=True,
+                          feature_cache=pqc.feature_cache)
+            _store(pqc, varname, y)
+    else:
+        def run(pqc, varname, cfg):
+            y = Procedure(pqc.input, cfg=cfg, autoflag=True,
+                          feature_cache=pqc.feature_cache)
+            _store(pqc, varname, y)
+    run.__name__ = Procedure.__name__
+    return run
+
+
+def _not_implemented(pqc, varname, cfg):
+    module_logger.warning(f"Sorry I'm not ready to evaluate {cfg}()")
+
+
+def _valid_geolocation(pqc, varname, cfg):
+    y = qctests.ValidGeolocation(pqc.input, varname, cfg, autoflag=True)
+    _store(pqc, varname, y)
+
+
+def _valid_speed(pqc, varname, cfg):
+    # Think about. Argo also has a test valid_speed, but that is
+    #   in respect to sucessive profiles. How is the best way to
+    #   distinguish them here?
+    try:
+        if pqc.saveauxiliary:
+            pqc.flags[varname]['valid_speed'], \
+                    pqc.features[varname]['valid_speed'] = \
+                    qctests.possible_speed(pqc.input, cfg)
+    except Exception:
+        module_logger.warning("Fail on valid_speed")
+
+
+def _anomaly_detection(pqc, varname, cfg):
+    # FIXME: the Anomaly Detection and Fuzzy require some features
+    #   to be estimated previously. Generalize this.
+    v = varname
+    features = {}
+    for f in cfg['features']:
+        try:
+            features[f] = pqc.features[v][f]
+        except Exception:
+            if f in ('spike', 'gradient', 'constant_cluster_size',
+                     'rate_of_change'):
+                # Function with the same name of its module
+                func = getattr(getattr(qctests, f), f)
+                features[f] = pqc.feature_cache.get(v, f, func, pqc.input[v])
+            elif f == 'tukey53H_norm':
+                features['tukey53H_norm'] = pqc.feature_cache.get(
+                        v, f, qctests.tukey53H.tukey53H_norm, pqc.input[v], l=12)
+            elif (f == 'woa_normbias'):
+                y = qctests.WOA_NormBias(pqc.input, v, {}, autoflag=False,
+                                         feature_cache=pqc.feature_cache)
+                features['woa_normbias'] = \
+                        np.abs(y.features['woa_normbias'])
+            elif (f == 'cars_normbias'):
+                y = qctests.CARS_NormBias(pqc.input, v, {}, autoflag=False,
+                                          feature_cache=pqc.feature_cache)
+                features['cars_normbias'] = \
+                        np.abs(y.features['cars_normbias'])
+            else:
+                module_logger.error(
+                        f"Sorry, I can't evaluate anomaly_detection with: {f}")
+
+    prob, pqc.flags[v]['anomaly_detection'] = \
+            qctests.anomaly_detection(features, cfg)
+
+    if pqc.saveauxiliary:
+        pqc.features[v]['anomaly_detection'] = prob
+
+
+def _morello2014(pqc, varname, cfg):
+    y = qctests.Morello2014(pqc.input, varname, cfg, autoflag=True,
+                            feature_cache=pqc.feature_cache)
+    _store(pqc, varname, y)
+
+
+def _fuzzylogic(pqc, varname, cfg):
+    y = qctests.FuzzyLogic(pqc.input, varname, cfg, autoflag=True,
+                           feature_cache=pqc.feature_cache)
+    _store(pqc, varname, y)
+
+
+def _valid_datetime(pqc, varname, cfg):
+    if 'datetime' in pqc.attrs.keys() and \
+            type(pqc.attrs['datetime']) is datetime:
+        f = 1
+    else:
+        f = 3
+    pqc.flags[varname]['valid_datetime'] = f
+
+
+def _datetime_range(pqc, varname, cfg):
+    if 'datetime' in pqc.attrs.keys() and \
+            (pqc.attrs['datetime'] >= cfg['minval']) and \
+            (pqc.attrs['datetime'] <= cfg['maxval']):
+        f = 1
+    else:
+        f = 3
+    pqc.flags[varname]['datetime_range'] = f
+
+
+def _location_at_sea(pqc, varname, cfg):
+    y = qctests.LocationAtSea(pqc.input, cfg)
+    _store(pqc, varname, y)
+
+
+def _is_threshold(value):
+    """A real number, or a percentage like "5%" """
+    if isinstance(value, str) and value.endswith("%"):
+        try:
+            float(value[:-1])
+        except ValueError:
+            return False
+        return True
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def validate_thresholds(name, cfg):
+    """Check that the thresholds of a QC check are numbers
+
+    A percentage, like "5%", is also accepted, as used by
+    ConstantClusterSize.
+
+    Raises
+    ------
+    ValueError
+        If any threshold-like item of cfg, such as threshold, minval or
+        deep_max, is not a real number.
+    """
+    for k, value in cfg.items():
+        if THRESHOLD_KEY.search(k) and not _is_threshold(value):
+            raise ValueError(f"Invalid {k} for {name}: {value!r}")
+
+
+def compile_common(cfg):
+    """Steps for the flags common to all variables of a profile"""
+    steps = []
+    if 'valid_datetime' in cfg:
+        steps.append(QCStep('valid_datetime', _valid_datetime, cfg['valid_datetime']))
+    if 'datetime_range' in cfg:
+        steps.append(QCStep('datetime_range', _datetime_range, cfg['datetime_range']))
+    if 'location_at_sea' in cfg:
+        steps.append(QCStep('location_at_sea', _location_at_sea, cfg['location_at_sea']))
+    return steps
+
+
+def compile_steps(cfg):
+    """Ordered steps to evaluate one variable with its configuration
+
+    Parameters
+    ----------
+    cfg : dict
+        The QC configuration of one variable, like
+        load_cfg()["variables"]["sea_water_temperature"].
+
+    Returns
+    -------
+    list of QCStep
+    """
+    steps = []
+    if 'platform_identification' in cfg:
+        steps.append(QCStep('platform_identification', _not_implemented, 'platform_identification'))
+    if 'valid_geolocation' in cfg:
+        steps.append(QCStep('valid_geolocation', _valid_geolocation, cfg['valid_geolocation']))
+    if 'valid_speed' in cfg:
+        steps.append(QCStep('valid_speed', _valid_speed, cfg['valid_speed']))
+    for c in ('grey_list', 'gross_sensor_drift', 'frozen_profile'):
+        if c in cfg:
+            steps.append(QCStep(c, _not_implemented, c))
+
+    for criterion in cfg:
+        if (cfg[criterion] is None) or ("procedure" not in cfg[criterion]):
+            continue
+        if cfg[criterion]["procedure"] not in qctests.QCTESTS:
+            module_logger.debug(
+                f"Unknown procedure {cfg[criterion]['procedure']} for {criterion}")
+            continue
+        validate_thresholds(criterion, cfg[criterion])
+        Procedure = qctests.catalog(cfg[criterion]["procedure"])
+        steps.append(QCStep(criterion, _procedure_step(Procedure), cfg[criterion]))
+
+    if 'anomaly_detection' in cfg:
+        steps.append(QCStep('anomaly_detection', _anomaly_detection, cfg['anomaly_detection']))
+    if 'morello2014' in cfg:
+        steps.append(QCStep('morello2014', _morello2014, cfg['morello2014']))
+    if 'fuzzylogic' in cfg:
+        steps.append(QCStep('fuzzylogic', _fuzzylogic, cfg['fuzzylogic']))
+    return steps
+
+
+class QCPlan:
+    """A QC configuration resolved into steps, ready to evaluate profiles
+
+    Parameters
+    ----------
+    cfg : dict
+        A QC configuration as returned by load_cfg().
+
+    Attributes
+    ----------
+    common : list of QCStep
+        Steps for the flags common to all the variables.
+    variables : dict
+        Steps for each variable type of the configuration, like
+        {"sea_water_temperature": [QCStep, ...]}.
+    hooks : list
+        Callables called as hook(varname, step, seconds) after each step.
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.common = compile_common(cfg['common']) if 'common' in cfg else []
+        self.variables = {c: compile_steps(cfg['variables'][c]) for c in cfg['variables']}
+        self._patterns = [(re.compile(f"({c})2?$"), c) for c in cfg['variables']]
+        self._resolved = {}
+        self.hooks = []
+        self.timing = {}
+        self.calls = {}
+
+    def vartype(self, varname):
+        """Variable type of the configuration used to evaluate varname
+
+        Returns None if varname is not evaluated by this configuration.
+        """
+        if varname not in self._resolved:
+            if varname == 'TEMP':
+                vv = 'sea_water_temperature'
+            elif varname == 'PSAL':
+                vv = 'sea_water_salinity'
+            else:
+                vv = varname
+            self._resolved[varname] = next(
+                (c for pattern, c in self._patterns if pattern.match(vv)), None)
+        return self._resolved[varname]
+
+    def add_hook(self, hook):
+        """Call hook(varname, step, seconds) after each step is evaluated"""
+        self.hooks.append(hook)
+
+    def run(self, step, pqc, varname):
+        """Evaluate one step on pqc, timing it"""
+        start = time.perf_counter()
+        step(pqc, varname)
+        seconds = time.perf_counter() - start
+
+        key = (varname, step.name)
+        self.timing[key] = self.timing.get(key, 0.0) + seconds
+        self.calls[key] = self.calls.get(key, 0) + 1
+        for hook in self.hooks:
+            hook(varname, step.name, seconds)
+        return seconds
+
+    def report(self):
+        """Accumulated time of each step of all evaluated profiles, slowest first"""
+        report = [
+            {
+                "varname": key[0],
+                "step": key[1],
+                "calls": self.calls[key],
+                "seconds": seconds,
+            }
+            for key, seconds in self.timing.items()
+        ]
+        return sorted(report, key=lambda r: r["seconds"], reverse=True)
+
+    def reset_timing(self):
+        self.timing.clear()
+        self.calls.clear()
+
+
+# Plans by the pickled snapshot of their cfg, as cached by load_cfg(). The
+# snapshot of an already loaded cfg is the same bytes object every time, so
+# finding its plan doesn't require to walk the whole configuration.
+PLAN_CACHE_SIZE = 32
+_plan_cache = OrderedDict()
+_plan_lock = threading.Lock()
+
+
+def compile_plan(cfg=None):
+    """QCPlan for a QC configuration, built once per configuration
+
+    Parameters
+    ----------
+    cfg : str or dict, optional
+        Anything accepted by load_cfg(), like a config name or an inline
+        or already loaded configuration. Equal configurations share the
+        same plan, which is rebuilt if any of its JSON files is modified.
+
+    Raises
+    ------
+    ValueError
+        If any threshold of the configuration is not a number.
+    """
+    if cfg is None:
+        cfg = "cotede"
+    _, snapshot = _cached_cfg(cfg)
+
+    with _plan_lock:
+        if snapshot in _plan_cache:
+            _plan_cache.move_to_end(snapshot)
+            return _plan_cache[snapshot]
+
+    plan = QCPlan(pickle.loads(snapshot))
+    with _plan_lock:
+        plan = _plan_cache.setdefault(snapshot, plan)
+        while len(_plan_cache) > PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+def clear_plan_cache():
+    """Forget all the plans built so far"""
+    with _plan_lock:
+        _plan_cache.clear()
@@ -1,18 +1,28 @@
 """ Apply Quality Control of CTD profiles
 """
 
+import hashlib
+import json
 import logging
-import re
+import os
+import posixpath
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
-from datetime import datetime
 from typing import Any
 
 import numpy as np
+import pandas as pd
 from numpy import ma
 
 from cotede import qctests
-from cotede.misc import combined_flag
+from cotede.misc import FlagTable, combined_flag
+from cotede.plan import compile_common, compile_plan, compile_steps
+from cotede.qctests.cars_normbias import CARS_VARS, cars_query
+from cotede.qctests.woa_normbias import WOA_VARS, woa_query
 from cotede.utils import load_cfg
+from cotede.utils.climatology import climatology_session
+from cotede.utils.profiles import find_profiles, load_profile
 
 module_logger = logging.getLogger(__name__)
 
@@ -21,7 +31,8 @@ class ProfileQC:
     """Quality Control a CTD profile
     """
 
-    def __init__(self, input, cfg=None, saveauxiliary=True, verbose=True, attributes=None):
+    def __init__(self, input, cfg=None, saveauxiliary=True, verbose=True, attributes=None,
+                 plan=None):
         """A procedure to QC a hydrographic profile
 
         Parameters
@@ -48,6 +59,11 @@ class ProfileQC:
         attributes: dict-like, optional
             If given, append/overwirte the input.attrs
 
+        plan: QCPlan, optional
+            The execution plan of cfg. If not given it is built, once per
+            configuration, by cotede.plan.compile_plan(). If given, cfg is
+            ignored.
+
         Methods
         -------
         keys(self): List of input contents
@@ -62,13 +78,22 @@ class ProfileQC:
 
         assert (hasattr(input, 'keys')) and (len(input.keys()) > 0)
 
-        self.cfg = load_cfg(cfg)
-        
+        if plan is None:
+            self.cfg = load_cfg(cfg)
+            plan = compile_plan(cfg)
+        else:
+            self.cfg = plan.cfg
+        self.plan = plan
+
         module_logger.debug(f"Using cfg: {self.cfg}")
 
         self.input = deepcopy(input)
         self._set_attrs(attributes)
         self.flags = {}
+        # Features shared by all the tests on this profile, each one computed once
+        self.feature_cache = qctests.FeatureCache()
+        # (varname, step, seconds) of each evaluated step
+        self._step_timing = []
         self.saveauxiliary = saveauxiliary
         if saveauxiliary:
             #self.auxiliary = {}
@@ -76,20 +101,13 @@ class ProfileQC:
             self.build_features()
 
         if 'common' in self.cfg:
-            self.evaluate_common(self.cfg)
+            self.evaluate_common(self.cfg, steps=plan.common)
 
         for v in self.input.keys():
-            if v == 'TEMP':
-                vv = 'sea_water_temperature'
-            elif v == 'PSAL':
-                vv = 'sea_water_salinity'
-            else:
-                vv = v
-            for c in self.cfg['variables']:
-                if re.match(f"({c})2?$", vv):
-                    module_logger.debug(f" {self.name} - evaluating: {v}, as type: {c}")
-                    self.evaluate(v, self.cfg['variables'][c])
-                    break
+            c = plan.vartype(v)
+            if c is not None:
+                module_logger.debug(f" {self.name} - evaluating: {v}, as type: {c}")
+                self.evaluate(v, self.cfg['variables'][c], steps=plan.variables[c])
 
     def _set_attrs(self, attrs: dict[str, Any]):
         """Define ProfileQC's attributes (attrs)
@@ -141,36 +159,24 @@ class ProfileQC:
         """
         return self.input[key]
 
-    def evaluate_common(self, cfg):
-        self.flags['common'] = {}
+    def evaluate_common(self, cfg, steps=None):
+        """Evaluate the flags common to all the variables
 
-        if 'valid_datetime' in self.cfg['common']:
-            if 'datetime' in self.attrs.keys() and \
-                    type(self.attrs['datetime']) is datetime:
-                f = 1
-            else:
-                f = 3
-            self.flags['common']['valid_datetime'] = f
-
-        if 'datetime_range' in self.cfg['common']:
-            if 'datetime' in self.attrs.keys() and \
-                    (self.attrs['datetime'] >=
-                            self.cfg['common']['datetime_range']['minval']) and \
-                    (self.attrs['datetime'] <=
-                            self.cfg['common']['datetime_range']['maxval']):
-                f = 1
-            else:
-                f = 3
-            self.flags['common']['datetime_range'] = f
+        Parameters
+        ----------
+        cfg: dict
+            The whole QC configuration.
 
-        if 'location_at_sea' in self.cfg['common']:
-            y = qctests.LocationAtSea(self.input, cfg['common']['location_at_sea'])
+        steps: list of QCStep, optional
+            The steps compiled from cfg['common']. If not given they are
+            compiled from cfg.
+        """
+        self.flags['common'] = {}
+        if steps is None:
+            steps = compile_common(cfg['common'])
 
-            if self.saveauxiliary:
-                for f in y.features.keys():
-                    self.features['common'][f] = y.features[f]
-            for f in y.flags:
-                self.flags['common'][f] = y.flags[f]
+        for step in steps:
+            self._run_step(step, 'common')
 
         # if self.saveauxiliary:
         #     self.features['common'] = {}
@@ -182,9 +188,26 @@ class ProfileQC:
         #     except:
         #         pass
 
-    def evaluate(self, v, cfg):
+    def evaluate(self, v, cfg, steps=None):
+        """Evaluate one variable
+
+        Parameters
+        ----------
+        v: str
+            The variable to evaluate, like 'TEMP'.
 
-        self.flags[v] = {}
+        cfg: dict
+            The QC configuration for this variable.
+
+        steps: list of QCStep, optional
+            The steps compiled from cfg. If not given they are compiled
+            from cfg, see cotede.plan.compile_steps().
+        """
+        if steps is None:
+            steps = compile_steps(cfg)
+
+        # All the flags of v in one contiguous int8 table, see FlagTable
+        self.flags[v] = FlagTable(np.shape(self.input[v]))
 
         # Apply common flag for all points.
         if 'common' in self.flags:
@@ -197,134 +220,34 @@ class ProfileQC:
             if v not in self.features.keys():
                 self.features[v] = {}
 
-        if 'platform_identification' in cfg:
-            module_logger.warning(
-                    "Sorry I'm not ready to evaluate platform_identification()")
-
-        if 'valid_geolocation' in cfg:
-            y = qctests.ValidGeolocation(
-                    self.input, v, cfg['valid_geolocation'], autoflag=True)
-
-            if self.saveauxiliary:
-                for f in y.features.keys():
-                    self.features[v][f] = y.features[f]
-            for f in y.flags:
-                self.flags[v][f] = y.flags[f]
-
-        if 'valid_speed' in cfg:
-            # Think about. Argo also has a test valid_speed, but that is
-            #   in respect to sucessive profiles. How is the best way to
-            #   distinguish them here?
-            try:
-                if self.saveauxiliary:
-                    self.flags[v]['valid_speed'], \
-                            self.features[v]['valid_speed'] = \
-                            qctests.possible_speed(self.input, cfg['valid_speed'])
-            except Exception:
-                module_logger.warning("Fail on valid_speed")
-
-        if 'grey_list' in cfg:
-            module_logger.warning("Sorry I'm not ready to evaluate grey_list()")
-
-        if 'gross_sensor_drift' in cfg:
-            module_logger.warning(
-                    "Sorry I'm not ready to evaluate gross_sensor_drift()")
-
-        if 'frozen_profile' in cfg:
-            module_logger.warning(
-                    "Sorry I'm not ready to evaluate frozen_profile()")
-
-        criteria = (c for c in cfg if (cfg[c] is not None) and ("procedure" in cfg[c]) and 
-                    (cfg[c]["procedure"] in qctests.QCTESTS))
-        for criterion in criteria:
-            Procedure = qctests.catalog(cfg[criterion]["procedure"])
-            if issubclass(Procedure, qctests.core.QCCheckVar):
-                y = Procedure(self.input, varname=v, cfg=cfg[criterion], autoflag=True)
-            elif issubclass(Procedure, qctests.core.QCCheck):
-                y = Procedure(self.input, cfg=cfg[criterion], autoflag=True)
-
-            if self.saveauxiliary:
-                for f in y.features.keys():
-                    self.features[v][f] = y.features[f]
-            for f in y.flags:
-                self.flags[v][f] = y.flags[f]
-        #if 'spike_depthsmooth' in cfg:
-        #    from maud.window_func import _weight_hann as wfunc
-        #    cfg_tmp = cfg['spike_depthsmooth']
-        #    cfg_tmp['dzwindow'] = 10
-        #    smooth = ma.masked_all(self.input[v].shape)
-        #    z = ped['pressure']
-        #    for i in range(len(self.input[v])):
-        #        ind = np.nonzero(ma.absolute(z-z[i]) < \
-        #                cfg_tmp['dzwindow'])[0]
-        #        ind = ind[ind != i]
-        #        w = wfunc(z[ind]-z[i], cfg_tmp['dzwindow'])
-        #        smooth[i] = (T[ind]*w).sum()/w.sum()
-
-
-        #if 'pstep' in cfg:
-        #    ind = np.isfinite(self.input[v])
-        #    ind = ma.getmaskarray(self.input[v])
-        #    if self.saveauxiliary:
-        #        self.features[v]['pstep'] = ma.concatenate(
-        #                [ma.masked_all(1),
-        #                    np.diff(self.input['PRES'][ind])])
-
-        # FIXME: the Anomaly Detection and Fuzzy require some features
-        #   to be estimated previously. Generalize this.
-        if 'anomaly_detection' in  cfg:
-            features = {}
-            for f in cfg['anomaly_detection']['features']:
-                try:
-                    features[f] = self.features[v][f]
-                except Exception:
-                    if f == 'spike':
-                        features['spike'] = qctests.spike(self.input[v])
-                    elif f == 'gradient':
-                        features['gradient'] = qctests.gradient(self.input[v])
-                    elif f == 'constant_cluster_size':
-                        features['constant_cluster_size'] = \
-                                qctests.constant_cluster_size(self.input[v])
-                    elif f == 'tukey53H_norm':
-                        features['tukey53H_norm'] = qctests.tukey53H_norm(self.input[v])
-                    elif f == 'rate_of_change':
-                        features['rate_of_change'] = qctests.rate_of_change(self.input[v])
-                    elif (f == 'woa_normbias'):
-                        y = qctests.WOA_NormBias(self.input, v, {}, autoflag=False)
-                        features['woa_normbias'] = \
-                                np.abs(y.features['woa_normbias'])
-                    elif (f == 'cars_normbias'):
-                        y = qctests.CARS_NormBias(self.input, v, {}, autoflag=False)
-                        features['cars_normbias'] = \
-                                np.abs(y.features['cars_normbias'])
-                    else:
-                        module_logger.error(
-                                f"Sorry, I can't evaluate anomaly_detection with: {f}")
-
-            prob, self.flags[v]['anomaly_detection'] = \
-                    qctests.anomaly_detection(features, cfg['anomaly_detection'])
-
-            if self.saveauxiliary:
-                self.features[v]['anomaly_detection'] = prob
-
-        if 'morello2014' in cfg:
-            y = qctests.Morello2014(self.input, v, cfg['morello2014'], autoflag=True)
-            if self.saveauxiliary:
-                for f in y.features.keys():
-                    self.features[v][f] = y.features[f]
-            for f in y.flags:
-                self.flags[v][f] = y.flags[f]
-
-        if "fuzzylogic" in  cfg:
-            y = qctests.FuzzyLogic(self.input, v, cfg["fuzzylogic"], autoflag=True)
-            if self.saveauxiliary:
-                for f in y.features.keys():
-                    self.features[v][f] = y.features[f]
-            for f in y.flags:
-                self.flags[v][f] = y.flags[f]
+        for step in steps:
+            self._run_step(step, v)
 
         self.flags[v]['overall'] = combined_flag(self.flags[v])
 
+    def _run_step(self, step, v):
+        seconds = self.plan.run(step, self, v)
+        self._step_timing.append((v, step.name, seconds))
+
+    def step_timing(self):
+        """Compute time of each step evaluated on this profile, slowest first
+
+        See also QCPlan.report() for the time accumulated over all the
+        profiles evaluated with the same plan.
+        """
+        report = [
+            {"varname": v, "step": step, "seconds": seconds}
+            for v, step, seconds in self._step_timing
+        ]
+        return sorted(report, key=lambda r: r["seconds"], reverse=True)
+
+    def feature_timing(self):
+        """Compute time and number of reuses of each feature, slowest first
+
+        See FeatureCache.report()
+        """
+        return self.feature_cache.report()
+
     def build_features(self):
         if not hasattr(self, 'features'):
             self.features = {}
@@ -361,3 +284,467 @@ class ProfileQCed(ProfileQC):
                     mask=(self.flags[key]['overall']!=1))
 
         raise KeyError(f'{key} not found')
+
+
+# QC configuration used by the worker processes of ProfileQCCollection. It is
+# sent once per worker by the pool initializer instead of once per profile,
+# and each worker builds its execution plan only once.
+_worker_plan = None
+
+
+def _init_worker(cfg):
+    global _worker_plan
+    _worker_plan = compile_plan(cfg)
+
+
+def _profile_flags(profile_id, profile, plan=None):
+    """Run ProfileQC on one profile and return only its flags"""
+    if plan is None:
+        plan = _worker_plan
+    pqc = ProfileQC(profile, saveauxiliary=False, verbose=False, plan=plan)
+    flags = {v: f for v, f in pqc.flags.items() if v != "common"}
+    return profile_id, flags
+
+
+# Climatology comparisons and the query builder of each, see _prefetch_requests()
+_CLIMATOLOGY_QUERIES = {
+    "WOA_NormBias": ("WOA", WOA_VARS, woa_query),
+    "CARS_NormBias": ("CARS", CARS_VARS, cars_query),
+}
+
+
+def _prefetch_requests(profiles, plan):
+    """Climatology extractions that plan will need for profiles
+
+    Profiles missing time, position or valid depths are skipped, and
+    ProfileQC reports them when the check runs.
+    """
+    requests = []
+    for profile in profiles:
+        for v in profile.keys():
+            c = plan.vartype(v)
+            if c is None:
+                continue
+            for step in plan.variables[c]:
+                procedure = step.cfg.get("procedure") if isinstance(step.cfg, dict) else None
+                if procedure not in _CLIMATOLOGY_QUERIES:
+                    continue
+                dbname, var, query_fn = _CLIMATOLOGY_QUERIES[procedure]
+                try:
+                    query = query_fn(profile, v)[0]
+                except (LookupError, IndexError):
+                    continue
+                requests.append(dict(query, dbname=dbname, var=var))
+    return requests
+
+
+def _profiles_flags(profile_ids, profiles, plan=None):
+    """Run ProfileQC on many profiles, sharing their climatology extractions
+
+    The climatology values of all the profiles are extracted at once, one
+    extraction per position and day of year, before evaluating them.
+    """
+    if plan is None:
+        plan = _worker_plan
+    with climatology_session().prefetch(_prefetch_requests(profiles, plan)):
+        return [
+            _profile_flags(profile_id, profile, plan)
+            for profile_id, profile in zip(profile_ids, profiles, strict=True)
+        ]
+
+
+def flags_to_frame(flags):
+    """Columnar table of the flags of many profiles
+
+    Parameters
+    ----------
+    flags: dict
+        Flags per profile id, as {profile_id: {varname: {test: flags}}}.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per measurement indexed by (profile_id, position), and one
+        int8 column per (varname, test). Tests that were not applied on a
+        profile are flagged 0 (no QC performed).
+    """
+    frames = []
+    for profile_id, profile_flags in flags.items():
+        columns = {
+            (v, t): np.asarray(f, dtype="i1").reshape(-1)
+            for v in profile_flags
+            for t, f in profile_flags[v].items()
+        }
+        if not columns:
+            continue
+        size = max(len(c) for c in columns.values())
+        columns = {
+            k: np.broadcast_to(c, size) if len(c) == 1 else c
+            for k, c in columns.items()
+        }
+        index = pd.MultiIndex.from_product(
+            [[profile_id], np.arange(size)], names=["profile_id", "position"])
+        frames.append(pd.DataFrame(columns, index=index))
+
+    if not frames:
+        return pd.DataFrame(
+            index=pd.MultiIndex.from_arrays([[], []], names=["profile_id", "position"]))
+    output = pd.concat(frames)
+    output.columns = pd.MultiIndex.from_tuples(output.columns, names=["varname", "test"])
+    return output.fillna(0).astype("i1")
+
+
+class ProfileQCCollection:
+    """Quality Control many CTD profiles with one QC configuration
+    """
+
+    def __init__(self, profiles, cfg=None, n_jobs=None):
+        """Apply the same QC procedure to a collection of profiles
+
+        The configuration is loaded and normalized once and the profiles are
+        evaluated in a pool of worker processes. Each worker keeps its own
+        climatology session (WOA, CARS) open for all the profiles it
+        evaluates, and the profiles of a chunk sharing a position and day of
+        year get their climatology from a single extraction.
+
+        Parameters
+        ----------
+        profiles: dict-like or iterable
+            The profiles to evaluate, each one a valid input for ProfileQC. If
+            a mapping, its keys are used as profile ids, otherwise the
+            position in the sequence is used.
+
+        cfg: dict-like or str
+            The QC configuration, as in ProfileQC.
+
+        n_jobs: int, optional
+            Number of worker processes. If None, use all the available CPUs.
+            With n_jobs=1 the profiles are evaluated in the current process.
+
+        Attributes
+        ----------
+        flags: dict
+            Flags per profile id, as {profile_id: {varname: {test: flags}}}.
+        """
+        if isinstance(profiles, Mapping):
+            profile_ids = list(profiles.keys())
+            profiles = [profiles[k] for k in profile_ids]
+        else:
+            profiles = list(profiles)
+            profile_ids = list(range(len(profiles)))
+
+        self.cfg = load_cfg(cfg)
+        self.n_jobs = n_jobs or os.process_cpu_count() or 1
+        self.flags = {}
+
+        if (self.n_jobs == 1) or (len(profiles) <= 1):
+            plan = compile_plan(self.cfg)
+            self.flags.update(_profiles_flags(profile_ids, profiles, plan))
+            return
+
+        n_workers = min(self.n_jobs, len(profiles))
+        chunksize = max(1, len(profiles) // (4 * n_workers))
+        # Whole chunks are sent to the workers so that each can batch the
+        # climatology extractions of its profiles
+        chunks = range(0, len(profiles), chunksize)
+        with ProcessPoolExecutor(
+                max_workers=n_workers, initializer=_init_worker, initargs=(self.cfg,)
+        ) as executor:
+            for chunk in executor.map(
+                    _profiles_flags,
+                    [profile_ids[i:i + chunksize] for i in chunks],
+                    [profiles[i:i + chunksize] for i in chunks]):
+                self.flags.update(chunk)
+
+    def keys(self):
+        """Profile ids in the collection"""
+        return self.flags.keys()
+
+    def __getitem__(self, profile_id):
+        """Flags of one profile"""
+        return self.flags[profile_id]
+
+    def __len__(self):
+        return len(self.flags)
+
+    def to_frame(self):
+        """All the flags as a columnar table, see flags_to_frame()"""
+        return flags_to_frame(self.flags)
+
+
+def qc_many(profiles, cfg=None, n_jobs=None):
+    """Quality control many profiles in parallel
+
+    Shortcut for ProfileQCCollection(profiles, cfg, n_jobs).to_frame()
+
+    Returns
+    -------
+    pd.DataFrame
+        Flags indexed by (profile_id, position) with one column per
+        (varname, test).
+    """
+    return ProfileQCCollection(profiles, cfg=cfg, n_jobs=n_jobs).to_frame()
+
+
+def _filled(x):
+    """Values of x as a 1-D float array with NaN where masked or invalid"""
+    return ma.filled(ma.masked_invalid(ma.asarray(x, dtype="f8")), np.nan).reshape(-1)
+
+
+def profile_table(pqc):
+    """Data, flags and features of one evaluated profile as a single table
+
+    Parameters
+    ----------
+    pqc: ProfileQC
+        An evaluated profile.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per measurement, indexed by position, and columns
+        (kind, varname, name) where kind is "data", "flags" or "features".
+        Data columns have an empty name. Profile-wide flags or features are
+        repeated on every row, and anything else not aligned with the data
+        is left out.
+    """
+    data = {}
+    for v in pqc.keys():
+        try:
+            data[v] = _filled(pqc[v])
+        except (TypeError, ValueError):
+            module_logger.debug(f"{pqc.name} - ignoring non numeric {v}")
+    size = max((len(x) for x in data.values()), default=0)
+
+    columns = {("data", v, ""): x for v, x in data.items() if len(x) == size}
+    for kind, content in (("flags", pqc.flags), ("features", getattr(pqc, "features", {}))):
+        for v in content:
+            if v == "common":
+                continue
+            for name, x in content[v].items():
+                try:
+                    x = np.asarray(x, dtype="i1").reshape(-1) if kind == "flags" else _filled(x)
+                except (TypeError, ValueError):
+                    continue
+                if len(x) == 1:
+                    x = np.repeat(x, size)
+                if len(x) == size:
+                    columns[(kind, v, name)] = x
+
+    output = pd.DataFrame(columns, index=pd.RangeIndex(size, name="position"))
+    output.columns = pd.MultiIndex.from_tuples(
+        output.columns, names=["kind", "varname", "name"])
+    return output
+
+
+def _file_table(profile_id, filename, plan=None, saveauxiliary=True):
+    """Load and evaluate one file, returning its table or the error message"""
+    if plan is None:
+        plan = _worker_plan
+    try:
+        profile = load_profile(filename)
+        pqc = ProfileQC(profile, saveauxiliary=saveauxiliary, verbose=False, plan=plan)
+    except Exception as e:
+        return profile_id, None, f"{type(e).__name__}: {e}"
+    return profile_id, profile_table(pqc), None
+
+
+def _cfg_hash(cfg):
+    return hashlib.sha1(json.dumps(cfg, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _empty_table():
+    return pd.DataFrame(
+        index=pd.MultiIndex.from_arrays([[], []], names=["profile_id", "position"]),
+        columns=pd.MultiIndex.from_arrays([[], [], []], names=["kind", "varname", "name"]))
+
+
+class ProfilesQCPandasCollection:
+    """Quality Control all the profiles in a directory, as pandas tables
+    """
+
+    CACHE_VERSION = 1
+
+    def __init__(self, inputdir, cfg=None, saveauxiliary=True, n_jobs=None,
+                 cache=None, extensions=None):
+        """Evaluate the CNV and ODF files in inputdir and its sub-directories
+
+        The files are loaded and evaluated in a pool of worker processes, and
+        the data, flags and features of all profiles are concatenated in
+        tables indexed by (profile_id, position), where profile_id is the
+        path of the file relative to inputdir.
+
+        Parameters
+        ----------
+        inputdir: str
+            Directory with the profiles.
+
+        cfg: dict-like or str
+            The QC configuration, as in ProfileQC.
+
+        saveauxiliary: bool
+            Save the features of the QC tests.
+
+        n_jobs: int, optional
+            Number of worker processes. If None, use all the available CPUs.
+            With n_jobs=1 the files are evaluated in the current process.
+
+        cache: str, optional
+            Parquet file used to persist the results. When it exists, only
+            the files that are new or modified since, or all of them if cfg
+            changed, are evaluated again. Requires pyarrow.
+
+        extensions: list of str, optional
+            File extensions to include, see utils.profiles.find_profiles().
+
+        Attributes
+        ----------
+        data: pd.DataFrame
+            The measurements, one column per variable, plus profilename.
+        flags: dict
+            Flags per variable, as {varname: pd.DataFrame}, with one int8
+            column per test.
+        features: dict
+            Features per variable, as {varname: pd.DataFrame}.
+        errors: dict
+            Files that could not be evaluated, as {profile_id: message}.
+        """
+        self.inputdir = inputdir
+        self.cfg = load_cfg(cfg)
+        self.saveauxiliary = saveauxiliary
+        self.n_jobs = n_jobs or os.process_cpu_count() or 1
+        self.errors = {}
+
+        files = {}
+        for profile_id in find_profiles(inputdir, extensions):
+            st = os.stat(os.path.join(inputdir, profile_id))
+            files[profile_id] = [st.st_size, st.st_mtime_ns]
+        cfg_hash = _cfg_hash(self.cfg)
+
+        table, cached = _empty_table(), {}
+        if (cache is not None) and os.path.exists(cache):
+            table, meta = self._read_cache(cache)
+            if (meta.get("version") == self.CACHE_VERSION) and \
+                    (meta.get("cfg") == cfg_hash) and \
+                    (meta.get("saveauxiliary") or not saveauxiliary):
+                cached = meta["files"]
+            else:
+                module_logger.debug(f"Ignoring outdated cache {cache}")
+        reuse = [k for k in files if cached.get(k) == files[k]]
+        pending = [k for k in files if cached.get(k) != files[k]]
+        module_logger.debug(
+            f"{len(reuse)} profiles from cache, {len(pending)} to evaluate")
+
+        frames = {}
+        for profile_id, frame, error in self._evaluate(pending):
+            if error is None:
+                frames[profile_id] = frame
+            else:
+                module_logger.warning(f"Failed to evaluate {profile_id}: {error}")
+                self.errors[profile_id] = error
+
+        table = table[table.index.get_level_values("profile_id").isin(reuse)]
+        if frames:
+            new = pd.concat(frames, names=["profile_id", "position"])
+            table = pd.concat([table, new]) if len(table) else new
+        table = table.sort_index(level="profile_id", sort_remaining=False)
+        table = table[sorted(table.columns, key=lambda c: ("data", "flags", "features").index(c[0]))]
+        for c in table.columns:
+            if c[0] == "flags":
+                table[c] = table[c].fillna(0).astype("i1")
+        self._table = table
+
+        if (cache is not None) and (frames or set(cached) != set(reuse)):
+            evaluated = set(reuse) | set(frames)
+            self._write_cache(cache, {
+                "version": self.CACHE_VERSION,
+                "cfg": cfg_hash,
+                "saveauxiliary": saveauxiliary,
+                "files": {k: v for k, v in files.items() if k in evaluated}})
+
+    def _evaluate(self, profile_ids):
+        filenames = [os.path.join(self.inputdir, k) for k in profile_ids]
+        if (self.n_jobs == 1) or (len(profile_ids) <= 1):
+            plan = compile_plan(self.cfg)
+            for profile_id, filename in zip(profile_ids, filenames, strict=True):
+                yield _file_table(profile_id, filename, plan, self.saveauxiliary)
+            return
+
+        n_workers = min(self.n_jobs, len(profile_ids))
+        chunksize = max(1, len(profile_ids) // (4 * n_workers))
+        with ProcessPoolExecutor(
+                max_workers=n_workers, initializer=_init_worker, initargs=(self.cfg,)
+        ) as executor:
+            yield from executor.map(
+                _file_table, profile_ids, filenames,
+                [None] * len(profile_ids), [self.saveauxiliary] * len(profile_ids),
+                chunksize=chunksize)
+
+    @staticmethod
+    def _read_cache(filename):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(filename)
+        meta = json.loads(table.schema.metadata.get(b"cotede", b"{}"))
+        return table.to_pandas(), meta
+
+    def _write_cache(self, filename, meta):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(self._table)
+        table = table.replace_schema_metadata(
+            {**table.schema.metadata, b"cotede": json.dumps(meta).encode()})
+        tmp = f"{filename}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, filename)
+
+    def _kind(self, kind):
+        if kind not in self._table.columns.get_level_values("kind"):
+            return pd.DataFrame(index=self._table.index)
+        return self._table[kind]
+
+    @property
+    def data(self):
+        output = self._kind("data").droplevel("name", axis=1)
+        output.columns.name = None
+        profile_id = output.index.get_level_values("profile_id")
+        output.insert(0, "profilename", [posixpath.basename(p) for p in profile_id])
+        return output
+
+    @property
+    def flags(self):
+        table = self._kind("flags")
+        return {v: table[v] for v in table.columns.unique("varname")} if len(table.columns) else {}
+
+    @property
+    def features(self):
+        table = self._kind("features")
+        return {v: table[v] for v in table.columns.unique("varname")} if len(table.columns) else {}
+
+    @property
+    def auxiliary(self):
+        module_logger.warning('ATENTION: Please use .features instead.'
+                              'auxiliary will be eventually removed.')
+        return self.features
+
+    def keys(self):
+        """Variables that were evaluated"""
+        return self.flags.keys()
+
+    def __len__(self):
+        """Number of profiles"""
+        return len(self._table.index.unique("profile_id"))
+
+    def to_frame(self, varname):
+        """Data, flags and features of one variable in a single table
+
+        Flags are named "flag_<test>" and the profile id is also available as
+        the column profileid, as expected by
+        anomaly_detection.human_calibrate_mistakes().
+        """
+        output = self.data
+        output.insert(0, "profileid", output.index.get_level_values("profile_id"))
+        flags = self.flags[varname].add_prefix("flag_")
+        features = self.features.get(varname, pd.DataFrame(index=output.index))
+        return pd.concat([output, flags, features], axis=1)
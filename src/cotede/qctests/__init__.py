@@ -3,19 +3,23 @@
 from .bin_spike import Bin_Spike
 from .cars_normbias import CARS_NormBias
 from .constant_cluster_size import ConstantClusterSize
+from .core import FeatureCache  # noqa: F401
 from .cum_rate_of_change import CumRateOfChange
 from .deepest_pressure import DeepestPressure
 from .density_inversion import DensityInversion
 from .digit_roll_over import DigitRollOver
+from .fuzzylogic import FuzzyLogic  # noqa: F401
 from .global_range import GlobalRange
 from .gradient import Gradient
 from .gradient_depthconditional import GradientDepthConditional
 from .location_at_sea import LocationAtSea
 from .monotonic_z import MonotonicZ
+from .morello2014 import Morello2014  # noqa: F401
 from .profile_envelop import ProfileEnvelop
 from .qctests import *  # noqa: F403
 from .rate_of_change import RateOfChange
 from .regional_range import RegionalRange
+from .rolling_std import RollingStd
 from .spike import Spike
 from .spike_depthconditional import SpikeDepthConditional
 from .stuck_value import StuckValue
@@ -39,6 +43,7 @@ QCTESTS = {
     "ProfileEnvelop": ProfileEnvelop,
     "RateOfChange": RateOfChange,
     "RegionalRange": RegionalRange,
+    "RollingStd": RollingStd,
     "Spike": Spike,
     "SpikeDepthConditional": SpikeDepthConditional,
     "StuckValue": StuckValue,
@@ -7,6 +7,10 @@
 
 import numpy as np
 from numpy import ma
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Number of windows processed at once, to bound the temporary sorted copies.
+CHUNK_SIZE = 2**16
 
 
 def bin_spike(x, number_of_points):
@@ -20,27 +24,50 @@ def bin_spike(x, number_of_points):
 
         Maybe use pstsd instead?
 
-        Dummy way to avoid warnings when x[ini:fin] are all masked.
-        Improve this in the future.
+        Masked and non-finite values are ignored both in the median of
+          the bin and in the standard deviation of the neighbors, and the
+          feature is only estimated when the bin has at least 3 valid
+          points. All bins are evaluated together on sliding window views
+          of the data, in chunks of CHUNK_SIZE points.
     """
     assert x.ndim == 1, "I'm not ready to deal with multidimensional x"
 
     assert number_of_points%2 == 0, "number_of_points must be an even integer"
 
     N = len(x)
-    bin = ma.masked_all(N)
-    # bin_std = ma.masked_all(N)
     half_window = int(number_of_points/2)
-    idx = (i for i in range(half_window, N - half_window) if np.isfinite(x[i]))
-    for i in idx:
-        ini = max(0, i - half_window)
-        fin = min(N, i + half_window)
-        # At least 3 valid points
-        if ma.compressed(x[ini:fin]).size >= 3:
-            bin[i] = x[i] - ma.median(x[ini:fin])
-            # bin_std[i] = (np.append(x[ini:i], x[i+1:fin+1])).std()
-            bin[i] /= (np.append(x[ini:i], x[i+1:fin+1])).std()
-
+    bin = ma.masked_all(N)
+    if N - 2 * half_window <= 0:
+        return bin
+
+    v = ma.filled(ma.masked_invalid(ma.array(x, dtype='f8')), np.nan)
+    # Windows for the bin median, x[i-h:i+h], and the neighbors, x[i-h:i+h+1] without x[i].
+    bins = sliding_window_view(v[:N - 1], number_of_points)
+    neighbors = sliding_window_view(v, number_of_points + 1)
+
+    feature = np.full(N, np.nan)
+    valid = np.zeros(N, dtype=bool)
+    for start in range(0, N - 2 * half_window, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, N - 2 * half_window)
+        center = v[start + half_window:stop + half_window]
+
+        window = np.sort(bins[start:stop], axis=1)
+        n_valid = np.isfinite(window).sum(axis=1)
+        ok = np.isfinite(center) & (n_valid >= 3)
+        rows = np.arange(window.shape[0])
+        lower = window[rows, np.maximum(n_valid - 1, 0) // 2]
+        upper = window[rows, n_valid // 2]
+        median = np.where(n_valid % 2 == 1, lower, 0.5 * (lower + upper))
+
+        around = np.delete(neighbors[start:stop], half_window, axis=1)
+        n_around = np.isfinite(around).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nansum(around, axis=1) / n_around
+            std = np.sqrt(np.nansum((around - mean[:, None]) ** 2, axis=1) / n_around)
+            feature[start + half_window:stop + half_window] = (center - median) / std
+        valid[start + half_window:stop + half_window] = ok
+
+    bin[valid] = feature[valid]
     return bin
 
 
@@ -6,36 +6,46 @@ import logging
 
 import numpy as np
 from numpy import ma
-from oceansdb import CARS
 
 from ..utils import day_of_year, extract_coordinates, extract_depth, extract_time
+from ..utils.climatology import climatology_session
 from .core import QCCheckVar
 
 module_logger = logging.getLogger(__name__)
 
 
-def cars_normbias(data, varname, attrs=None, use_standard_error=False):
-    """
+CARS_VARS = [
+    "mean",
+    # "standard_deviation",
+    "std_dev",
+    # "number_of_observations",
+]
 
-    Notes
-    -----
-    - Include arguments to overwrite target variable (timename=None, latname=None, lonname=None)
 
+def cars_query(data, varname, attrs=None):
+    """Arguments of the CARS extraction for a profile
+
+    Returns
+    -------
+    query : dict
+        vtype, doy, depth (valid levels only), lat, lon and mode.
+    depth : array_like
+        All the depth levels of the profile.
+    idx : array_like or None
+        Valid depth levels, or None if all are valid.
     """
     try:
         doy = day_of_year(extract_time(data, attrs))
-    except LookupError:
-        module_logger.error("Missing time")
-        raise
+    except LookupError as err:
+        raise LookupError("Missing time") from err
 
     try:
         # Note that QCCheck fallback to self.data.attrs if attrs not given
         lat, lon = extract_coordinates(data, attrs)
-    except LookupError:
-        module_logger.error("Missing geolocation (lat/lon)")
-        raise
+    except LookupError as err:
+        raise LookupError("Missing geolocation (lat/lon)") from err
 
-    kwargs = {"lat": lat, "lon": lon}
+    query = {"lat": lat, "lon": lon}
 
     if (np.size(lat) > 1) | (np.size(lon) > 1):
         dLmax = max(np.max(lat) - np.min(lat), np.max(lon) - np.min(lon))
@@ -44,21 +54,20 @@ def cars_normbias(data, varname, attrs=None, use_standard_error=False):
             # kwargs["alongtrack_axis"] = ['lat', 'lon']
         else:
             mode = "profile"
-            kwargs = {
+            query = {
                 "lat": np.mean(lat),
                 "lon": np.mean(lon),
             }
             module_logger.warning(
                 "Multiple lat/lon positions but too close to each other so it will be " \
                 "considered a single position for the WOA comparison. " \
-                "lat: {}, lon: {}".format(kwargs["lat"], kwargs["lon"])
+                "lat: {}, lon: {}".format(query["lat"], query["lon"])
             )
     else:
         mode = "profile"
 
     depth = extract_depth(data)
 
-    db = CARS()
     # This must go away. This was a trick to handle Seabird CTDs, but
     # now that seabird is a different package it should be handled there.
     if isinstance(varname, str) and (varname[-1] == "2"):
@@ -66,31 +75,41 @@ def cars_normbias(data, varname, attrs=None, use_standard_error=False):
     else:
         vtype = varname
 
-    cars_vars = [
-        "mean",
-        # "standard_deviation",
-        "std_dev",
-        # "number_of_observations",
-    ]
-
     # Eventually the case of some invalid depth levels will be handled by
     # OceansDB and the following steps will be simplified.
     valid_depth = depth
+    idx = None
     if np.size(depth) > 0:
         idx = ~ma.getmaskarray(depth) & (np.array(depth) >= 0) & np.isfinite(depth)
         if not idx.any():
-            module_logger.error(
-                f"Invalid depth(s) for CARS comparison: {depth}"
-            )
-            raise IndexError
+            raise IndexError(f"Invalid depth(s) for CARS comparison: {depth}")
         elif not idx.all():
             valid_depth = depth[idx]
-    if mode == "track":
-        cars = db[vtype].track(var=cars_vars, doy=doy, depth=valid_depth, **kwargs)
-    else:
-        cars = db[vtype].extract(var=cars_vars, doy=doy, depth=valid_depth, **kwargs)
+        else:
+            idx = None
+
+    query.update(vtype=vtype, doy=doy, depth=valid_depth, mode=mode)
+    return query, depth, idx
+
+
+def cars_normbias(data, varname, attrs=None, use_standard_error=False):
+    """
+
+    Notes
+    -----
+    - Include arguments to overwrite target variable (timename=None, latname=None, lonname=None)
+
+    """
+    try:
+        query, depth, idx = cars_query(data, varname, attrs)
+    except (LookupError, IndexError) as err:
+        module_logger.error(err)
+        raise
+
+    # The climatology handles and recent extractions are shared by the whole process.
+    cars = climatology_session().extract("CARS", var=CARS_VARS, **query)
 
-    if not np.all(depth == valid_depth):
+    if idx is not None:
         for v in cars.keys():
             tmp = ma.masked_all(depth.shape, dtype=cars[v].dtype)
             tmp[idx] = cars[v]
@@ -151,7 +170,7 @@ class CARS_NormBias(QCCheckVar):
     # 3 is the possible minimum to estimate the std, but I shold use higher.
     min_samples = 3
 
-    def __init__(self, data, varname, cfg=None, autoflag=True):
+    def __init__(self, data, varname, cfg=None, autoflag=True, feature_cache=None):
         try:
             self.use_standard_error = cfg["use_standard_error"]
         except (KeyError, TypeError):
@@ -161,11 +180,12 @@ class CARS_NormBias(QCCheckVar):
         except (KeyError, TypeError):
             module_logger.debug("min_samples undefined. Using default value")
 
-        super().__init__(data, varname, cfg, autoflag)
+        super().__init__(data, varname, cfg, autoflag, feature_cache=feature_cache)
 
     def set_features(self):
         try:
-            self.features = cars_normbias(self.data, self.varname, self.attrs)
+            self.features = dict(self.shared_feature(
+                "cars_normbias", cars_normbias, self.data, self.varname, self.attrs))
         except LookupError:
             self.features = {}
 
@@ -6,6 +6,63 @@ from numpy import ma
 from .core import QCCheckVar
 
 
+def _run_extent(v):
+    """Forward and backward extent of the runs of identical values in v"""
+    n = v.size
+    change = np.flatnonzero(v[1:] != v[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [n]))
+    run = np.repeat(np.arange(starts.size), ends - starts)
+    i = np.arange(n)
+    return ends[run] - 1 - i, i - starts[run]
+
+
+def _forward_extent(v, tol):
+    """Number of consecutive values after each v[i] within v[i] +- tol
+
+       Galloping search over a sparse table of window maxima and minima:
+         the window after each point is doubled while it stays within the
+         tolerance and then refined by halving, so the cost is
+         O(n log(cluster size)) instead of O(n * cluster size).
+    """
+    n = v.size
+    extent = np.zeros(n, dtype='i')
+    if n < 2:
+        return extent
+
+    upper = v + tol
+    lower = v - tol
+    # levels[k] holds the max and min of the windows of length 2**k
+    levels = [(v, v)]
+
+    def within(i, k):
+        if k == len(levels):
+            vmax, vmin = levels[-1]
+            h = 2 ** (k - 1)
+            levels.append((np.maximum(vmax[:-h], vmax[h:]), np.minimum(vmin[:-h], vmin[h:])))
+        vmax, vmin = levels[k]
+        pos = i + 1 + extent[i]
+        ok = pos + 2 ** k <= n
+        ok[ok] = (vmax[pos[ok]] <= upper[i[ok]]) & (vmin[pos[ok]] >= lower[i[ok]])
+        return ok
+
+    stop_level = np.zeros(n, dtype='i')
+    active = np.arange(n - 1)
+    k = 0
+    while active.size > 0:
+        ok = within(active, k)
+        extent[active[ok]] += 2 ** k
+        stop_level[active[~ok]] = k
+        active = active[ok]
+        k += 1
+
+    for k in range(int(stop_level.max()) - 1, -1, -1):
+        candidates = np.flatnonzero(stop_level > k)
+        ok = within(candidates, k)
+        extent[candidates[ok]] += 2 ** k
+    return extent
+
+
 def constant_cluster_size(x, tol=0):
     """Estimate the cluster size with (nearly) constant value
 
@@ -18,20 +75,16 @@ def constant_cluster_size(x, tol=0):
     tol = tol + 1e-5 * tol
 
     ivalid = np.nonzero(~ma.getmaskarray(ma.fix_invalid(x)))[0]
-    dx = np.diff(np.atleast_1d(x)[ivalid])
+    v = np.asarray(ma.getdata(np.atleast_1d(x)), dtype='f8')[ivalid]
+
+    if tol == 0:
+        forward, backward = _run_extent(v)
+    else:
+        forward = _forward_extent(v, tol)
+        backward = _forward_extent(v[::-1], tol)[::-1]
 
     cluster_size = np.zeros(np.shape(x), dtype='i')
-    for i, iv in enumerate(ivalid):
-        idx = np.absolute(dx[i:].cumsum()) > tol
-        if True in idx:
-            cluster_size[iv] += np.nonzero(idx)[0].min()
-        else:
-            cluster_size[iv] += idx.size
-        idx = np.absolute(dx[0:i][::-1].cumsum()) > tol
-        if True in idx:
-            cluster_size[iv] += np.nonzero(idx)[0].min()
-        else:
-            cluster_size[iv] += idx.size
+    cluster_size[ivalid] = forward + backward
     return cluster_size
 
 
@@ -40,7 +93,8 @@ class ConstantClusterSize(QCCheckVar):
        Need to implement a check on time. TSG specifies constant value during 6 hrs.
     """
     def set_features(self):
-        cluster_size = constant_cluster_size(self.data[self.varname])
+        cluster_size = self.shared_feature(
+            "constant_cluster_size", constant_cluster_size, self.data[self.varname])
         N = ma.compressed(self.data[self.varname]).size
         cluster_fraction = cluster_size / N
 
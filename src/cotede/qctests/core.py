@@ -4,10 +4,116 @@
 """
 
 import logging
+import time
+
+import numpy as np
+from numpy import ma
 
 module_logger = logging.getLogger(__name__)
 
 
+def normalize_input(x):
+    """Float values and validity mask of an input, without modifying it
+
+    Masked values are replaced by NaN. A floating point input without masked
+    values is returned as a read-only view, thus without copying it, while
+    a masked input is copied. Floating point inputs keep their precision and
+    anything else is converted to float64.
+
+    Parameters
+    ----------
+    x : array-like
+        A np.ndarray, np.ma.MaskedArray, pandas Series or alike.
+
+    Returns
+    -------
+    values : np.ndarray
+        Values of x with NaN where x is masked. It must not be modified.
+    valid : np.ndarray
+        True where x is not masked and is finite.
+    """
+    mask = ma.getmask(x)
+    if isinstance(x, ma.MaskedArray):
+        x = ma.getdata(x)
+    values = np.asarray(x)
+    if not np.issubdtype(values.dtype, np.floating):
+        if hasattr(x, "to_numpy"):
+            # pandas nullable types, with NA
+            values = x.to_numpy(dtype="f8", na_value=np.nan)
+        else:
+            values = values.astype("f8")
+
+    if np.any(mask):
+        values = np.where(mask, np.nan, values)
+    else:
+        values = values.view()
+    values.flags.writeable = False
+    return values, np.isfinite(values)
+
+
+class FeatureCache:
+    """Features of one dataset, computed once and shared by all QC checks
+
+    Several checks depend on the same features, like the spike, used by
+    Spike, SpikeDepthConditional, FuzzyLogic and Morello2014, or the rate
+    of change, used by RateOfChange and DigitRollOver. A FeatureCache
+    shared by all the checks of a profile computes each one of those only
+    once.
+
+    Features are identified by (varname, name, params). The positional
+    arguments of the feature function are expected to be always the same
+    for a given key, i.e. the data of the profile being evaluated.
+
+    Attributes
+    ----------
+    timing: dict
+        Compute time in seconds for each feature key.
+    hits: dict
+        Number of times each feature was reused instead of recomputed.
+    """
+
+    def __init__(self):
+        self.features = {}
+        self.timing = {}
+        self.hits = {}
+
+    def get(self, varname, name, func, *args, **params):
+        """Return a feature, computing it with func(*args, **params) if needed"""
+        key = (varname, name, tuple(sorted(params.items())))
+        if key in self.features:
+            self.hits[key] = self.hits.get(key, 0) + 1
+            return self.features[key]
+
+        start = time.perf_counter()
+        value = func(*args, **params)
+        self.timing[key] = time.perf_counter() - start
+        module_logger.debug(f"Feature {name} of {varname}: {self.timing[key]:.6f}s")
+        self.features[key] = value
+        return value
+
+    def set(self, varname, name, value, **params):
+        """Provide a feature computed elsewhere, to be used instead of func
+
+        For instance, a feature of one part of a long series that depends on
+        the previous parts.
+        """
+        self.features[(varname, name, tuple(sorted(params.items())))] = value
+
+    def report(self):
+        """Compute time and number of reuses of each feature, slowest first"""
+        report = [
+            {
+                "varname": key[0],
+                "feature": key[1],
+                "params": dict(key[2]),
+                "seconds": seconds,
+                "reused": self.hits.get(key, 0),
+            }
+            for key, seconds in self.timing.items()
+        ]
+        return sorted(report, key=lambda r: r["seconds"], reverse=True)
+
+
 class QCCheck:
     """Basic template for a QC check
     """
@@ -15,8 +121,9 @@ class QCCheck:
     flag_good = 1
     flag_bad = 4
 
-    def __init__(self, data, *, cfg=None, autoflag=True, attrs=None):
+    def __init__(self, data, *, cfg=None, autoflag=True, attrs=None, feature_cache=None):
         self.data = data
+        self.feature_cache = feature_cache
         if (cfg is not None):
             self.cfg = cfg
         elif not hasattr(self, 'cfg'):
@@ -42,6 +149,24 @@ class QCCheck:
     def set_features(self):
         self.features = {}
 
+    def normalized(self, varname=None):
+        """Float values and validity mask of a variable, see normalize_input()
+
+        It is evaluated once per variable if a feature_cache is given.
+        """
+        if varname is None:
+            varname = self.varname
+        if self.feature_cache is None:
+            return normalize_input(self.data[varname])
+        return self.feature_cache.get(varname, "normalize_input", normalize_input, self.data[varname])
+
+    def shared_feature(self, name, func, *args, **params):
+        """Feature func(*args, **params), reused from feature_cache if given"""
+        if self.feature_cache is None:
+            return func(*args, **params)
+        varname = getattr(self, "varname", None)
+        return self.feature_cache.get(varname, name, func, *args, **params)
+
     def set_flags(self):
         try:
             self.flag_good = self.cfg["flag_good"]
@@ -66,6 +191,6 @@ class QCCheckVar(QCCheck):
     """Template for a QC check of a specific variable
     """
 
-    def __init__(self, data, varname, cfg=None, autoflag=True, attrs=None):
+    def __init__(self, data, varname, cfg=None, autoflag=True, attrs=None, feature_cache=None):
         self.varname = varname
-        super().__init__(data=data, cfg=cfg, autoflag=autoflag, attrs=attrs)
+        super().__init__(data=data, cfg=cfg, autoflag=autoflag, attrs=attrs, feature_cache=feature_cache)
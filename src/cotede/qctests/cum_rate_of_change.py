@@ -29,35 +29,84 @@ i = small, medium, large
 import logging
 
 import numpy as np
-from numpy import ma
 
-from .core import QCCheckVar
+from .core import QCCheckVar, normalize_input
 
 module_logger = logging.getLogger(__name__)
 
-def cum_rate_of_change(x, memory):
+try:
+    import numba
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    module_logger.debug("Missing package numba, used to compile the cum_rate_of_change recurrence.")
+    NUMBA_AVAILABLE = False
+
+
+def _recurrence(y, memory, start=2):
+    """Apply the cumulative recurrence in place on a float64 array"""
+    for i in range(start, y.size):
+        if y[i] < y[i - 1]:
+            y[i] = (1 - memory) * y[i] + memory * y[i - 1]
+    return y
+
+
+def _recurrence_python(y, memory, start=2):
+    """Same as _recurrence but looping over Python floats
+
+    Python floats are the same IEEE doubles as float64, so the result is
+    bit-identical while avoiding the cost of indexing numpy scalars.
+    """
+    values = y.tolist()
+    for i in range(start, len(values)):
+        if values[i] < values[i - 1]:
+            values[i] = (1 - memory) * values[i] + memory * values[i - 1]
+    y[:] = values
+    return y
+
+
+if NUMBA_AVAILABLE:
+    _cum_rate_of_change_kernel = numba.njit(cache=True)(_recurrence)
+else:
+    _cum_rate_of_change_kernel = _recurrence_python
+
+
+def cum_rate_of_change(x, memory, initial=None):
     """Cummulative rate of change
+
+    Parameters
+    ----------
+    x : array_like
+        The series to evaluate.
+    memory : float
+        Weight of the previous cumulative rate of change, k in Timms 2011.
+    initial : float, optional
+        Cumulative rate of change at x[0], to continue a series evaluated in
+        parts, where x[0] is the last sample of the previous part. By
+        default x[0] is the first sample of the series.
     """
-    if isinstance(x, ma.MaskedArray):
-        x[x.mask] = np.nan
-        x = x.data
+    x = normalize_input(x)[0]
 
     y = np.nan * np.ones_like(x)
     y[1:] = np.absolute(np.diff(x))
 
-    for i in range(2, y.size):
-        if y[i] < y[i - 1]:
-            y[i] = (1 - memory) * y[i] + memory * y[i - 1]
+    start = 2
+    if (initial is not None) and (y.size > 0):
+        y[0] = initial
+        start = 1
 
-    return y
+    if y.dtype == np.float64 and y.ndim == 1:
+        return _cum_rate_of_change_kernel(y, float(memory), start)
+    return _recurrence(y, memory, start)
 
 
 class CumRateOfChange(QCCheckVar):
     def set_features(self):
         module_logger.debug("Feature: cummulative rate of change")
         self.features = {
-            "cum_rate_of_change": cum_rate_of_change(
-                self.data[self.varname], self.cfg["memory"]
+            "cum_rate_of_change": self.shared_feature(
+                "cum_rate_of_change", cum_rate_of_change,
+                self.data[self.varname], memory=self.cfg["memory"]
             )
         }
 
@@ -77,6 +126,6 @@ class CumRateOfChange(QCCheckVar):
         feature = np.absolute(self.features["cum_rate_of_change"])
         flag[np.nonzero(feature > threshold)] = self.flag_bad
         flag[np.nonzero(feature <= threshold)] = self.flag_good
-        x = self.data[self.varname]
-        flag[ma.getmaskarray(x) | ~np.isfinite(x)] = 9
+        _, valid = self.normalized()
+        flag[~np.atleast_1d(valid)] = 9
         self.flags["cum_rate_of_change"] = flag
@@ -48,12 +48,12 @@ def densitystep(SA, t, p, auto_rotate=False):
 
 
 class DensityInversion(QCCheck):
-    def __init__(self, data, cfg, autoflag=True):
+    def __init__(self, data, cfg, autoflag=True, feature_cache=None):
         assert "TEMP" in data.keys(), "Missing TEMP"
         assert "PSAL" in data.keys(), "Missing PSAL"
         assert "PRES" in data.keys(), "Missing PRES"
 
-        super().__init__(data=data, cfg=cfg, autoflag=autoflag)
+        super().__init__(data=data, cfg=cfg, autoflag=autoflag, feature_cache=feature_cache)
 
     def set_features(self):
         if not GSW_AVAILABLE:
@@ -62,7 +62,8 @@ class DensityInversion(QCCheck):
             return
 
         self.features = {
-            "densitystep": densitystep(
+            "densitystep": self.shared_feature(
+                "densitystep", densitystep,
                 self.data["PSAL"], self.data["TEMP"], self.data["PRES"]
             )
         }
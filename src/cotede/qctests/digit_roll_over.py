@@ -19,7 +19,10 @@ module_logger = logging.getLogger(__name__)
 
 class DigitRollOver(QCCheckVar):
     def set_features(self):
-        self.features = {"rate_of_change": rate_of_change(self.data[self.varname])}
+        self.features = {
+            "rate_of_change": self.shared_feature(
+                "rate_of_change", rate_of_change, self.data[self.varname])
+        }
 
     def test(self):
         self.flags = {}
@@ -42,6 +45,6 @@ class DigitRollOver(QCCheckVar):
         flag = np.zeros(np.shape(self.data[self.varname]), dtype="i1")
         flag[feature > threshold] = self.flag_bad
         flag[feature <= threshold] = self.flag_good
-        x = np.atleast_1d(self.data[self.varname])
-        flag[ma.getmaskarray(x) | ~np.isfinite(x)] = 9
+        _, valid = self.normalized()
+        flag[~np.atleast_1d(valid)] = 9
         self.flags["digit_roll_over"] = flag
@@ -44,17 +44,16 @@ def fuzzylogic(features, cfg, require="all"):
 class FuzzyLogic(QCCheckVar):
     def set_features(self):
         self.features = {}
+        x = self.data[self.varname]
         for v in [f for f in self.cfg["features"] if f not in self.features]:
-            if v == "woa_bias":
-                woa_comparison = woa_normbias(self.data, self.varname, self.attrs)
-                self.features[v] = woa_comparison["woa_bias"]
-            elif v == "woa_normbias":
-                woa_comparison = woa_normbias(self.data, self.varname, self.attrs)
-                self.features[v] = woa_comparison["woa_normbias"]
+            if v in ("woa_bias", "woa_normbias"):
+                woa_comparison = self.shared_feature(
+                    "woa_normbias", woa_normbias, self.data, self.varname, self.attrs)
+                self.features[v] = woa_comparison[v]
             elif v == "spike":
-                self.features[v] = spike(self.data[self.varname])
+                self.features[v] = self.shared_feature("spike", spike, x)
             elif v == "gradient":
-                self.features[v] = gradient(self.data[self.varname])
+                self.features[v] = self.shared_feature("gradient", gradient, x)
 
         self.features["fuzzylogic"] = fuzzylogic(self.features, self.cfg)
 
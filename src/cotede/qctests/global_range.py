@@ -12,7 +12,6 @@
 import logging
 
 import numpy as np
-from numpy import ma
 
 from .core import QCCheckVar
 
@@ -34,10 +33,7 @@ class GlobalRange(QCCheckVar):
         minval = self.cfg["minval"]
         maxval = self.cfg["maxval"]
 
-        feature = np.atleast_1d(self.data[self.varname])
-        if isinstance(feature, ma.MaskedArray):
-            feature[feature.mask] = np.nan
-            feature = feature.data
+        feature = np.atleast_1d(self.normalized()[0])
 
         flag = np.zeros(np.shape(feature), dtype="i1")
         flag[feature < minval] = self.flag_bad
@@ -10,7 +10,7 @@ import logging
 import numpy as np
 from numpy import ma
 
-from .core import QCCheckVar
+from .core import QCCheckVar, normalize_input
 
 try:
     import pandas as pd
@@ -37,8 +37,7 @@ def _curvature_pandas(x):
     - In the future this will be useful to handle specific window widths.
     """
     if isinstance(x, ma.MaskedArray):
-        x[x.mask] = np.nan
-        x = x.data
+        x = normalize_input(x)[0]
 
     if not PANDAS_AVAILABLE:
         return curvature(x)
@@ -67,14 +66,10 @@ def curvature(x):
     - Pandas.Series operates with indexes, so it should be done different. In
       that case, call for _curvature_pandas.
     """
-    if isinstance(x, ma.MaskedArray):
-        x[x.mask] = np.nan
-        x = x.data
-
     if PANDAS_AVAILABLE and isinstance(x, pd.Series):
         return _curvature_pandas(x)
 
-    x = np.atleast_1d(x)
+    x = np.atleast_1d(normalize_input(x)[0])
     y = np.nan * x
     y[1:-1] = x[1:-1] - (x[:-2] + x[2:]) / 2.0
     return y
@@ -82,7 +77,7 @@ def curvature(x):
 
 class Gradient(QCCheckVar):
     def set_features(self):
-        self.features = {"gradient": curvature(self.data[self.varname])}
+        self.features = {"gradient": self.shared_feature("gradient", curvature, self.data[self.varname])}
 
     def test(self):
         self.flags = {}
@@ -104,6 +99,6 @@ class Gradient(QCCheckVar):
         feature = np.absolute(self.features["gradient"])
         flag[feature > threshold] = self.flag_bad
         flag[feature <= threshold] = self.flag_good
-        x = np.atleast_1d(self.data[self.varname])
-        flag[ma.getmaskarray(x) | ~np.isfinite(x)] = 9
+        _, valid = self.normalized()
+        flag[~np.atleast_1d(valid)] = 9
         self.flags["gradient"] = flag
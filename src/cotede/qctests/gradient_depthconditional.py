@@ -8,7 +8,6 @@
 import logging
 
 import numpy as np
-from numpy import ma
 
 from .core import QCCheckVar
 from .gradient import curvature
@@ -18,7 +17,7 @@ module_logger = logging.getLogger(__name__)
 
 class GradientDepthConditional(QCCheckVar):
     def set_features(self):
-        self.features = {"gradient": curvature(self.data[self.varname])}
+        self.features = {"gradient": self.shared_feature("gradient", curvature, self.data[self.varname])}
 
     def test(self):
         self.flags = {}
@@ -55,6 +54,6 @@ class GradientDepthConditional(QCCheckVar):
             )
         ] = self.flag_good
 
-        x = np.atleast_1d(self.data[self.varname])
-        flag[ma.getmaskarray(x) | ~np.isfinite(x)] = 9
+        _, valid = self.normalized()
+        flag[~np.atleast_1d(valid)] = 9
         self.flags["gradient_depthconditional"] = flag
@@ -3,7 +3,8 @@
 """Evaluates if the coordinates of the measurements are at sea
 
 The heavy lift of this procedure is done by an external package OceansDB, which
-interpolates the elevation for given coordinates.
+provides the ETOPO topography. It is opened once and interpolated for many
+coordinates at once by a shared BathymetryService.
 """
 
 import logging
@@ -11,12 +12,13 @@ import logging
 import numpy as np
 
 from ..utils import extract_coordinates
+from ..utils.bathymetry import bathymetry_service
 from .core import QCCheck
 
 module_logger = logging.getLogger(__name__)
 
 try:
-    import oceansdb
+    import oceansdb  # noqa: F401
 
     OCEANSDB_AVAILABLE = True
 except ImportError:
@@ -80,11 +82,9 @@ def location_at_sea(data, cfg=None):
         return flag_bad
 
     try:
-        ETOPO = oceansdb.ETOPO()
-        etopo = ETOPO["topography"].extract(
-            var="height", lat=data.attrs["LATITUDE"], lon=data.attrs["LONGITUDE"]
+        h = np.atleast_1d(
+            bathymetry_service().height_at(data.attrs["LATITUDE"], data.attrs["LONGITUDE"])
         )
-        h = etopo["height"]
 
         flag = np.zeros(h.shape, dtype="i1")
         flag[np.nonzero(h <= 0)] = flag_good
@@ -99,14 +99,15 @@ def location_at_sea(data, cfg=None):
 def get_bathymetry(lat, lon, resolution="5min"):
     """Interpolate bathymetry from ETOPO
 
-       For a given (lat, lon), interpolates the bathymetry from ETOPO
+       For a given (lat, lon), interpolates the bathymetry from ETOPO. The
+       positions can be a single station or a whole track, see
+       utils.bathymetry.BathymetryService.depth_at(). The depth is always
+       a float array, with NaN where the position can't be interpolated.
     """
     assert np.shape(lat) == np.shape(lon), "Lat & Lon shape mismatch"
 
-    db = oceansdb.ETOPO(resolution=resolution)
-
-    etopo = db["topography"].track(var="height", lat=lat, lon=lon)
-    return {"bathymetry": -etopo["height"].astype("i")}
+    depth = np.atleast_1d(bathymetry_service(resolution).depth_at(lat, lon))
+    return {"bathymetry": depth.astype("f8", copy=False)}
 
 
 class LocationAtSea(QCCheck):
@@ -138,7 +139,9 @@ class LocationAtSea(QCCheck):
             return
 
         try:
-            self.features = get_bathymetry(lat=lat, lon=lon)
+            self.features = get_bathymetry(
+                lat=lat, lon=lon, resolution=self.cfg["resolution"]
+            )
             # idx = np.isfinite(lat) & np.isfinite(lon)
             # self.features = get_bathymetry(lat=lat[idx], lon=lon[idx])
         except Exception:
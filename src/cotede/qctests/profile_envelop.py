@@ -8,45 +8,138 @@ surface one should expect more variability, thus a wider range.
 """
 
 import logging
+import re
+from functools import lru_cache
 
 import numpy as np
-from numpy import ma
 
 from cotede.qctests.core import QCCheckVar
 
 module_logger = logging.getLogger(__name__)
 
+LAYER_BOUND = re.compile(
+    r"^\s*(<=|>=|==|<|>)\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*$"
+)
+
+OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+}
+
+
+def parse_bound(bound):
+    """Parse a layer bound like "> 25" into its operator and value"""
+    m = LAYER_BOUND.match(str(bound))
+    if m is None:
+        raise ValueError(f"Invalid profile envelop layer bound: {bound!r}")
+    return m.group(1), float(m.group(2))
+
+
+@lru_cache(maxsize=128)
+def compile_layers(layers, dtype="<f8"):
+    """Interval table equivalent to a sequence of profile envelop layers
+
+    All the layer bounds are merged into one sorted array of breakpoints,
+    which splits the vertical axis into elementary cells alternating between
+    open intervals and the breakpoints themselves. Each cell is assigned the
+    last layer that contains it, as the layers are applied in order and a
+    later layer overwrites a previous one.
+
+    Parameters
+    ----------
+    layers: tuple
+        Layers as (lower bound, upper bound, minimum, maximum), for instance
+        ("> 0", "<= 25", -2, 37).
+    dtype: str, optional
+        Data type of the vertical coordinate, so that the bounds are
+        compared with the same precision as the measurements.
+
+    Returns
+    -------
+    breakpoints: np.ndarray
+        Sorted unique values of all the bounds.
+    cell_layer: np.ndarray
+        Layer index for each cell, -1 if outside all layers. Cell 2k is the
+        open interval just below breakpoints[k] and cell 2k + 1 is
+        breakpoints[k] itself.
+    minval, maxval: np.ndarray
+        Valid range of each layer.
+    """
+    dtype = np.dtype(dtype)
+    bounds = [(parse_bound(layer[0]), parse_bound(layer[1])) for layer in layers]
+    breakpoints = np.unique(
+        np.array([v for pair in bounds for _, v in pair], dtype=dtype))
+
+    # A representative value of each cell. All the comparisons are against
+    # the breakpoints, so any value in a cell gives the same result.
+    representative = np.empty(2 * breakpoints.size + 1, dtype=dtype)
+    representative[0] = -np.inf
+    representative[-1] = np.inf
+    representative[1::2] = breakpoints
+    representative[2:-1:2] = breakpoints[:-1] / 2 + breakpoints[1:] / 2
+
+    cell_layer = np.full(representative.shape, -1, dtype=np.intp)
+    for i, ((op_lower, lower), (op_upper, upper)) in enumerate(bounds):
+        inside = OPERATORS[op_lower](representative, dtype.type(lower)) & \
+                OPERATORS[op_upper](representative, dtype.type(upper))
+        cell_layer[inside] = i
+
+    minval = np.array([layer[2] for layer in layers], dtype="f8")
+    maxval = np.array([layer[3] for layer in layers], dtype="f8")
+
+    table = (breakpoints, cell_layer, minval, maxval)
+    for a in table:
+        a.setflags(write=False)
+    return table
+
+
+def layers_index(z, table):
+    """Index of the profile envelop layer of each depth, -1 if none
+
+    Parameters
+    ----------
+    z: np.ndarray
+        Vertical coordinate, with NaN for missing values.
+    table: tuple
+        Interval table given by compile_layers().
+    """
+    breakpoints, cell_layer, _, _ = table
+    if breakpoints.size == 0:
+        return np.full(np.shape(z), -1, dtype=np.intp)
+
+    i = np.searchsorted(breakpoints, z, side="left")
+    exact = breakpoints[np.minimum(i, breakpoints.size - 1)] == z
+    idx = cell_layer[2 * i + exact]
+    idx[np.isnan(z)] = -1
+    return idx
+
 
 class ProfileEnvelop(QCCheckVar):
     def test(self):
         self.flags = {}
 
-        x = self.data[self.varname]
-        if isinstance(x, ma.MaskedArray):
-            x[x.mask] = np.nan
-            x = x.data
-        x = np.atleast_1d(x)
-
-        z = self.data["PRES"]
-        if isinstance(z, ma.MaskedArray):
-            if z.mask.any():
-                mask = np.ones_like(z, dtype="float32")
-                mask[z.mask] = np.nan
-                z = z * mask
-            z = z.data
-        z = np.atleast_1d(z)
+        x = np.atleast_1d(self.normalized()[0])
+        z = np.atleast_1d(self.normalized("PRES")[0])
 
         assert np.shape(z) == np.shape(x)
 
         assert "layers" in self.cfg, "Profile envelop cfg requires layers"
 
         flag = np.zeros(np.shape(x), dtype="i1")
-        for layer in self.cfg["layers"]:
-            ind = np.nonzero(eval(f"(z {layer[0]}) & (z {layer[1]})"))[0]
-            f = eval(f"(x[ind] > {layer[2]}) & (x[ind] < {layer[3]})")
+        # The compiled table is cached, so the layers are parsed only once
+        # for all the profiles evaluated with the same cfg.
+        table = compile_layers(
+            tuple(tuple(layer) for layer in self.cfg["layers"]), z.dtype.str)
+        _, _, minval, maxval = table
+        layer = layers_index(z, table)
 
-            flag[ind[f]] = self.flag_good
-            flag[ind[~f]] = self.flag_bad
+        ind = layer >= 0
+        lower = minval[layer[ind]].astype(x.dtype)
+        upper = maxval[layer[ind]].astype(x.dtype)
+        flag[ind] = np.where((x[ind] > lower) & (x[ind] < upper), self.flag_good, self.flag_bad)
 
-        flag[ma.getmaskarray(x) | ~np.isfinite(x)] = 9
+        flag[~np.isfinite(x)] = 9
         self.flags["profile_envelop"] = flag
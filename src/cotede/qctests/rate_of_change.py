@@ -12,17 +12,14 @@
 import logging
 
 import numpy as np
-from numpy import ma
 
-from .core import QCCheckVar
+from .core import QCCheckVar, normalize_input
 
 module_logger = logging.getLogger(__name__)
 
 
 def rate_of_change(x):
-    if isinstance(x, ma.MaskedArray):
-        x[x.mask] = np.nan
-        x = x.data
+    x = normalize_input(x)[0]
 
     y = np.nan * np.atleast_1d(x)
     y[1:] = np.diff(x)
@@ -32,7 +29,10 @@ def rate_of_change(x):
 
 class RateOfChange(QCCheckVar):
     def set_features(self):
-        self.features = {"rate_of_change": rate_of_change(self.data[self.varname])}
+        self.features = {
+            "rate_of_change": self.shared_feature(
+                "rate_of_change", rate_of_change, self.data[self.varname])
+        }
 
     def test(self):
         self.flags = {}
@@ -55,6 +55,6 @@ class RateOfChange(QCCheckVar):
         flag = np.zeros(np.shape(self.data[self.varname]), dtype="i1")
         flag[feature > threshold] = self.flag_bad
         flag[feature <= threshold] = self.flag_good
-        x = np.atleast_1d(self.data[self.varname])
-        flag[ma.getmaskarray(x) | ~np.isfinite(x)] = 9
+        _, valid = self.normalized()
+        flag[~np.atleast_1d(valid)] = 9
         self.flags["rate_of_change"] = flag
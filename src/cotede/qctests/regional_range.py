@@ -5,6 +5,7 @@
 """
 
 import logging
+from functools import lru_cache
 
 import numpy as np
 from numpy import ma
@@ -13,10 +14,20 @@ from .core import QCCheckVar
 
 module_logger = logging.getLogger(__name__)
 try:
-    # import shapely.wkt
-    from shapely.geometry import Point
+    import shapely
+
+    SHAPELY_AVAILABLE = True
 except ImportError:
     module_logger.debug("Module Shapely is not available")
+    SHAPELY_AVAILABLE = False
+
+
+@lru_cache(maxsize=128)
+def prepared_region(wkt):
+    """Parse and prepare a region geometry, once for each WKT"""
+    geometry = shapely.from_wkt(wkt)
+    shapely.prepare(geometry)
+    return geometry
 
 
 class RegionalRange(QCCheckVar):
@@ -31,6 +42,9 @@ class RegionalRange(QCCheckVar):
           "maxval": 40
           }]
 
+        The position can be a nominal one for the whole profile, given by
+        attrs LATITUDE & LONGITUDE, or one for each measurement, like a
+        track from a TSG, given as variables LATITUDE & LONGITUDE.
     """
 
     def test(self):
@@ -38,9 +52,7 @@ class RegionalRange(QCCheckVar):
 
         feature = self.data[self.varname]
 
-        try:
-            import shapely
-        except ImportError:
+        if not SHAPELY_AVAILABLE:
             module_logger.debug(
                 "Regional range currently depends on module Shapely, which is not available. " \
                 "Regional range will return flag 0."
@@ -49,11 +61,8 @@ class RegionalRange(QCCheckVar):
             return
 
         if ("LATITUDE" in self.data.keys()) and ("LONGITUDE" in self.data.keys()):
-            lat = self.data["LATITUDE"]
-            lon = self.data["LONGITUDE"]
-
-            module_logger.warning("I'm not ready to handle regional range of a track")
-            return
+            lat = self.normalized("LATITUDE")[0]
+            lon = self.normalized("LONGITUDE")[0]
         elif ("LATITUDE" in self.data.attrs) and ("LONGITUDE" in self.data.attrs):
             lat = self.data.attrs["LATITUDE"]
             lon = self.data.attrs["LONGITUDE"]
@@ -63,6 +72,7 @@ class RegionalRange(QCCheckVar):
 
         assert "regions" in self.cfg
 
+        x = self.normalized()[0]
         flag = np.zeros(feature.shape, dtype="i1")
         for cfg in self.cfg['regions']:
 
@@ -78,12 +88,13 @@ class RegionalRange(QCCheckVar):
                 f"Regional Range: minval ({minval}) must be smaller than maxval ({maxval})"
             )
 
-            g = shapely.wkt.loads(cfg["region"])
-            if g.intersects(Point(lon, lat)):
-                flag[np.nonzero(feature < minval)] = self.flag_bad
-                flag[np.nonzero(feature > maxval)] = self.flag_bad
-                idx = (feature >= minval) & (feature <= maxval)
-                idx = idx & (flag < self.flag_good)
-                flag[np.nonzero(idx)] = self.flag_good
-        flag[ma.getmaskarray(self.data[self.varname])] = 9
+            # Point in region for all positions at once. Points on the
+            # boundary are inside, as with intersects().
+            inside = shapely.intersects_xy(prepared_region(cfg["region"]), lon, lat)
+            if not np.any(inside):
+                continue
+            flag[inside & ((x < minval) | (x > maxval))] = self.flag_bad
+            idx = inside & (x >= minval) & (x <= maxval) & (flag < self.flag_good)
+            flag[idx] = self.flag_good
+        flag[ma.getmaskarray(feature)] = 9
         self.flags["regional_range"] = flag
@@ -0,0 +1,102 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+"""
+
+    Rolling standard deviation, to identify unstable periods of a time
+    series, like a moored thermograph in a highly variable environment.
+
+    As in datashop_toolbox.ai_thermograph_data, the threshold can be adapted
+    to the sampling interval as threshold * sqrt(dt / dt_ref), where dt_ref
+    is the sampling interval for which the threshold was defined.
+
+"""
+
+import logging
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .core import QCCheckVar, normalize_input
+
+module_logger = logging.getLogger(__name__)
+
+
+def rolling_std(x, window=3, min_periods=None):
+    """Standard deviation of each sample and the previous window - 1 ones
+
+    Invalid values are ignored. As pandas' rolling(window).std(), with
+    ddof=1, the result is NaN where there are less than min_periods valid
+    values in the window, by default window - 1, and at least 2.
+
+    Each window is evaluated independently, so the result at each sample
+    doesn't depend on where the series starts, as long as the previous
+    window - 1 samples are included.
+    """
+    assert window >= 2, "window must be at least 2"
+    if min_periods is None:
+        min_periods = window - 1
+    min_periods = max(min_periods, 2)
+
+    x = np.atleast_1d(normalize_input(x)[0]).astype("f8", copy=False)
+    y = np.full(x.shape, np.nan)
+    if x.size == 0:
+        return y
+
+    w = sliding_window_view(np.concatenate([np.full(window - 1, np.nan), x]), window)
+    n = np.isfinite(w).sum(axis=1)
+    ok = n >= min_periods
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(w, axis=1) / n
+        var = np.nansum((w - mean[:, None]) ** 2, axis=1) / (n - 1)
+    y[ok] = np.sqrt(var[ok])
+    return y
+
+
+class RollingStd(QCCheckVar):
+    """Flag unstable periods, with a rolling std above a threshold
+
+    Configuration
+    -------------
+    threshold : float
+        Maximum standard deviation.
+    window : int, optional
+        Number of samples of the rolling window. Default is 3.
+    min_periods : int, optional
+        Minimum number of valid samples in the window. Default is window - 1.
+    sample_interval, reference_interval : float, optional
+        If both are given, in the same units, the threshold is defined for
+        the reference_interval and scaled by
+        sqrt(sample_interval / reference_interval).
+
+    Example
+    -------
+    The adaptive test used in ai_thermograph_data for DFO BIO thermographs
+    sampling every minute:
+
+    >>> cfg = {"threshold": 2.0, "sample_interval": 1, "reference_interval": 60, "flag_bad": 2}
+    """
+
+    def set_features(self):
+        self.features = {
+            "rolling_std": self.shared_feature(
+                "rolling_std", rolling_std, self.normalized()[0],
+                window=self.cfg.get("window", 3),
+                min_periods=self.cfg.get("min_periods"))
+        }
+
+    def test(self):
+        self.flags = {}
+        threshold = self.cfg["threshold"]
+        if ("sample_interval" in self.cfg) and ("reference_interval" in self.cfg):
+            threshold *= (self.cfg["sample_interval"] / self.cfg["reference_interval"]) ** 0.5
+
+        assert np.size(threshold) == 1, "Threshold should be a single value"
+        assert np.isfinite(threshold), "Threshold must be a valid number"
+
+        flag = np.zeros(np.shape(self.data[self.varname]), dtype="i1")
+        feature = self.features["rolling_std"]
+        flag[feature > threshold] = self.flag_bad
+        flag[feature <= threshold] = self.flag_good
+        _, valid = self.normalized()
+        flag[~np.atleast_1d(valid)] = 9
+        self.flags["rolling_std"] = flag
@@ -13,9 +13,8 @@ y = np.stack([x[:-4], x[1:-3], x[2:-2], x[3:-1], x[4:]])
 import logging
 
 import numpy as np
-from numpy import ma
 
-from .core import QCCheckVar
+from .core import QCCheckVar, normalize_input
 
 module_logger = logging.getLogger(__name__)
 
@@ -23,11 +22,7 @@ module_logger = logging.getLogger(__name__)
 def spike(x):
     """ Spike
     """
-    if isinstance(x, ma.MaskedArray):
-        x[x.mask] = np.nan
-        x = x.data
-
-    x = np.atleast_1d(x)
+    x = np.atleast_1d(normalize_input(x)[0])
     y = np.nan * x
     y[1:-1] = np.abs(x[1:-1] - (x[:-2] + x[2:]) / 2.0) - np.abs((x[2:] - x[:-2]) / 2.0)
     return y
@@ -35,7 +30,7 @@ def spike(x):
 
 class Spike(QCCheckVar):
     def set_features(self):
-        self.features = {"spike": spike(self.data[self.varname])}
+        self.features = {"spike": self.shared_feature("spike", spike, self.normalized()[0])}
 
     def test(self):
         self.flags = {}
@@ -59,6 +54,6 @@ class Spike(QCCheckVar):
         flag[feature > threshold] = self.flag_bad
         flag[feature <= threshold] = self.flag_good
         # Flag as 9 any masked input value
-        x = np.atleast_1d(self.data[self.varname])
-        flag[ma.getmaskarray(x) | ~np.isfinite(x)] = 9
+        _, valid = self.normalized()
+        flag[~np.atleast_1d(valid)] = 9
         self.flags["spike"] = flag
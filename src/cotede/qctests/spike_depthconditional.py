@@ -8,7 +8,6 @@
 import logging
 
 import numpy as np
-from numpy import ma
 
 from .core import QCCheckVar
 from .spike import spike
@@ -18,7 +17,7 @@ module_logger = logging.getLogger(__name__)
 
 class SpikeDepthConditional(QCCheckVar):
     def set_features(self):
-        self.features = {"spike": spike(self.data[self.varname])}
+        self.features = {"spike": self.shared_feature("spike", spike, self.normalized()[0])}
 
     def test(self):
         self.flags = {}
@@ -56,6 +55,6 @@ class SpikeDepthConditional(QCCheckVar):
         ] = self.flag_good
 
         # Flag as 9 any masked input value
-        x = np.atleast_1d(self.data[self.varname])
-        flag[ma.getmaskarray(x) | ~np.isfinite(x)] = 9
+        _, valid = self.normalized()
+        flag[~np.atleast_1d(valid)] = 9
         self.flags["spike_depthconditional"] = flag
@@ -21,9 +21,8 @@ tukey53H(np.array, np.maskedArray, pd.Series, xr.DataArray)
 import logging
 
 import numpy as np
-from numpy import ma
 
-from .core import QCCheckVar
+from .core import QCCheckVar, normalize_input
 
 try:
     import pandas as pd
@@ -36,75 +35,79 @@ except ImportError:
 module_logger = logging.getLogger(__name__)
 
 
-def tukey53H(x, normalize=False):
-    """Spike test Tukey 53H from Goring & Nikora 2002
-
-    Return
-    ------
-    delta :
-        An array with the same shape of input x of the difference between x
-        and a smoothed x.
-    """
-    if isinstance(x, ma.MaskedArray):
-        x[x.mask] = np.nan
-        x = x.data
+def _median3(a, b, c):
+    """Element-wise median of three arrays (sorting network)"""
+    return np.maximum(np.minimum(a, b), np.minimum(np.maximum(a, b), c))
 
-    if not PANDAS_AVAILABLE:
-        return _tukey53H_numpy(x, normalize=normalize)
 
-    if hasattr(x, "to_series"):
-        x = x.to_series()
-    elif not isinstance(x, pd.Series):
-        x = pd.Series(x)
+def _median5(a, b, c, d, e):
+    """Element-wise median of five arrays (sorting network)"""
+    return _median3(
+        e, np.maximum(np.minimum(a, b), np.minimum(c, d)), np.minimum(np.maximum(a, b), np.maximum(c, d))
+    )
 
-    u1 = x.reset_index(drop=True).rolling(5, center=True).median()
-    u2 = u1.rolling(3, center=True).median()
-    u3 = 0.25 * (u2.shift(-1) + 2 * u2 + u2.shift(1))
 
-    delta = x - u3
+def _rolling_median(x, width):
+    """Centered running median of width 3 or 5 along the first axis
 
-    if not normalize:
-        return np.array(delta)
+    As pandas' rolling(width, center=True).median(), the result is NaN
+    wherever the window is incomplete or contains a NaN.
+    """
+    N = x.shape[0]
+    half = width // 2
+    u = np.full(x.shape, np.nan)
+    if N < width:
+        return u
+    shifted = [x[i : N - width + 1 + i] for i in range(width)]
+    median = _median5(*shifted) if width == 5 else _median3(*shifted)
+    invalid = np.isnan(shifted[0])
+    for s in shifted[1:]:
+        invalid |= np.isnan(s)
+    median[invalid] = np.nan
+    u[half : N - half] = median
+    return u
+
+
+def _as_float_array(x):
+    """x as a float64 ndarray with NaN where x is masked or missing"""
+    if PANDAS_AVAILABLE and isinstance(x, (pd.Series, pd.DataFrame)):
+        return x.to_numpy(dtype="f8", na_value=np.nan)
+    return normalize_input(x)[0].astype("f8", copy=False)
 
-    sigma = u1.dropna().std(ddof=1)
-    return np.array(delta / sigma)
 
+def tukey53H(x, normalize=False):
+    """Spike test Tukey 53H from Goring & Nikora 2002
 
-def _tukey53H_numpy(x, normalize=False):
-    """Equivalent to tukey53H but without using pandas
+    Accepts arrays, masked arrays, pandas Series/DataFrames and xarray
+    DataArrays, which are never modified. A 2D input (e.g. a DataFrame) is
+    processed column by column. The running medians of width 5 and 3 are
+    computed for the whole series at once with sorting networks.
 
-    Note
-    ----
-    - For larger datasets (>1k) like timeseries the pandas alternative can be
-      significantly faster.
+    Return
+    ------
+    delta :
+        An array with the same shape of input x of the difference between x
+        and a smoothed x.
     """
-    if isinstance(x, ma.MaskedArray):
-        x[x.mask] = np.nan
-        x = x.data
-
-    N = len(x)
-
-    u1 = np.nan * np.ones(N)
-    for n in range(N - 4):
-        u1[n + 2] = np.median(x[n : n + 5])
+    x = _as_float_array(x)
 
-    u2 = np.nan * np.ones(N)
-    for n in range(N - 2):
-        u2[n + 1] = np.median(u1[n : n + 3])
+    u1 = _rolling_median(x, 5)
+    u2 = _rolling_median(u1, 3)
+    u3 = np.full(x.shape, np.nan)
+    u3[1:-1] = 0.25 * (u2[2:] + 2 * u2[1:-1] + u2[:-2])
 
-    u3 = np.nan * np.ones(N)
-    u3[1:-1] = 0.25 * (u2[:-2] + 2 * u2[1:-1] + u2[2:])
-
-    delta = np.nan * np.ones(N)
-    delta[1:-1] = x[1:-1] - u3[1:-1]
+    delta = x - u3
 
     if not normalize:
         return delta
 
-    idx = ~np.isnan(u1)
-    if idx.all():
-        return np.nan * delta
-    sigma = np.std(u1[idx], ddof=1)
+    if x.ndim == 1:
+        valid = u1[~np.isnan(u1)]
+        sigma = valid.std(ddof=1) if valid.size > 1 else np.nan
+    else:
+        n = (~np.isnan(u1)).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sigma = np.where(n > 1, np.nanstd(u1, axis=0, ddof=1), np.nan)
     return delta / sigma
 
 
@@ -122,9 +125,11 @@ def tukey53H_norm(x, l=12):
 
 class Tukey53H(QCCheckVar):
     def set_features(self):
-        self.features = {"tukey53H": tukey53H(self.data[self.varname])}
+        x = self.normalized()[0]
+        self.features = {"tukey53H": self.shared_feature("tukey53H", tukey53H, x)}
         if "l" in self.cfg:
-            self.features["tukey53H_norm"] = tukey53H_norm(self.data[self.varname], l=self.cfg["l"])
+            self.features["tukey53H_norm"] = self.shared_feature(
+                "tukey53H_norm", tukey53H_norm, x, l=self.cfg["l"])
 
 
     def test(self):
@@ -151,6 +156,6 @@ class Tukey53H(QCCheckVar):
         feature = np.absolute(self.features["tukey53H"])
         flag[feature > threshold] = self.flag_bad
         flag[feature <= threshold] = self.flag_good
-        x = np.atleast_1d(self.data[self.varname])
-        flag[ma.getmaskarray(x) | ~np.isfinite(x)] = 9
+        _, valid = self.normalized()
+        flag[~np.atleast_1d(valid)] = 9
         self.flags["tukey53H"] = flag
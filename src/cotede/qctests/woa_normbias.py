@@ -21,27 +21,38 @@ import logging
 
 import numpy as np
 from numpy import ma
-from oceansdb import WOA
 
 from ..utils import day_of_year, extract_coordinates, extract_depth, extract_time
+from ..utils.climatology import climatology_session
 from .core import QCCheckVar
 
 module_logger = logging.getLogger(__name__)
 
 
-def woa_normbias(data, varname, attrs=None, use_standard_error=False):
-    """
+WOA_VARS = [
+    "mean",
+    "standard_deviation",
+    "standard_error",
+    "number_of_observations",
+]
 
-    Notes
-    -----
-    - Include arguments to overwrite target variable (timename=None, latname=None, lonname=None)
 
+def woa_query(data, varname, attrs=None):
+    """Arguments of the WOA extraction for a profile
+
+    Returns
+    -------
+    query : dict
+        vtype, doy, depth (valid levels only), lat, lon and mode.
+    depth : array_like
+        All the depth levels of the profile.
+    idx : array_like or None
+        Valid depth levels, or None if all are valid.
     """
     try:
         doy = day_of_year(extract_time(data, attrs))
-    except LookupError:
-        module_logger.error("Missing time")
-        raise
+    except LookupError as err:
+        raise LookupError("Missing time") from err
 
     lat = []
     lon = []
@@ -49,18 +60,16 @@ def woa_normbias(data, varname, attrs=None, use_standard_error=False):
     # Jeff Jackson added this try block 04-JAN-2026
     try:
         lat, lon = extract_coordinates(data, latname='LATITUDE', lonname='LONGITUDE')
-    except LookupError:
-        module_logger.error("Missing geolocation columns (lat/lon)")
-        raise
+    except LookupError as err:
+        raise LookupError("Missing geolocation columns (lat/lon)") from err
 
     try:
         # Note that QCCheck fallback to self.data.attrs if attrs not given
         lat, lon = extract_coordinates(data, attrs)
-    except LookupError:
-        module_logger.error("Missing geolocation (lat/lon)")
-        raise
+    except LookupError as err:
+        raise LookupError("Missing geolocation (lat/lon)") from err
 
-    kwargs = {"lat": lat, "lon": lon}
+    query = {"lat": lat, "lon": lon}
 
     if (np.size(lat) > 1) | (np.size(lon) > 1):
         dLmax = max(np.max(lat) - np.min(lat), np.max(lon) - np.min(lon))
@@ -69,18 +78,17 @@ def woa_normbias(data, varname, attrs=None, use_standard_error=False):
             # kwargs["alongtrack_axis"] = ['lat', 'lon']
         else:
             mode = "profile"
-            kwargs = {
+            query = {
                 "lat": np.mean(lat),
                 "lon": np.mean(lon),
             }
             module_logger.warning("Multiple lat/lon positions but too close to each other so it will be considered a " \
-            "single position for the WOA comparison. lat: {}, lon: {}".format(kwargs["lat"], kwargs["lon"]))
+            "single position for the WOA comparison. lat: {}, lon: {}".format(query["lat"], query["lon"]))
     else:
         mode = "profile"
 
     depth = extract_depth(data, "DEPTH")
 
-    db = WOA()
     # This must go away. This was a trick to handle Seabird CTDs, but
     # now that seabird is a different package it should be handled there.
     if isinstance(varname, str) and (varname[-1] == "2"):
@@ -88,29 +96,41 @@ def woa_normbias(data, varname, attrs=None, use_standard_error=False):
     else:
         vtype = varname
 
-    woa_vars = [
-        "mean",
-        "standard_deviation",
-        "standard_error",
-        "number_of_observations",
-    ]
-
     # Eventually the case of some invalid depth levels will be handled by
     # OceansDB and the following steps will be simplified.
     valid_depth = depth
+    idx = None
     if (np.size(depth) > 0):
         idx = ~ma.getmaskarray(depth) & (np.array(depth) >= 0) & np.isfinite(depth)
         if not idx.any():
-            module_logger.error(f"Invalid depth(s) for WOA comparison: {depth}")
-            raise IndexError
+            raise IndexError(f"Invalid depth(s) for WOA comparison: {depth}")
         elif not idx.all():
             valid_depth = depth[idx]
-    if mode == "track":
-        woa = db[vtype].track(var=woa_vars, doy=doy, depth=valid_depth, **kwargs)
-    else:
-        woa = db[vtype].extract(var=woa_vars, doy=doy, depth=valid_depth, **kwargs)
+        else:
+            idx = None
+
+    query.update(vtype=vtype, doy=doy, depth=valid_depth, mode=mode)
+    return query, depth, idx
+
+
+def woa_normbias(data, varname, attrs=None, use_standard_error=False):
+    """
+
+    Notes
+    -----
+    - Include arguments to overwrite target variable (timename=None, latname=None, lonname=None)
+
+    """
+    try:
+        query, depth, idx = woa_query(data, varname, attrs)
+    except (LookupError, IndexError) as err:
+        module_logger.error(err)
+        raise
+
+    # The climatology handles and recent extractions are shared by the whole process.
+    woa = climatology_session().extract("WOA", var=WOA_VARS, **query)
 
-    if not np.all(depth == valid_depth):
+    if idx is not None:
         for v in woa.keys():
             tmp = ma.masked_all(depth.shape, dtype=woa[v].dtype)
             tmp[idx] = woa[v]
@@ -177,7 +197,7 @@ class WOA_NormBias(QCCheckVar):
     # 3 is the possible minimum to estimate the std, but I shold use higher.
     min_samples = 3
 
-    def __init__(self, data, varname, cfg=None, autoflag=True):
+    def __init__(self, data, varname, cfg=None, autoflag=True, feature_cache=None):
         try:
             self.use_standard_error = cfg["use_standard_error"]
         except (KeyError, TypeError):
@@ -186,11 +206,12 @@ class WOA_NormBias(QCCheckVar):
             self.min_samples = cfg["min_samples"]
         except (KeyError, TypeError):
             module_logger.debug("min_samples undefined. Using default value")
-        super().__init__(data, varname, cfg, autoflag)
+        super().__init__(data, varname, cfg, autoflag, feature_cache=feature_cache)
 
     def set_features(self):
         try:
-            self.features = woa_normbias(self.data, self.varname, self.attrs)
+            self.features = dict(self.shared_feature(
+                "woa_normbias", woa_normbias, self.data, self.varname, self.attrs))
         except LookupError:
             self.features = {}
 
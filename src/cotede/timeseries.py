@@ -0,0 +1,527 @@
+"""Quality control of long time series, like moored thermographs or TSG
+
+ProfileQC evaluates each variable of a profile at once, so a multi-year
+series sampled every minute requires several copies of the whole series
+for the features of each check. TimeSeriesQC evaluates the same checks
+from cotede.qctests in chunks. Each chunk is extended on both sides by the
+samples its checks depend on, its halo, and only the flags of the chunk
+itself are kept, thus the result is the same as evaluating the whole series
+at once, while the memory used by the checks is bounded by the chunk size.
+
+Only checks with a bounded dependency, or that can carry their state from
+one chunk to the next, are supported. See CHUNKED_CHECKS.
+
+StreamingQC evaluates a series as its samples arrive, like telemetered
+thermographs, with the same checks. It keeps only the last samples needed
+by the halo of the next ones, thus the cost of each update is proportional
+to the number of new samples instead of to the whole series.
+"""
+
+import logging
+from typing import Any
+
+import numpy as np
+from numpy import ma
+
+from cotede import qctests
+from cotede.misc import FlagTable, combined_flag
+from cotede.plan import compile_plan
+from cotede.qctests.core import normalize_input
+from cotede.qctests.cum_rate_of_change import cum_rate_of_change
+from cotede.utils import load_cfg
+
+module_logger = logging.getLogger(__name__)
+
+# Number of samples evaluated at once, without the halo
+CHUNKSIZE = 100_000
+
+
+def _halo(valid, a, b, n):
+    """Bounds of [a, b) extended to include n valid samples at each side
+
+    Stops at the ends of the series if there are not enough valid samples.
+    """
+    start, count, step = a, 0, max(n, 64)
+    while (start > 0) and (count < n):
+        lo = max(0, start - step)
+        idx = np.flatnonzero(valid[lo:start])
+        if count + idx.size >= n:
+            start = lo + idx[idx.size - (n - count)]
+            break
+        count += idx.size
+        start, step = lo, 2 * step
+
+    stop, count, step = b, 0, max(n, 64)
+    while (stop < valid.size) and (count < n):
+        hi = min(valid.size, stop + step)
+        idx = np.flatnonzero(valid[stop:hi])
+        if count + idx.size >= n:
+            stop = stop + idx[n - count - 1] + 1
+            break
+        count += idx.size
+        stop, step = hi, 2 * step
+    return start, stop
+
+
+class LocalCheck:
+    """A check whose result at each sample depends only on its neighbours
+
+    Parameters
+    ----------
+    criterion : str
+        Name of the check in the QC configuration, like "spike".
+    cfg : dict
+        Configuration of the check.
+    before, after : int
+        Number of samples before and after each sample required to evaluate
+        it, like 1 and 1 for the spike.
+    """
+
+    # If before and after are known without seeing the whole series
+    bounded = True
+
+    def __init__(self, criterion, cfg, before=0, after=0):
+        self.criterion = criterion
+        self.cfg = cfg
+        self.Procedure = qctests.catalog(cfg["procedure"])
+        self.before = before
+        self.after = after
+
+    def prepare(self, x):
+        """Called once with the whole series before evaluating any chunk"""
+
+    def halo(self, valid, a, b):
+        """Bounds of the samples required to evaluate [a, b)"""
+        return max(0, a - self.before), min(valid.size, b + self.after)
+
+    def evaluate(self, window, varname, core, cache):
+        """Flags and features of the core of a window
+
+        Parameters
+        ----------
+        window : dict
+            {varname: x[start:stop]}, a slice of the series including the
+            halo of the chunk.
+        varname : str
+            Variable being evaluated.
+        core : slice
+            Position of the chunk inside the window.
+        cache : FeatureCache
+            Features shared by all the checks of this window.
+        """
+        y = self.Procedure(window, varname=varname, cfg=self.cfg, autoflag=True,
+                           feature_cache=cache)
+        flags = {f: np.asarray(y.flags[f])[core] for f in y.flags}
+        features = {f: y.features[f][core] for f in y.features}
+        return flags, features
+
+
+class Tukey53HCheck(LocalCheck):
+    """Tukey53H without the normalized feature, which depends on the whole series"""
+
+    def __init__(self, criterion, cfg):
+        cfg = {k: v for k, v in cfg.items() if k != "l"}
+        super().__init__(criterion, cfg, before=4, after=4)
+
+
+class ClusterCheck(LocalCheck):
+    """ConstantClusterSize, bounded by its threshold
+
+    The size of a cluster is only compared with the threshold, thus it is
+    enough to count up to threshold + 1 valid samples at each side. A
+    threshold given as a percentage is relative to the number of valid
+    samples of the whole series.
+    """
+
+    bounded = False
+
+    def __init__(self, criterion, cfg):
+        super().__init__(criterion, cfg)
+        threshold = cfg["threshold"]
+        self.fraction = isinstance(threshold, str) and (threshold[-1] == "%")
+        if self.fraction:
+            self.threshold = float(threshold[:-1]) * 1e-2
+        else:
+            self.threshold = threshold
+
+    def prepare(self, x):
+        self.N = ma.count(x)
+        limit = self.threshold * self.N if self.fraction else self.threshold
+        self.before = self.after = int(np.floor(limit)) + 1
+
+    def halo(self, valid, a, b):
+        return _halo(valid, a, b, self.before)
+
+    def evaluate(self, window, varname, core, cache):
+        # In fraction mode the flags are evaluated here, relative to the
+        # whole series instead of to the window.
+        y = self.Procedure(window, varname=varname, cfg=self.cfg,
+                           autoflag=not self.fraction, feature_cache=cache)
+        size = y.features["constant_cluster_size"][core]
+        features = {
+            "constant_cluster_size": size,
+            "constant_cluster_fraction": size / self.N,
+        }
+        if not self.fraction:
+            return {"constant_cluster_size": y.flags["constant_cluster_size"][core]}, features
+
+        flag = np.zeros(size.shape, dtype="i1")
+        flag[features["constant_cluster_fraction"] > self.threshold] = y.flag_bad
+        flag[features["constant_cluster_fraction"] <= self.threshold] = y.flag_good
+        flag[ma.getmaskarray(window[varname][core])] = 9
+        return {"constant_cluster_fraction": flag}, features
+
+
+class CumulativeCheck(LocalCheck):
+    """CumRateOfChange, carrying its last value from one chunk to the next
+
+    Chunks must be evaluated in order.
+    """
+
+    def __init__(self, criterion, cfg):
+        super().__init__(criterion, cfg, before=1)
+        self.state = None
+
+    def prepare(self, x):
+        self.state = None
+
+    def evaluate(self, window, varname, core, cache):
+        # The first sample of the window that is needed, the last one of the
+        # previous chunk, if any.
+        first = core.start - 1 if self.state is not None else core.start
+        x = window[varname]
+        feature = np.full(np.shape(x), np.nan)
+        feature[first:core.stop] = cum_rate_of_change(
+            x[first:core.stop], memory=self.cfg["memory"], initial=self.state)
+        if core.stop > core.start:
+            self.state = feature[core.stop - 1]
+        cache.set(varname, "cum_rate_of_change", feature, memory=self.cfg["memory"])
+        return super().evaluate(window, varname, core, cache)
+
+
+class StuckValueCheck(LocalCheck):
+    """StuckValue, which is one single flag for the whole series"""
+
+    bounded = False
+
+    def prepare(self, x):
+        valid = ma.compressed(x)
+        stuck = (valid.size > 1) and all(
+            np.allclose(valid[i:i + CHUNKSIZE], valid[0])
+            for i in range(0, valid.size, CHUNKSIZE))
+        if stuck:
+            self.flag = self.cfg.get("flag_bad", self.Procedure.flag_bad)
+        else:
+            self.flag = self.cfg.get("flag_good", self.Procedure.flag_good)
+
+    def evaluate(self, window, varname, core, cache):
+        flag = np.full(core.stop - core.start, self.flag, dtype="i1")
+        flag[ma.getmaskarray(window[varname][core])] = 9
+        return {"stuck_value": flag}, {}
+
+
+def _rate_of_change(criterion, cfg):
+    if cfg.get("sd_scale"):
+        # Scaled by the standard deviation of the whole series
+        return None
+    return LocalCheck(criterion, cfg, before=1)
+
+
+# How to evaluate each procedure of cotede.qctests in chunks, as
+# procedure: factory(criterion, cfg). A factory returns None if that
+# configuration can't be evaluated in chunks.
+CHUNKED_CHECKS = {
+    "GlobalRange": LocalCheck,
+    "Spike": lambda c, cfg: LocalCheck(c, cfg, before=1, after=1),
+    "Gradient": lambda c, cfg: LocalCheck(c, cfg, before=1, after=1),
+    "RateOfChange": _rate_of_change,
+    "DigitRollOver": lambda c, cfg: LocalCheck(c, cfg, before=1),
+    "Tukey53H": Tukey53HCheck,
+    "ConstantClusterSize": ClusterCheck,
+    "CumRateOfChange": CumulativeCheck,
+    "StuckValue": StuckValueCheck,
+    "RollingStd": lambda c, cfg: LocalCheck(c, cfg, before=cfg.get("window", 3) - 1),
+}
+
+
+def chunked_checks(cfg, bounded=False):
+    """Chunked checks for the QC configuration of one variable
+
+    Checks that can't be evaluated in chunks, like the climatology
+    comparisons, are skipped with a warning, as well as the checks that
+    depend on the whole series if bounded is True.
+    """
+    checks = []
+    for criterion in cfg:
+        if (cfg[criterion] is None) or ("procedure" not in cfg[criterion]):
+            continue
+        procedure = cfg[criterion]["procedure"]
+        check = None
+        if procedure in CHUNKED_CHECKS:
+            check = CHUNKED_CHECKS[procedure](criterion, cfg[criterion])
+        if check is None:
+            module_logger.warning(
+                f"Sorry, {criterion} can't be evaluated on a time series in chunks")
+            continue
+        if bounded and not check.bounded:
+            module_logger.warning(
+                f"Sorry, {criterion} depends on the whole series, it can't be "
+                "evaluated as the samples arrive")
+            continue
+        checks.append(check)
+    return checks
+
+
+class TimeSeriesQC:
+    """Quality Control a long time series, in chunks
+
+    Parameters
+    ----------
+    input : dict-like
+        The time series, with its variables as arrays, like
+        {"TEMP": ...}, a pandas DataFrame or the output of
+        cotede.utils.profiles.load_profile() for a thermograph ODF file.
+    cfg : str or dict, optional
+        A QC configuration, see load_cfg(). Default is "tsg". The common
+        flags and the checks that can't be evaluated in chunks are ignored,
+        see CHUNKED_CHECKS.
+    saveauxiliary : bool, optional
+        Keep the features of each check. Default is False, since the
+        features of a long series can be much larger than its flags.
+    chunksize : int, optional
+        Number of samples evaluated at once.
+    attributes : dict-like, optional
+        If given, append/overwrite the input.attrs
+
+    Attributes
+    ----------
+    flags : dict
+        A FlagTable for each evaluated variable, including the overall
+        flag.
+    features : dict
+        The features of each evaluated variable, if saveauxiliary.
+
+    Example
+    -------
+    >>> ts = TimeSeriesQC(load_profile("MTR_BCD2020999_001_1_3600.ODF"))
+    >>> ts.flags["TEMP"]["overall"]
+    """
+
+    def __init__(self, input, cfg=None, saveauxiliary=False, chunksize=CHUNKSIZE,
+                 attributes=None):
+        assert (hasattr(input, 'keys')) and (len(input.keys()) > 0)
+        assert chunksize > 0, "chunksize must be positive"
+
+        if cfg is None:
+            cfg = "tsg"
+        self.cfg = load_cfg(cfg)
+        plan = compile_plan(cfg)
+        self.input = input
+        self.saveauxiliary = saveauxiliary
+        self.chunksize = int(chunksize)
+        self._set_attrs(attributes)
+
+        self.flags = {}
+        self.features = {}
+        for v in input.keys():
+            c = plan.vartype(v)
+            if c is not None:
+                module_logger.debug(f"Evaluating: {v}, as type: {c}")
+                self.evaluate(v, self.cfg['variables'][c])
+
+    def _set_attrs(self, attrs: dict[str, Any]):
+        if hasattr(self.input, 'attrs'):
+            self.attrs = dict(self.input.attrs)
+        else:
+            self.attrs = {}
+        if attrs is not None:
+            self.attrs.update(attrs)
+
+    def keys(self):
+        return self.input.keys()
+
+    def __getitem__(self, key):
+        return self.input[key]
+
+    def evaluate(self, v, cfg):
+        """Evaluate one variable, one chunk at a time
+
+        Parameters
+        ----------
+        v: str
+            The variable to evaluate, like 'TEMP'.
+
+        cfg: dict
+            The QC configuration for this variable.
+        """
+        values, valid = normalize_input(self.input[v])
+        assert values.ndim == 1, "TimeSeriesQC requires 1-D series"
+        x = ma.masked_array(values, mask=~valid)
+        N = x.size
+
+        checks = chunked_checks(cfg)
+        for check in checks:
+            check.prepare(x)
+
+        self.flags[v] = FlagTable(N)
+        if self.saveauxiliary:
+            self.features[v] = {}
+
+        for a in range(0, N, self.chunksize):
+            b = min(a + self.chunksize, N)
+            bounds = [check.halo(valid, a, b) for check in checks]
+            start = min((s for s, _ in bounds), default=a)
+            stop = max((s for _, s in bounds), default=b)
+            window = {v: x[start:stop]}
+            core = slice(a - start, b - start)
+            cache = qctests.FeatureCache()
+            for check in checks:
+                flags, features = check.evaluate(window, v, core, cache)
+                for f in flags:
+                    if f not in self.flags[v]:
+                        self.flags[v][f] = 0
+                    self.flags[v][f][a:b] = flags[f]
+                if self.saveauxiliary:
+                    self._store_features(v, features, a, b, N)
+
+        self.flags[v]['overall'] = combined_flag(self.flags[v])
+
+    def _store_features(self, v, features, a, b, N):
+        for f, value in features.items():
+            value = np.asarray(ma.filled(value, np.nan) if ma.isMaskedArray(value) else value)
+            if f not in self.features[v]:
+                self.features[v][f] = np.zeros(N, dtype=value.dtype)
+            self.features[v][f][a:b] = value
+
+
+class _Stream:
+    """Samples of one variable kept by StreamingQC between updates"""
+
+    def __init__(self, checks):
+        self.checks = checks
+        self.before = max((c.before for c in checks), default=0)
+        self.lag = max((c.after for c in checks), default=0)
+        self.buffer = ma.masked_array(np.empty(0), mask=np.empty(0, dtype=bool))
+        # Position in buffer of the first sample not flagged yet
+        self.pending = 0
+        self.flagged = 0
+
+
+class StreamingQC:
+    """Quality Control a time series as its samples arrive
+
+    Each sample is flagged once, as soon as all the samples that its checks
+    depend on arrived, i.e. with a delay of lag samples, like 4 for
+    Tukey53H or 1 for the spike. Concatenating the flags returned by each
+    append() and by flush() gives the same result as TimeSeriesQC on the
+    whole series.
+
+    Only the samples required by the next updates are kept, the halo of the
+    checks, and checks with a state, like CumRateOfChange, carry it from
+    one update to the next, so each update costs O(new samples). Checks
+    that depend on the whole series, like StuckValue, are ignored.
+
+    Parameters
+    ----------
+    cfg : str or dict, optional
+        A QC configuration, see load_cfg(). Default is "tsg".
+
+    Attributes
+    ----------
+    lag : dict
+        Number of samples of each variable waiting for the next ones.
+    flagged : dict
+        Number of samples of each variable already flagged.
+
+    Example
+    -------
+    >>> sqc = StreamingQC({"sea_water_temperature": {"spike": {"threshold": 2}}})
+    >>> flags = sqc.append({"TEMP": [12.1, 12.3, 15.0]})
+    >>> flags["TEMP"]["spike"]  # For the first 2 samples
+    >>> flags = sqc.append({"TEMP": [12.2]})
+    >>> flags = sqc.flush()  # At the end of the series
+    """
+
+    def __init__(self, cfg=None):
+        if cfg is None:
+            cfg = "tsg"
+        self.cfg = load_cfg(cfg)
+        self._plan = compile_plan(cfg)
+        self._streams = {}
+
+    @property
+    def lag(self):
+        return {v: s.lag for v, s in self._streams.items() if s is not None}
+
+    @property
+    def flagged(self):
+        return {v: s.flagged for v, s in self._streams.items() if s is not None}
+
+    def _stream(self, v):
+        if v not in self._streams:
+            c = self._plan.vartype(v)
+            if c is None:
+                self._streams[v] = None
+            else:
+                module_logger.debug(f"Streaming: {v}, as type: {c}")
+                checks = chunked_checks(self.cfg['variables'][c], bounded=True)
+                self._streams[v] = _Stream(checks)
+        return self._streams[v]
+
+    def append(self, samples):
+        """Add new samples and flag the ones that can be evaluated now
+
+        Parameters
+        ----------
+        samples : dict-like
+            New samples of each variable, like {"TEMP": [12.1, 12.3]}.
+
+        Returns
+        -------
+        dict
+            A FlagTable, including the overall flag, for each evaluated
+            variable with the samples flagged by this update, which start
+            at flagged[varname] from before the update.
+        """
+        output = {}
+        for v in samples.keys():
+            stream = self._stream(v)
+            if stream is None:
+                continue
+            values, valid = normalize_input(np.atleast_1d(samples[v]))
+            assert values.ndim == 1, "StreamingQC requires 1-D series"
+            new = ma.masked_array(values.astype("f8", copy=False), mask=~valid)
+            stream.buffer = ma.concatenate([stream.buffer, new])
+            output[v] = self._evaluate(v, stream, stream.buffer.size - stream.lag)
+        return output
+
+    def flush(self):
+        """Flag the remaining samples, as the end of the series
+
+        Returns
+        -------
+        dict
+            A FlagTable for each variable, see append().
+        """
+        output = {}
+        for v, stream in self._streams.items():
+            if stream is not None:
+                output[v] = self._evaluate(v, stream, stream.buffer.size)
+        return output
+
+    def _evaluate(self, v, stream, stop):
+        stop = max(stop, stream.pending)
+        core = slice(stream.pending, stop)
+        flags = FlagTable(stop - stream.pending)
+        cache = qctests.FeatureCache()
+        for check in stream.checks:
+            for f, flag in check.evaluate({v: stream.buffer}, v, core, cache)[0].items():
+                flags[f] = flag
+        flags['overall'] = combined_flag(flags)
+
+        # Keep only the samples not flagged yet and the halo before them
+        keep = max(0, stop - stream.before)
+        stream.buffer = stream.buffer[keep:]
+        stream.pending = stop - keep
+        stream.flagged += core.stop - core.start
+        return flags
@@ -0,0 +1,214 @@
+"""Shared access to the ETOPO bathymetry
+
+LocationAtSea used to instantiate a new oceansdb.ETOPO() on every call and
+OceansDB interpolates each position of a track independently, cropping and
+triangulating the grid around it. A BathymetryService opens ETOPO once for
+the whole process, keeps the most recently decoded tiles of the grid in an
+LRU cache and interpolates any number of positions at once.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from numpy import ma
+
+module_logger = logging.getLogger(__name__)
+
+
+class BathymetryService:
+    """Vectorized, tile cached, interpolation of the ETOPO topography
+
+    Parameters
+    ----------
+    resolution : str, optional
+        ETOPO resolution, like "5min" or "1min".
+    tile_size : int, optional
+        Number of grid cells along each side of a tile.
+    maxtiles : int, optional
+        Maximum number of decoded tiles kept in memory.
+    grid : tuple, optional
+        (lat, lon, height) to be used instead of ETOPO, where lat and lon
+        are regularly spaced 1-D coordinates, lon covering the whole globe,
+        and height is a 2-D (lat, lon) array, or anything that can be
+        sliced like one, such as a netCDF variable.
+
+    Example
+    -------
+    >>> service = bathymetry_service()
+    >>> depth = service.depth_at([17.5, 44.6], [-37.5, -63.5])
+    """
+
+    def __init__(self, resolution="5min", tile_size=64, maxtiles=256, grid=None):
+        self.resolution = resolution
+        self.tile_size = tile_size
+        self.maxtiles = maxtiles
+        self._db = None
+        self._grid = None
+        self._tiles = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        if grid is not None:
+            self._set_grid(*grid)
+
+    def _set_grid(self, lat, lon, height):
+        lat = np.asarray(lat, dtype="f8")
+        lon = np.asarray(lon, dtype="f8")
+        dlat = (lat[-1] - lat[0]) / (lat.size - 1)
+        dlon = (lon[-1] - lon[0]) / (lon.size - 1)
+        assert np.allclose(np.diff(lat), dlat) and np.allclose(np.diff(lon), dlon), \
+            "Bathymetry grid must be regularly spaced"
+        # Number of columns around the globe. Some grids repeat the first
+        # column at the end, like -180 and 180.
+        period = int(round(360 / abs(dlon)))
+        assert lon.size >= period, "Bathymetry grid must cover all longitudes"
+        self._grid = {
+            "lat0": lat[0], "dlat": dlat, "nlat": lat.size,
+            "lon0": lon[0], "dlon": dlon, "nlon": period,
+            "height": height,
+        }
+
+    def grid(self):
+        """Return the grid description, opening ETOPO once if necessary"""
+        with self._lock:
+            if self._grid is None:
+                import oceansdb
+
+                self._db = oceansdb.ETOPO(resolution=self.resolution)
+                topography = self._db["topography"]
+                self._set_grid(
+                    topography.dims["lat"],
+                    topography.dims["lon"],
+                    topography.ncs[0]["height"],
+                )
+                module_logger.debug(f"Opened ETOPO {self.resolution}")
+            return self._grid
+
+    def tile(self, tj, ti):
+        """Decoded (tile_size + 1) x (tile_size + 1) block of the grid
+
+        Tiles overlap by one row and one column, so that every grid cell is
+        complete inside a single tile. Columns wrap around the globe and rows
+        beyond the grid are NaN.
+        """
+        key = (tj, ti)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return self._tiles[key]
+            self.misses += 1
+
+            g = self.grid()
+            n = self.tile_size + 1
+            j0 = tj * self.tile_size
+            j1 = min(j0 + n, g["nlat"])
+            cols = np.arange(ti * self.tile_size, ti * self.tile_size + n) % g["nlon"]
+            # Contiguous pieces of columns, at most two when wrapping around
+            breaks = np.nonzero(np.diff(cols) != 1)[0] + 1
+            pieces = [
+                g["height"][j0:j1, c[0]:c[-1] + 1]
+                for c in np.split(cols, breaks)
+            ]
+            block = np.full((n, n), np.nan)
+            block[:j1 - j0] = ma.filled(
+                ma.concatenate(pieces, axis=1).astype("f8"), np.nan)
+
+            self._tiles[key] = block
+            if len(self._tiles) > self.maxtiles:
+                self._tiles.popitem(last=False)
+            return block
+
+    def height_at(self, lat, lon):
+        """Bilinear interpolation of the topography at (lat, lon)
+
+        Parameters
+        ----------
+        lat, lon : array_like
+            Positions, with the same shape. Longitude can be given in any
+            reference, like -180 to 180 or 0 to 360.
+
+        Returns
+        -------
+        np.ndarray
+            Height in meters, positive above sea level, with the shape of
+            lat. NaN for invalid or missing positions.
+        """
+        lat = ma.filled(ma.masked_invalid(ma.asarray(lat, dtype="f8")), np.nan)
+        lon = ma.filled(ma.masked_invalid(ma.asarray(lon, dtype="f8")), np.nan)
+        assert lat.shape == lon.shape, "Lat & Lon shape mismatch"
+        shape = lat.shape
+        lat = lat.reshape(-1)
+        lon = lon.reshape(-1)
+
+        g = self.grid()
+        T = self.tile_size
+        output = np.full(lat.shape, np.nan)
+
+        fj = (lat - g["lat0"]) / g["dlat"]
+        fi = ((lon - g["lon0"]) % 360) / g["dlon"]
+        valid = (fj >= 0) & (fj <= g["nlat"] - 1) & np.isfinite(fi)
+        if not valid.any():
+            return output.reshape(shape)
+        fj, fi = fj[valid], fi[valid]
+
+        # The last row has no cell below it, use the cell above with weight 1
+        j = np.minimum(np.floor(fj).astype("i8"), g["nlat"] - 2)
+        i = np.floor(fi).astype("i8") % g["nlon"]
+        wy = fj - j
+        wx = fi - np.floor(fi)
+
+        tiles = (j // T) * (g["nlon"] // T + 1) + i // T
+        values = np.empty(fj.shape)
+        for key in np.unique(tiles):
+            idx = np.nonzero(tiles == key)[0]
+            tj, ti = j[idx[0]] // T, i[idx[0]] // T
+            block = self.tile(int(tj), int(ti))
+            y, x = j[idx] - tj * T, i[idx] - ti * T
+            values[idx] = (
+                block[y, x] * (1 - wy[idx]) * (1 - wx[idx])
+                + block[y, x + 1] * (1 - wy[idx]) * wx[idx]
+                + block[y + 1, x] * wy[idx] * (1 - wx[idx])
+                + block[y + 1, x + 1] * wy[idx] * wx[idx]
+            )
+        output[valid] = values
+        return output.reshape(shape)
+
+    def depth_at(self, lat, lon):
+        """Bathymetry (positive depth below sea level) at (lat, lon)
+
+        See height_at().
+        """
+        return -self.height_at(lat, lon)
+
+    def cache_info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._tiles), "maxtiles": self.maxtiles}
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        """Close ETOPO and empty the cache"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+                self._grid = None
+            self.clear()
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def bathymetry_service(resolution="5min"):
+    """Return the BathymetryService of a resolution shared by the whole process"""
+    with _services_lock:
+        if resolution not in _services:
+            _services[resolution] = BathymetryService(resolution=resolution)
+        return _services[resolution]
@@ -0,0 +1,240 @@
+"""Shared access to the OceansDB climatologies
+
+WOA_NormBias and CARS_NormBias used to instantiate a new WOA() or CARS()
+object on every call, re-opening the netCDF files for each variable of
+each profile. A ClimatologySession keeps one lazily opened handle per
+database for the whole process and remembers the most recent extractions,
+so profiles sharing the same position, day of year and depth levels (e.g.
+primary and secondary sensors, or repeated casts) are only extracted once.
+
+For a collection of profiles, extract_many() goes further and extracts each
+distinct position and day of year once, over the union of the depth levels
+of all the profiles there, so a cruise scales with its number of stations
+rather than its number of casts.
+"""
+
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+module_logger = logging.getLogger(__name__)
+
+
+def _array_key(value):
+    """Hashable representation of a scalar or array argument"""
+    value = np.asarray(value)
+    return (value.dtype.str, value.shape, value.tobytes())
+
+
+class ClimatologySession:
+    """Process-wide climatology handles with an LRU cache of extractions
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of extractions kept in the cache.
+
+    Example
+    -------
+    >>> session = climatology_session()
+    >>> woa = session.extract("WOA", "TEMP", ["mean", "standard_deviation"],
+    ...                       doy=136, depth=[0, 10, 100], lat=17.5, lon=-37.5)
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._databases = {}
+        self._cache = OrderedDict()
+        # Results of prefetch(), waiting for the matching extract()
+        self._prefetched = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def database(self, dbname):
+        """Return the open OceansDB handle for "WOA" or "CARS", opening it once"""
+        with self._lock:
+            if dbname not in self._databases:
+                import oceansdb
+
+                if dbname == "WOA":
+                    self._databases[dbname] = oceansdb.WOA()
+                elif dbname == "CARS":
+                    self._databases[dbname] = oceansdb.CARS()
+                else:
+                    raise ValueError(f"Unknown climatology: {dbname}")
+                module_logger.debug(f"Opened climatology {dbname}")
+            return self._databases[dbname]
+
+    def extract(self, dbname, vtype, var, doy, depth, lat, lon, mode="profile"):
+        """Extract climatology values, reusing a previous identical extraction
+
+        Parameters
+        ----------
+        dbname : str
+            "WOA" or "CARS".
+        vtype : str
+            Variable, like "TEMP" or "PSAL".
+        var : list of str
+            Climatology fields, like ["mean", "standard_deviation"].
+        doy, depth, lat, lon :
+            Coordinates as expected by OceansDB extract() or track().
+        mode : str, optional
+            "profile" uses extract() and "track" uses track().
+
+        Returns
+        -------
+        dict
+            A copy of the extracted fields, safe to be modified by the caller.
+        """
+        key = self._key(dbname, vtype, var, doy, depth, lat, lon, mode)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._cache[key])
+            if key in self._prefetched:
+                self.hits += 1
+                result = self._prefetched.pop(key)
+            else:
+                self.misses += 1
+                db = self.database(dbname)[vtype]
+                if mode == "track":
+                    result = db.track(var=var, doy=doy, depth=depth, lat=lat, lon=lon)
+                else:
+                    result = db.extract(var=var, doy=doy, depth=depth, lat=lat, lon=lon)
+
+            self._cache[key] = result
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+            return copy.deepcopy(result)
+
+    @staticmethod
+    def _key(dbname, vtype, var, doy, depth, lat, lon, mode):
+        return (
+            dbname,
+            vtype,
+            tuple(var),
+            mode,
+            _array_key(doy),
+            _array_key(depth),
+            _array_key(lat),
+            _array_key(lon),
+        )
+
+    def extract_many(self, dbname, vtype, var, queries, mode="profile"):
+        """Extract climatology values for many profiles, once per position
+
+        Profile queries with the same day of year and position are grouped
+        and extracted once, over the sorted union of their depths, and each
+        query gets its own depth levels back. Track queries, or a query
+        alone at its position, are extracted as extract() would.
+
+        Parameters
+        ----------
+        queries : iterable of dict
+            One dict per profile with the keys doy, depth, lat and lon, and
+            optionally mode, which defaults to mode.
+
+        Returns
+        -------
+        list of dict
+            One extraction per query, in the same order.
+        """
+        queries = list(queries)
+        results = [None] * len(queries)
+        groups = {}
+        for i, q in enumerate(queries):
+            q_mode = q.get("mode", mode)
+            if (q_mode == "profile") and (np.ndim(q["depth"]) == 1) and \
+                    all(np.ndim(q[c]) == 0 for c in ("doy", "lat", "lon")):
+                key = (_array_key(q["doy"]), _array_key(q["lat"]), _array_key(q["lon"]))
+                groups.setdefault(key, []).append(i)
+            else:
+                results[i] = self.extract(
+                    dbname, vtype, var, q["doy"], q["depth"], q["lat"], q["lon"], mode=q_mode)
+
+        for members in groups.values():
+            first = queries[members[0]]
+            if len(members) == 1:
+                results[members[0]] = self.extract(
+                    dbname, vtype, var, first["doy"], first["depth"], first["lat"], first["lon"])
+                continue
+            depths = [np.asarray(queries[i]["depth"], dtype="f8") for i in members]
+            levels = np.unique(np.concatenate(depths))
+            column = self.extract(dbname, vtype, var, first["doy"], levels, first["lat"], first["lon"])
+            module_logger.debug(
+                f"Extracted {len(members)} profiles at once from {dbname} {vtype}")
+            for i, depth in zip(members, depths, strict=True):
+                idx = np.searchsorted(levels, depth)
+                results[i] = {v: column[v][idx] for v in column}
+        return results
+
+    @contextmanager
+    def prefetch(self, requests):
+        """Extract many queries at once for the extract() calls that follow
+
+        Each request is a dict with the keys dbname, vtype, var, doy,
+        depth, lat, lon and mode. They are extracted with extract_many()
+        and, inside the context, an extract() with the same arguments is
+        served from those results. Results not used are dropped on exit.
+
+        Example
+        -------
+        >>> with session.prefetch(requests):
+        ...     for profile in profiles:
+        ...         ProfileQC(profile, cfg)
+        """
+        grouped = {}
+        for r in requests:
+            grouped.setdefault((r["dbname"], r["vtype"], tuple(r["var"])), []).append(r)
+
+        keys = []
+        with self._lock:
+            for (dbname, vtype, var), queries in grouped.items():
+                results = self.extract_many(dbname, vtype, list(var), queries)
+                for q, result in zip(queries, results, strict=True):
+                    key = self._key(dbname, vtype, var, q["doy"], q["depth"], q["lat"], q["lon"], q["mode"])
+                    self._prefetched[key] = result
+                    keys.append(key)
+        try:
+            yield self
+        finally:
+            with self._lock:
+                for key in keys:
+                    self._prefetched.pop(key, None)
+
+    def cache_info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "maxsize": self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._prefetched.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        """Close the open climatologies and empty the cache"""
+        with self._lock:
+            for db in self._databases.values():
+                db.close()
+            self._databases.clear()
+            self.clear()
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def climatology_session():
+    """Return the ClimatologySession shared by the whole process"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = ClimatologySession()
+        return _session
@@ -6,6 +6,7 @@ import copy
 import json
 import logging
 import os
+import pickle
 from collections import OrderedDict
 from importlib import resources
 
@@ -93,6 +94,13 @@ def load_cfg(cfgname="cotede"):
         A dictionary defining a full QC procedure that defines which tests to
         run on which variables.
 
+    Note
+    ----
+    Loaded configurations are cached, keyed by the config name (or the
+    content of an inline config) and the modification time of every JSON
+    file involved, including inherited ones. Each call returns an
+    independent copy, so the output can be freely modified.
+
     See also
     --------
     utils.list_cfgs
@@ -104,6 +112,65 @@ def load_cfg(cfgname="cotede"):
         cfgname, (dict, str)
     ), "load_cfg() input must be a dictionary or a str"
 
+    _, snapshot = _cached_cfg(cfgname)
+    return pickle.loads(snapshot)
+
+
+# Normalized configurations as {key: (sources, snapshot)}, where sources is a
+# tuple of (path, mtime) of the JSON files the cfg was built from, and the
+# snapshot is the pickled cfg. Unpickling is several times faster than a
+# deepcopy, or than parsing the JSON and resolving the inheritance again.
+_cfg_cache = OrderedDict()
+CFG_CACHE_SIZE = 128
+
+
+def _freeze(obj):
+    """Hashable, order preserving, representation of an inline config"""
+    if isinstance(obj, dict):
+        return ("dict", tuple((k, _freeze(v)) for k, v in obj.items()))
+    elif isinstance(obj, (list, tuple)):
+        return ("list", tuple(_freeze(v) for v in obj))
+    hash(obj)
+    return (type(obj).__name__, obj)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+
+def clear_cfg_cache():
+    """Forget all the QC configurations loaded so far"""
+    _cfg_cache.clear()
+
+
+def _cached_cfg(cfgname):
+    """Sources and pickled snapshot of a normalized cfg"""
+    try:
+        key = cfgname if isinstance(cfgname, str) else _freeze(cfgname)
+    except TypeError:
+        module_logger.debug("Inline cfg is not hashable, skipping cache")
+        return _build_cfg(cfgname)
+
+    if key in _cfg_cache:
+        sources, snapshot = _cfg_cache[key]
+        if all(_mtime(path) == mtime for path, mtime in sources):
+            _cfg_cache.move_to_end(key)
+            return sources, snapshot
+
+    sources, snapshot = _build_cfg(cfgname)
+    _cfg_cache[key] = (sources, snapshot)
+    if len(_cfg_cache) > CFG_CACHE_SIZE:
+        _cfg_cache.popitem(last=False)
+    return sources, snapshot
+
+
+def _build_cfg(cfgname):
+    """Read, convert and resolve the inheritance of a QC configuration"""
+    sources = []
+
     # A given manual configuration has priority
     if isinstance(cfgname, dict):
         module_logger.debug("User's QC cfg: %s", cfgname)
@@ -125,26 +192,30 @@ def load_cfg(cfgname="cotede"):
 
         except (FileNotFoundError, ModuleNotFoundError):
             # Fallback: load from user's config directory
-            user_cfg_path = os.path.join(
+            cfg_path = os.path.join(
                 cotederc("cfg"),
                 f"{cfgname}.json",
             )
 
-            with open(user_cfg_path, encoding="utf-8") as f:
+            with open(cfg_path, encoding="utf-8") as f:
                 cfg = json.load(f, object_pairs_hook=OrderedDict)
 
             module_logger.debug("User collection cfg - %s", cfgname)
 
+        sources.append((str(cfg_path), _mtime(cfg_path)))
+
     cfg = fix_config(cfg)
     if "inherit" in cfg:
         if isinstance(cfg["inherit"], str):
             cfg["inherit"] = [cfg["inherit"]]
         for parent in cfg["inherit"]:
-            cfg = inheritance(cfg, load_cfg(parent))
+            parent_sources, parent_snapshot = _cached_cfg(parent)
+            cfg = inheritance(cfg, pickle.loads(parent_snapshot))
+            sources.extend(parent_sources)
 
     cfg = fix_procedure(cfg)
 
-    return cfg
+    return tuple(sources), pickle.dumps(cfg, protocol=pickle.HIGHEST_PROTOCOL)
 
 
 def fix_config(cfg):
@@ -155,7 +226,9 @@ def fix_config(cfg):
     """
     if "revision" not in cfg:
         cfg = convert_pre_to_021(cfg)
-    if cfg["revision"] < "0.22":
+    # A converted cfg carries revision 0.22 as a number, so that an already
+    # loaded cfg can be loaded again.
+    if str(cfg["revision"]) < "0.22":
         cfg = convert_021_to_022(cfg)
 
     return cfg
@@ -260,6 +333,7 @@ def guess_procedure(name, cfg=None):
         "pstep": None,
         "rate_of_change": "RateOfChange",
         "regional_range": "RegionalRange",
+        "rolling_std": "RollingStd",
         "spike": "Spike",
         "spike_depthconditional": "SpikeDepthConditional",
         "stuck_value": "StuckValue",
@@ -0,0 +1,153 @@
+"""Load hydrographic profiles from files as ProfileQC inputs
+
+Supports SeaBird's CNV files, through the seabird package, and DFO's ODF
+files, through datashop_toolbox. Both are imported only when a file of that
+format is loaded.
+"""
+
+import logging
+import os
+import re
+
+import numpy as np
+from numpy import ma
+
+module_logger = logging.getLogger(__name__)
+
+# ODF parameter codes that are not measurements, like quality flags or time
+ODF_SKIP = re.compile(r"^(Q[A-Z0-9]{4}|SYTM|FFFF|CRAT)_\d+$")
+
+# ODF parameter codes known by CoTeDe under another name
+ODF_ALIASES = {"TE90": "TEMP"}
+
+
+class ODFProfile:
+    """Dictionary-like view of an ODF file, as expected by ProfileQC
+
+    Each parameter is a masked array, with null values masked, named after
+    the ODF code without the sensor number for the first sensor, like
+    "TEMP" for TEMP_01, and with the sensor number for the others, like
+    "TEMP2" for TEMP_02. ITS-90 temperature (TE90) is named "TEMP".
+
+    Parameters
+    ----------
+    filename : str
+        Path to the ODF file.
+
+    Example
+    -------
+    >>> profile = ODFProfile("CTD_HUD2020001_001_1_DN.ODF")
+    >>> pqc = ProfileQC(profile)
+    """
+
+    def __init__(self, filename):
+        from datashop_toolbox.basehdr import BaseHeader
+        from datashop_toolbox.odfhdr import OdfHeader
+        from datashop_toolbox.sytm import parse_sytm
+
+        self.filename = filename
+        odf = OdfHeader()
+        odf.read_odf(str(filename))
+
+        nulls = {}
+        for ph in odf.parameter_headers:
+            try:
+                nulls[ph.code] = float(ph.null_string)
+            except ValueError:
+                pass
+
+        self.data = {}
+        frame = odf.data.data_frame
+        for code in frame.columns:
+            if ODF_SKIP.match(code):
+                continue
+            name, _, sensor = code.partition("_")
+            name = ODF_ALIASES.get(name, name)
+            if sensor.lstrip("0") not in ("", "1"):
+                name += sensor.lstrip("0")
+            if name in self.data:
+                module_logger.debug(f"{filename}: ignoring repeated {code} as {name}")
+                continue
+            try:
+                values = np.asarray(frame[code], dtype="f8")
+            except (TypeError, ValueError):
+                continue
+            mask = ~np.isfinite(values) | (values == BaseHeader.NULL_VALUE)
+            if code in nulls:
+                mask |= values == nulls[code]
+            self.data[name] = ma.masked_array(values, mask=mask)
+
+        event = odf.event_header
+        self.attrs = {"filename": os.path.basename(filename)}
+        if event.initial_latitude != BaseHeader.NULL_VALUE:
+            self.attrs["LATITUDE"] = float(event.initial_latitude)
+        if event.initial_longitude != BaseHeader.NULL_VALUE:
+            self.attrs["LONGITUDE"] = float(event.initial_longitude)
+        start = parse_sytm([event.start_date_time], errors="coerce")[0]
+        if not np.isnat(start):
+            self.attrs["datetime"] = start.astype("datetime64[us]").item()
+
+    def keys(self):
+        return self.data.keys()
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+
+def _load_cnv(filename):
+    from seabird import fCNV
+
+    return fCNV(filename)
+
+
+# Profile readers by (lower case) file extension
+READERS = {".cnv": _load_cnv, ".odf": ODFProfile}
+
+
+def load_profile(filename):
+    """Load a CNV or ODF file as a ProfileQC input
+
+    Parameters
+    ----------
+    filename : str
+        Path to the file. The format is given by the extension, as listed in
+        READERS.
+
+    Returns
+    -------
+    dict-like
+        The profile, with its variables as masked arrays and its metadata in
+        .attrs.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in READERS:
+        raise ValueError(f"Unknown profile format: {filename}")
+    return READERS[ext](filename)
+
+
+def find_profiles(datadir, extensions=None):
+    """Files in datadir, and its sub-directories, readable by load_profile
+
+    Parameters
+    ----------
+    datadir : str
+        Directory to walk.
+    extensions : list of str, optional
+        Extensions to include, like [".cnv"]. Default is all of READERS.
+
+    Returns
+    -------
+    list of str
+        Sorted paths relative to datadir, with "/" as separator.
+    """
+    if extensions is None:
+        extensions = READERS.keys()
+    extensions = {e.lower() for e in extensions}
+
+    output = []
+    for root, _dirs, files in os.walk(datadir):
+        for f in files:
+            if os.path.splitext(f)[1].lower() in extensions:
+                path = os.path.relpath(os.path.join(root, f), datadir)
+                output.append(path.replace(os.sep, "/"))
+    return sorted(output)
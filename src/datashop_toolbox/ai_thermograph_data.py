@@ -10,6 +10,7 @@ import pandas as pd
 from PySide6.QtWidgets import QApplication
 
 from datashop_toolbox import select_metadata_file_and_data_folder
+from datashop_toolbox.sytm import parse_sytm
 from datashop_toolbox.thermograph import ThermographHeader
 
 
@@ -203,7 +204,7 @@ def qc_ai_thermograph_data(
             qflag = orig_df["QTE90_01"].to_numpy().astype(int)
 
         try:
-            dt = pd.to_datetime(sytm, format="%d-%b-%Y %H:%M:%S.%f")
+            dt = pd.DatetimeIndex(parse_sytm(orig_df["SYTM_01"].to_numpy()))
         except (ValueError, TypeError):
             dt = pd.to_datetime(sytm, errors="coerce")
 
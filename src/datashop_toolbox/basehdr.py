@@ -1,10 +1,11 @@
 import enum
 import logging
-from datetime import datetime
 from typing import ClassVar
 
 from pydantic import BaseModel, Field
 
+from datashop_toolbox.sytm import is_sytm
+
 
 class LogLevel(enum.StrEnum):
     DEBUG = "DEBUG"
@@ -75,12 +76,7 @@ class BaseHeader:
 
     @staticmethod
     def matches_sytm_format(date_str: str) -> bool:
-        fmt = BaseHeader.SYTM_FORMAT
-        try:
-            datetime.strptime(date_str, fmt)
-            return True
-        except ValueError:
-            return False
+        return bool(is_sytm(date_str))
 
 
 def main():
@@ -23,6 +23,7 @@ from datashop_toolbox.lookup_parameter import lookup_parameter
 from datashop_toolbox.odfhdr import OdfHeader
 from datashop_toolbox.parameterhdr import ParameterHeader
 from datashop_toolbox.read_seaodf_parameters import read_seaodf_parameters
+from datashop_toolbox.sytm import format_sytm
 
 # Import custom children dialogs
 from .odf_metadata_dialog import OdfMetadataDialog
@@ -384,14 +385,13 @@ class MainWindow(QMainWindow):
                 param_code = f"{param_name}_01"
                 parameter_header.type = param_name
                 # Convert datetime values to SYTM strings
-                sytm = df[column].dt.strftime(BaseHeader.SYTM_FORMAT).to_list()
-                sytm_strings = [t[:-4].upper() for t in sytm]
+                sytm_strings = format_sytm(df[column])
                 min_date = sytm_strings[0]
                 max_date = sytm_strings[-1]
                 parameter_header.minimum_value = min_date
                 parameter_header.maximum_value = max_date
                 parameter_header.null_string = BaseHeader.SYTM_NULL_VALUE
-                df[column] = [f"'{s}'" for s in sytm_strings]
+                df[column] = format_sytm(df[column], quote=True)
             elif column == "sample":
                 param_name = "CNTR"
                 parameter_header.type = "INTE"
@@ -12,6 +12,7 @@ from datashop_toolbox.eventhdr import EventHeader
 from datashop_toolbox.lookup_parameter import lookup_parameter
 from datashop_toolbox.odfhdr import OdfHeader
 from datashop_toolbox.parameterhdr import ParameterHeader
+from datashop_toolbox.sytm import format_sytm
 
 
 class MultinetHeader(OdfHeader):
@@ -69,25 +70,12 @@ class MultinetHeader(OdfHeader):
 
     def create_sytm(self, df: pd.DataFrame) -> pd.DataFrame:
         """Updated the data frame with the proper SYTM column."""
-        df["dates"] = df["date"].apply(
-            lambda x: datetime.strptime(x, MultinetHeader.date_format).date()
+        datetimes = pd.to_datetime(
+            df["date"].astype(str) + " " + df["time"].astype(str),
+            format=f"{MultinetHeader.date_format} {MultinetHeader.time_format}",
         )
-        df["dates"] = df["dates"].astype("string")
-        df["times"] = df["time"].apply(
-            lambda x: datetime.strptime(x, MultinetHeader.time_format).time()
-        )
-        df["times"] = df["times"].astype("string")
-        df["datetimes"] = df["dates"] + " " + df["times"]
-        df = df.drop(columns=["date", "time", "dates", "times"], axis=1)
-        df["datetimes"] = pd.to_datetime(df["datetimes"])
-        df["sytm"] = (
-            df["datetimes"]
-            .apply(lambda x: datetime.strftime(x, BaseHeader.SYTM_FORMAT))
-            .str.upper()
-        )
-        df = df.drop("datetimes", axis=1)
-        df["sytm"] = df["sytm"].str[:-4]
-        df["sytm"] = df["sytm"].apply(lambda x: "'" + str(x) + "'")
+        df = df.drop(columns=["date", "time"], axis=1)
+        df["sytm"] = format_sytm(datetimes, quote=True)
         return df
 
     @staticmethod
@@ -0,0 +1,438 @@
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from datashop_toolbox.basehdr import BaseHeader
+from datashop_toolbox.odfhdr import OdfHeader
+from datashop_toolbox.sytm import parse_sytm
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS odf_files (
+    file_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    file_name TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    file_specification TEXT,
+    cruise_number TEXT,
+    cruise_name TEXT,
+    cruise_description TEXT,
+    organization TEXT,
+    chief_scientist TEXT,
+    platform TEXT,
+    area_of_operation TEXT,
+    data_type TEXT,
+    event_number TEXT,
+    event_qualifier1 TEXT,
+    event_qualifier2 TEXT,
+    station_name TEXT,
+    instrument_type TEXT,
+    model TEXT,
+    serial_number TEXT,
+    num_rows INTEGER,
+    start_time TEXT,
+    end_time TEXT,
+    min_latitude REAL,
+    max_latitude REAL,
+    min_longitude REAL,
+    max_longitude REAL,
+    min_depth REAL,
+    max_depth REAL,
+    scanned_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS odf_parameters (
+    file_id INTEGER NOT NULL REFERENCES odf_files (file_id) ON DELETE CASCADE,
+    parameter_code TEXT NOT NULL,
+    PRIMARY KEY (file_id, parameter_code)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_odf_files_cruise ON odf_files (cruise_number);
+CREATE INDEX IF NOT EXISTS ix_odf_files_type_time ON odf_files (data_type, start_time, end_time);
+CREATE INDEX IF NOT EXISTS ix_odf_files_latitude ON odf_files (min_latitude, max_latitude);
+CREATE INDEX IF NOT EXISTS ix_odf_files_longitude ON odf_files (min_longitude, max_longitude);
+CREATE INDEX IF NOT EXISTS ix_odf_files_instrument ON odf_files (instrument_type, serial_number);
+CREATE INDEX IF NOT EXISTS ix_odf_parameters_code ON odf_parameters (parameter_code, file_id);
+"""
+
+# Columns searched by the free text filter of OdfCatalog.query.
+TEXT_COLUMNS = (
+    "file_name",
+    "cruise_name",
+    "cruise_description",
+    "area_of_operation",
+    "station_name",
+    "event_number",
+)
+
+LATITUDE_CODES = ("LATD", "LATP")
+LONGITUDE_CODES = ("LOND", "LONP")
+
+
+def file_checksum(path: Path) -> str:
+    """Return the SHA-256 checksum of a file."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _valid_coordinates(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.isfinite(values) & (values != BaseHeader.NULL_VALUE) & (values > -990.0)]
+
+
+def _iso(value: np.datetime64) -> str | None:
+    return None if np.isnat(value) else str(value.astype("datetime64[ms]"))
+
+
+def catalog_entry(odf: OdfHeader) -> dict:
+    """
+    Extract the catalog fields of an ODF object.
+
+    Parameters
+    ----------
+    odf: OdfHeader
+        The ODF object to be catalogued.
+
+    Returns
+    -------
+    entry: dict
+        The header fields, parameter codes, row count, time range and
+        bounding box of the ODF object. The time range comes from the SYTM
+        column when there is one and from the event header otherwise; the
+        bounding box includes any latitude/longitude data columns.
+    """
+
+    cruise = odf.cruise_header
+    event = odf.event_header
+    instrument = odf.instrument_header
+    data = odf.data.data_frame
+    codes = list(data.columns) if len(data.columns) else [ph.code for ph in odf.parameter_headers]
+
+    times = parse_sytm([event.start_date_time, event.end_date_time], errors="coerce")
+    sytm_codes = [code for code in codes if code.startswith("SYTM")]
+    if sytm_codes and len(data):
+        sample_times = parse_sytm(data[sytm_codes[0]].to_numpy().astype(str), errors="coerce")
+        if not np.isnat(sample_times).all():
+            times = sample_times
+    # Null dates, like the usual 17-NOV-1858 end date, are not part of the range
+    times = times[~np.isnat(times)]
+
+    latitudes = [event.initial_latitude, event.end_latitude]
+    longitudes = [event.initial_longitude, event.end_longitude]
+    for code in codes:
+        if code.startswith(LATITUDE_CODES):
+            latitudes.extend(pd.to_numeric(data[code], errors="coerce"))
+        elif code.startswith(LONGITUDE_CODES):
+            longitudes.extend(pd.to_numeric(data[code], errors="coerce"))
+    latitudes = _valid_coordinates(latitudes)
+    longitudes = _valid_coordinates(longitudes)
+
+    depths = _valid_coordinates([event.min_depth, event.max_depth])
+
+    return {
+        "file_specification": odf.file_specification.strip("'"),
+        "cruise_number": cruise.cruise_number.strip("'"),
+        "cruise_name": cruise.cruise_name.strip("'"),
+        "cruise_description": cruise.cruise_description.strip("'"),
+        "organization": cruise.organization.strip("'"),
+        "chief_scientist": cruise.chief_scientist.strip("'"),
+        "platform": cruise.platform.strip("'"),
+        "area_of_operation": cruise.area_of_operation.strip("'"),
+        "data_type": event.data_type.strip("'"),
+        "event_number": event.event_number.strip("'"),
+        "event_qualifier1": event.event_qualifier1.strip("'"),
+        "event_qualifier2": event.event_qualifier2.strip("'"),
+        "station_name": event.station_name.strip("'"),
+        "instrument_type": instrument.instrument_type.strip("'"),
+        "model": instrument.model.strip("'"),
+        "serial_number": instrument.serial_number.strip("'"),
+        "num_rows": len(data),
+        "start_time": _iso(times.min()) if times.size else None,
+        "end_time": _iso(times.max()) if times.size else None,
+        "min_latitude": float(latitudes.min()) if latitudes.size else None,
+        "max_latitude": float(latitudes.max()) if latitudes.size else None,
+        "min_longitude": float(longitudes.min()) if longitudes.size else None,
+        "max_longitude": float(longitudes.max()) if longitudes.size else None,
+        "min_depth": float(depths.min()) if depths.size else None,
+        "max_depth": float(depths.max()) if depths.size else None,
+        "parameter_codes": codes,
+    }
+
+
+def _scan_file(path: Path) -> dict:
+    odf = OdfHeader()
+    odf.read_odf(str(path))
+    entry = catalog_entry(odf)
+    entry["checksum"] = file_checksum(path)
+    return entry
+
+
+class OdfCatalog:
+    """
+    A SQLite catalog of the ODF files found in one or more folder trees.
+
+    `scan` brings the catalog up to date, only reading files that were added
+    or changed since the previous scan, and `query` selects files by cruise,
+    event, instrument, parameter, time range, bounding box or free text
+    without opening any ODF file.
+
+    Example
+    -------
+    >>> with OdfCatalog("odf_catalog.db") as catalog:
+    ...     catalog.scan("/data/mtr")
+    ...     catalog.query(data_type="MTR", text="LFA 33", start="2024-01-01", end="2025-01-01")
+    """
+
+    def __init__(self, database: str | Path) -> None:
+        self.database = Path(database)
+        # Files that could not be read by the last scan, as {path: error}
+        self.failed: dict[str, str] = {}
+        self.connection = sqlite3.connect(self.database)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "OdfCatalog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM odf_files").fetchone()[0]
+
+    def scan(
+        self,
+        folder: str | Path,
+        wildcard: str = "*.ODF",
+        recursive: bool = True,
+        max_workers: int | None = None,
+    ) -> dict[str, int]:
+        """
+        Bring the catalog up to date with the ODF files under a folder.
+
+        Files whose modification time and size match the catalog are skipped
+        without being opened. Files whose contents still match the stored
+        checksum only have their modification time refreshed. The remaining
+        files are read in a process pool, and catalog entries for files that
+        no longer exist under the folder are removed.
+
+        Parameters
+        ----------
+        folder: str | Path
+            Root of the folder tree to be scanned.
+        wildcard: str
+            Glob pattern selecting the ODF files.
+        recursive: bool
+            Whether to descend into sub-folders.
+        max_workers: int | None
+            Number of worker processes; defaults to the number of CPUs.
+
+        Returns
+        -------
+        counts: dict[str, int]
+            The number of files added, updated, unchanged, removed and failed.
+            The paths of the failed files and their errors are kept in
+            `failed`.
+        """
+
+        folder = Path(folder).resolve()
+        files = folder.rglob(wildcard) if recursive else folder.glob(wildcard)
+        found = {str(path): path.stat() for path in files if path.is_file()}
+
+        prefix = str(folder) + os.sep
+        catalogued = {
+            row["path"]: row
+            for row in self.connection.execute(
+                "SELECT file_id, path, mtime_ns, size, checksum FROM odf_files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+        }
+
+        self.failed = {}
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "failed": 0}
+        to_read = []
+        touched = []
+        for path, stat in found.items():
+            row = catalogued.get(path)
+            if row is None:
+                to_read.append(path)
+            elif row["mtime_ns"] == stat.st_mtime_ns and row["size"] == stat.st_size:
+                counts["unchanged"] += 1
+            elif file_checksum(Path(path)) == row["checksum"]:
+                touched.append((stat.st_mtime_ns, stat.st_size, row["file_id"]))
+                counts["unchanged"] += 1
+            else:
+                to_read.append(path)
+
+        removed = [(row["file_id"],) for path, row in catalogued.items() if path not in found]
+        counts["removed"] = len(removed)
+
+        with self.connection:
+            self.connection.executemany("UPDATE odf_files SET mtime_ns = ?, size = ? WHERE file_id = ?", touched)
+            self.connection.executemany("DELETE FROM odf_files WHERE file_id = ?", removed)
+
+        if to_read:
+            max_workers = max_workers or os.process_cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {path: executor.submit(_scan_file, Path(path)) for path in to_read}
+                for path, future in futures.items():
+                    try:
+                        entry = future.result()
+                    except Exception as err:
+                        logger.warning("Unable to catalog %s: %s", path, err)
+                        self.failed[path] = str(err)
+                        counts["failed"] += 1
+                        continue
+                    counts["updated" if path in catalogued else "added"] += 1
+                    self._store(path, found[path], entry)
+
+        return counts
+
+    def _store(self, path: str, stat: os.stat_result, entry: dict) -> None:
+        codes = entry.pop("parameter_codes")
+        entry.update(
+            path=path,
+            file_name=Path(path).name,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            scanned_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        columns = ", ".join(entry)
+        binds = ", ".join(f":{column}" for column in entry)
+        with self.connection:
+            self.connection.execute("DELETE FROM odf_files WHERE path = ?", (path,))
+            cursor = self.connection.execute(f"INSERT INTO odf_files ({columns}) VALUES ({binds})", entry)
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO odf_parameters (file_id, parameter_code) VALUES (?, ?)",
+                [(cursor.lastrowid, code) for code in codes],
+            )
+
+    def query(
+        self,
+        data_type: str | None = None,
+        cruise_number: str | None = None,
+        instrument_type: str | None = None,
+        parameter: str | None = None,
+        start: str | datetime | None = None,
+        end: str | datetime | None = None,
+        bbox: tuple[float, float, float, float] | None = None,
+        text: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        Select catalogued files.
+
+        Parameters
+        ----------
+        data_type: str | None
+            ODF data type, e.g. "CTD" or "MTR".
+        cruise_number: str | None
+            Cruise number; SQL LIKE wildcards are allowed.
+        instrument_type: str | None
+            Instrument type; SQL LIKE wildcards are allowed.
+        parameter: str | None
+            A parameter code ("TEMP_01") or parameter prefix ("TEMP") the file must contain.
+        start, end: str | datetime | None
+            Return files whose time range overlaps [start, end).
+        bbox: tuple[float, float, float, float] | None
+            (min_longitude, min_latitude, max_longitude, max_latitude); return
+            files whose bounding box intersects it.
+        text: str | None
+            Case-insensitive text looked for in the file name, cruise name and
+            description, area of operation, station name and event number.
+
+        Returns
+        -------
+        files: pandas.DataFrame
+            One row per matching file, ordered by start time and path.
+        """
+
+        clauses = []
+        binds = []
+        if data_type is not None:
+            clauses.append("f.data_type = ?")
+            binds.append(data_type)
+        if cruise_number is not None:
+            clauses.append("f.cruise_number LIKE ?")
+            binds.append(cruise_number)
+        if instrument_type is not None:
+            clauses.append("f.instrument_type LIKE ?")
+            binds.append(instrument_type)
+        if parameter is not None:
+            if "_" in parameter:
+                clauses.append(
+                    "EXISTS (SELECT 1 FROM odf_parameters p WHERE p.file_id = f.file_id AND p.parameter_code = ?)"
+                )
+                binds.append(parameter)
+            else:
+                clauses.append(
+                    "EXISTS (SELECT 1 FROM odf_parameters p WHERE p.file_id = f.file_id "
+                    "AND p.parameter_code LIKE ? ESCAPE '\\')"
+                )
+                binds.append(f"{parameter}\\_%")
+        if start is not None:
+            clauses.append("f.end_time >= ?")
+            binds.append(pd.Timestamp(start).isoformat())
+        if end is not None:
+            clauses.append("f.start_time < ?")
+            binds.append(pd.Timestamp(end).isoformat())
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            clauses.append("f.max_latitude >= ? AND f.min_latitude <= ?")
+            clauses.append("f.max_longitude >= ? AND f.min_longitude <= ?")
+            binds.extend([min_lat, max_lat, min_lon, max_lon])
+        if text is not None:
+            clauses.append("(" + " OR ".join(f"f.{column} LIKE ?" for column in TEXT_COLUMNS) + ")")
+            binds.extend([f"%{text}%"] * len(TEXT_COLUMNS))
+
+        sql = "SELECT f.* FROM odf_files f"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY f.start_time, f.path"
+        return pd.read_sql_query(sql, self.connection, params=binds)
+
+    def paths(self, **filters) -> list[Path]:
+        """Return the paths of the catalogued files matching the `query` filters."""
+        return [Path(path) for path in self.query(**filters)["path"]]
+
+    def parameter_codes(self, path: str | Path) -> list[str]:
+        """Return the parameter codes recorded for a catalogued file."""
+        rows = self.connection.execute(
+            "SELECT p.parameter_code FROM odf_parameters p JOIN odf_files f USING (file_id) WHERE f.path = ?",
+            (str(Path(path).resolve()),),
+        )
+        return [row[0] for row in rows]
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Scan folders into an ODF catalog, from the command line."""
+
+    parser = argparse.ArgumentParser(description="Catalog the ODF files under one or more folders.")
+    parser.add_argument("database", help="SQLite catalog, created if it does not exist")
+    parser.add_argument("folders", nargs="+", help="Folders to scan")
+    parser.add_argument("--wildcard", default="*.ODF", help="Glob pattern of the ODF files (default: *.ODF)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+    with OdfCatalog(args.database) as catalog:
+        for folder in args.folders:
+            counts = catalog.scan(folder, wildcard=args.wildcard, max_workers=args.workers)
+            logger.info("%s: %s", folder, counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,123 +1,228 @@
 import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
+import numpy as np
 
 from datashop_toolbox.basehdr import BaseHeader
 from datashop_toolbox.odfhdr import OdfHeader
 
+# Fixed-width output formats as (field width, decimal places); flags are single digits.
 col_formats = {
-    'PRES_01':  '{:8.1f}',
-    'QPRES_01': '{:>1d}',
-    'TEMP_01':  '{:10.4f}',
-    'QTEMP_01': '{:>1d}',
-    'TE90_01':  '{:10.4f}',
-    'QTE90_01': '{:>1d}',
-    'PSAL_01':  '{:10.4f}',
-    'QPSAL_01': '{:>1d}',
-    'DOXY_01':  '{:8.3f}',
-    'QDOXY_01': '{:>1d}',
+    'PRES_01':  (8, 1),
+    'QPRES_01': (1, 0),
+    'TEMP_01':  (10, 4),
+    'QTEMP_01': (1, 0),
+    'TE90_01':  (10, 4),
+    'QTE90_01': (1, 0),
+    'PSAL_01':  (10, 4),
+    'QPSAL_01': (1, 0),
+    'DOXY_01':  (8, 3),
+    'QDOXY_01': (1, 0),
 }
 
+# ICES ship codes used to build the EXPOCODE.
+ship_codes = {
+    'HUDSON': '18HU',
+    'AMUNDSEN': '18DL',
+    'ATLANTIS': '33AT',
+    'CAPT JACQUES CARTIER': '18QL',
+    'JAMES COOK': '740H',
+    'LATALANTE': '35A3',
+}
+
+# ODF quality flag -> WOCE flag, indexed by the ODF flag (1 -> 2 and 2 -> 3, all others unchanged).
+WOCE_FLAGS = np.arange(10)
+WOCE_FLAGS[1] = 2
+WOCE_FLAGS[2] = 3
+
+
+def format_fixed(values, width: int, decimals: int) -> np.ndarray:
+    """
+    Format numbers like '{:>{width}.{decimals}f}' for a whole array at once.
+
+    Digits are produced with integer arithmetic column by column. Values whose
+    rounding is ambiguous in binary, very large values and non-finite values
+    are handed to str.format so the output is identical to the scalar formatter.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    scale = 10.0 ** decimals
+    scaled = np.abs(values) * scale
+    with np.errstate(invalid='ignore'):
+        fraction = scaled - np.floor(scaled)
+        exact = np.isfinite(scaled) & (scaled < 1e15) & (np.abs(fraction - 0.5) > 1e-6)
+    digits = np.where(exact, np.rint(scaled), 0).astype(np.int64)
+    negative = np.signbit(values)
+
+    integer_digits = np.maximum(np.floor(np.log10(np.maximum(digits // int(scale), 1))).astype(int) + 1, 1)
+    length = negative + integer_digits + (decimals + 1 if decimals else 0)
+    ncols = max(width, int(length.max(initial=width)))
+
+    out = np.full((values.size, ncols), ord(' '), dtype=np.uint8)
+    remaining = digits.copy()
+    for k in range(ncols):
+        col = ncols - 1 - k
+        if decimals and k == decimals:
+            out[:, col] = ord('.')
+            continue
+        position = k - 1 if decimals and k > decimals else k
+        is_digit = position < decimals + integer_digits
+        out[is_digit, col] = ord('0') + remaining[is_digit] % 10
+        out[negative & (position == decimals + integer_digits), col] = ord('-')
+        remaining //= 10
+
+    result = out.view(f'S{ncols}').ravel().astype(f'U{ncols}')
+    if ncols > width:
+        result = np.strings.rjust(np.strings.lstrip(result), width)
+    inexact = np.flatnonzero(~exact)
+    if inexact.size:
+        fallback = np.array([f'{value:>{width}.{decimals}f}' for value in values[inexact]])
+        result = result.astype(np.promote_types(result.dtype, fallback.dtype))
+        result[inexact] = fallback
+    return result
+
+
+def odf_flags_to_woce(flags) -> np.ndarray:
+    """Convert ODF quality flags to WOCE flags with a lookup table.
+
+    Flags outside 0-9 are returned unchanged; missing flags raise a ValueError.
+    """
+    flags = np.asarray(flags, dtype=float)
+    if not np.isfinite(flags).all():
+        raise ValueError('Cannot convert missing quality flags to WOCE flags.')
+    flags = flags.astype(int)
+    known = (flags >= 0) & (flags < WOCE_FLAGS.size)
+    return np.where(known, WOCE_FLAGS[np.where(known, flags, 0)], flags)
 
-def odf2exchange(odf_folder: Path, wildcard: str) -> None:
+
+def get_expocode(odf: OdfHeader) -> str:
+    """Return the CCHDO EXPOCODE (ship code + cruise start date) for an ODF object."""
+    platform = odf.cruise_header.platform.strip("'").upper()
+    if platform not in ship_codes:
+        raise ValueError(f'No ship code is known for platform {platform!r}.')
+    start_date = datetime.strptime(odf.cruise_header.start_date, BaseHeader.SYTM_FORMAT)
+    return f"{ship_codes[platform]}{start_date.strftime('%Y%m%d')}"
+
+
+def odf_file_to_exchange(odf_file: Path, output_path: Path, section_id: str = 'AR07W',
+                         operator_initials: str = 'JWJ') -> Path | None:
+    """Write one ODF file as a CCHDO Exchange CTD file and return its path.
+
+    Args:
+        odf_file: The ODF file to convert.
+        output_path: The folder receiving the Exchange file.
+        section_id: The WOCE/GO-SHIP section identifier.
+        operator_initials: Initials written in the file stamp.
+    """
+
+    # Read the ODF file in as an ODF object
+    odf = OdfHeader()
+    odf.read_odf(str(odf_file))
+
+    # Check to see which scale the temperature is in: IPTS-68 or ITS-90?
+    cols = odf.data.parameter_list
+    if "TEMP_01" in cols:
+        temp_scale = 'IPTS-68'
+        temp_code = 'TEMP_01'
+    elif "TE90_01" in cols:
+        temp_scale = 'ITS-90'
+        temp_code = 'TE90_01'
+    else:
+        print(f"WARNING: Problem with temperature column handling in {odf_file.name}; file skipped.")
+        return None
+    columns = ['PRES_01', 'QPRES_01', temp_code, f'Q{temp_code}', 'PSAL_01', 'QPSAL_01', 'DOXY_01', 'QDOXY_01']
+
+    data = odf.data.data_frame
+    formatted_cols = []
+    for col in columns:
+        width, decimals = col_formats[col]
+        values = data[col].to_numpy()
+        if col.startswith('Q'):
+            # Convert flags to WOCE flags
+            values = odf_flags_to_woce(values)
+        formatted_cols.append(format_fixed(values, width, decimals))
+    rows = formatted_cols[0]
+    for formatted in formatted_cols[1:]:
+        rows = np.strings.add(np.strings.add(rows, ','), formatted)
+
+    # Print Exchange header lines
+    current_date = datetime.strftime(datetime.now(), '%Y%m%d')
+    expocode = get_expocode(odf)
+    event = int(odf.event_header.event_number)
+    event_dt = datetime.strptime(odf.event_header.start_date_time, BaseHeader.SYTM_FORMAT)
+    output_file = Path(output_path, f'{expocode}_{event}_ct1.csv')
+    with open(output_file, 'w', newline='') as f:
+        f.write(f'CTD,{current_date}DFOBIO{operator_initials}\n')
+        f.write('NUMBER_HEADERS = 10\n')
+        f.write(f'EXPOCODE = {expocode}\n')
+        f.write(f'SECT_ID = {section_id}\n')
+        f.write(f'STNNBR = {event}\n')
+        f.write('CASTNO = 1\n')
+        f.write(f"DATE = {event_dt.strftime('%Y%m%d')}\n")
+        f.write(f"TIME = {event_dt.strftime('%H%M')}\n")
+        f.write(f'LATITUDE = {odf.event_header.initial_latitude}\n')
+        f.write(f'LONGITUDE = {odf.event_header.initial_longitude}\n')
+        f.write(f'DEPTH =  {int(odf.event_header.sounding)}\n')
+        f.write('CTDPRS,CTDPRS_FLAG_W,CTDTMP,CTDTMP_FLAG_W,CTDSAL,CTDSAL_FLAG_W,CTDOXY,CTDOXY_FLAG_W\n')
+        f.write(f'DBAR,,{temp_scale},,PSS-78,,ML/L,\n')
+        if rows.size:
+            f.write('\n'.join(rows.tolist()) + '\n')
+        f.write('END_DATA')
+
+    return output_file
+
+
+def odf2exchange(odf_folder: Path, wildcard: str, section_id: str = 'AR07W', operator_initials: str = 'JWJ',
+                 max_workers: int | None = None, combine: bool = True) -> list[Path]:
     """Generate CCHDO Exchange Formatted files from ODF files.
 
+    Files are converted in parallel worker processes. When combine is True the
+    CTD files of each EXPOCODE are also bundled into a single <EXPOCODE>_ct1.zip
+    as distributed by CCHDO.
+
     Args:
         odf_folder: The path to the ODF files.
+        wildcard: Glob pattern selecting the ODF files.
+        section_id: The WOCE/GO-SHIP section identifier.
+        operator_initials: Initials written in the file stamp.
+        max_workers: Number of worker processes; defaults to the number of CPUs.
+        combine: Whether to write the combined ZIP archive(s).
+
+    Returns:
+        The paths of the Exchange files written.
     """
 
-    # Change to folder containing files to be modified
-    os.chdir(odf_folder)
-
-    # Find all ODF files in the current directory.
-    files = odf_folder.glob(wildcard)
-
-    # Loop through the list of ODF files and process both the DN and UP files.
-    # Iterate through the list of input files.
-    for file_name in files:
-
-        print()
-        print('#######################################################################')
-        print(f'Processing file: {file_name.name}')
-        print()
-
-        # Read the ODF file in as an ODF object
-        odf = OdfHeader()
-        odf.read_odf(file_name.name)
-
-        # Print Exchange header lines
-        now = datetime.now()
-        current_date = datetime.strftime(now, '%Y%m%d')
-        operator_initials = 'JWJ'
-        start_date = datetime.strptime(odf.cruise_header.start_date, BaseHeader.SYTM_FORMAT)
-        sdate = start_date.strftime('%Y%m%d')
-        if odf.cruise_header.platform.upper() == 'HUDSON':
-            ship_code = '18HU'
-        elif odf.cruise_header.platform.upper() == 'AMUNDSEN':
-            ship_code = '18DL'
-        elif odf.cruise_header.platform.upper() == 'ATLANTIS':
-            ship_code = '33AT'
-        elif odf.cruise_header.platform.upper() == 'CAPT JACQUES CARTIER':
-            ship_code = '18QL'
-        elif odf.cruise_header.platform.upper() == 'JAMES COOK':
-            ship_code = '740H'
-        elif odf.cruise_header.platform.upper() == 'LATALANTE':
-            ship_code = '35A3'
-        expocode = f'{ship_code}{sdate}'
-        event = int(odf.event_header.event_number)
-        output_path = Path(odf_folder, 'Exchange_Format/')
-        if not output_path.is_dir():
-            os.mkdir(output_path)
-        output_file = Path(output_path, f'{expocode}_{event}_ct1.csv')
-        with open(output_file, 'w', newline='') as f:
-            f.write(f'CTD,{current_date}DFOBIO{operator_initials}\n')
-            f.write('NUMBER_HEADERS = 10\n')
-            f.write(f'EXPOCODE = {expocode}\n')
-            f.write('SECT_ID = AR07W\n')
-            f.write(f'STNNBR = {event}\n')
-            f.write('CASTNO = 1\n')
-            event_dt = datetime.strptime(odf.event_header.start_date_time, BaseHeader.SYTM_FORMAT)
-            esdate = event_dt.strftime('%Y%m%d')
-            estime = event_dt.strftime('%H%M')
-            f.write(f'DATE = {esdate}\n')
-            f.write(f'TIME = {estime}\n')
-            f.write(f'LATITUDE = {odf.event_header.initial_latitude}\n')
-            f.write(f'LONGITUDE = {odf.event_header.initial_longitude}\n')
-            f.write(f'DEPTH =  {int(odf.event_header.sounding)}\n')
-            # Check to see which scale the temperature is in: IPTS-68 or ITS-90?
-            cols = odf.data.parameter_list
-            if "TEMP_01" in cols:
-                temp_scale = 'IPTS-68'
-                output_df = odf.data.data_frame[['PRES_01','QPRES_01','TEMP_01','QTEMP_01','PSAL_01',
-                                                 'QPSAL_01','DOXY_01','QDOXY_01']]            
-            elif "TE90_01" in cols:
-                temp_scale = 'ITS-90'
-                output_df = odf.data.data_frame[['PRES_01','QPRES_01','TE90_01','QTE90_01','PSAL_01',
-                                                 'QPSAL_01','DOXY_01','QDOXY_01']]            
-            else:
-                print("WARNING: Problem with temperature column handling.")
-            formatted_cols = []
-            for col in output_df.columns:
-                if col.startswith('Q'):
-                    # Convert flags to WOCE flags
-                    output_df[col] = output_df[col].replace(2,3)
-                    output_df[col] = output_df[col].replace(1,2)
-                    formatted_cols.append(output_df[col].astype(int).map(col_formats[col].format))
-                else:
-                    formatted_cols.append(output_df[col].map(col_formats[col].format))
-            formatted_df = pd.concat(formatted_cols, axis=1)
-            f.write('CTDPRS,CTDPRS_FLAG_W,CTDTMP,CTDTMP_FLAG_W,CTDSAL,CTDSAL_FLAG_W,CTDOXY,CTDOXY_FLAG_W\n')
-            f.write(f'DBAR,,{temp_scale},,PSS-78,,ML/L,\n')
-            f.write(formatted_df.to_csv(index=False, header=False))
-            f.write('END_DATA')
-
-        print(f'Created CCHDO Exchange formatted file: {output_file}')
-        print('#######################################################################')
-        print()
-
-    return
+    odf_folder = Path(odf_folder)
+    files = sorted(odf_folder.glob(wildcard))
+    output_path = Path(odf_folder, 'Exchange_Format/')
+    output_path.mkdir(exist_ok=True)
+
+    max_workers = max_workers or os.process_cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(odf_file_to_exchange, file_name, output_path, section_id, operator_initials)
+            for file_name in files
+        ]
+        output_files = []
+        for file_name, future in zip(files, futures, strict=True):
+            output_file = future.result()
+            if output_file is not None:
+                print(f'Created CCHDO Exchange formatted file from {file_name.name}: {output_file}')
+                output_files.append(output_file)
+
+    if combine:
+        expocodes = sorted({output_file.name.split('_')[0] for output_file in output_files})
+        for expocode in expocodes:
+            zip_file = Path(output_path, f'{expocode}_ct1.zip')
+            with zipfile.ZipFile(zip_file, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                for output_file in output_files:
+                    if output_file.name.split('_')[0] == expocode:
+                        zf.write(output_file, arcname=output_file.name)
+            print(f'Created combined CCHDO Exchange archive: {zip_file}')
+
+    return output_files
 
 
 def main():
@@ -0,0 +1,340 @@
+import json
+import os
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from datashop_toolbox.odfhdr import OdfHeader
+from datashop_toolbox.sytm import parse_sytm
+
+# pyarrow is optional; it is only needed when exporting to Parquet/Arrow.
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Hive-style directory partitions used for every exported dataset.
+PARTITION_KEYS = ("cruise_number", "data_type")
+
+# Header fields copied into every row of the wide and long tables.
+METADATA_COLUMNS = {
+    "cruise_number": ("cruise_header", "cruise_number"),
+    "platform": ("cruise_header", "platform"),
+    "data_type": ("event_header", "data_type"),
+    "event_number": ("event_header", "event_number"),
+    "station_name": ("event_header", "station_name"),
+    "initial_latitude": ("event_header", "initial_latitude"),
+    "initial_longitude": ("event_header", "initial_longitude"),
+    "instrument_type": ("instrument_header", "instrument_type"),
+    "serial_number": ("instrument_header", "serial_number"),
+}
+
+
+def _require_pyarrow() -> None:
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required to export ODF files to Parquet or Arrow datasets.")
+
+
+def _header_value(odf: OdfHeader, header: str, field: str):
+    value = getattr(getattr(odf, header), field)
+    return value.strip("'") if isinstance(value, str) else value
+
+
+def odf_metadata(odf: OdfHeader, odf_filename: str) -> dict[bytes, bytes]:
+    """
+    Build the file-level key/value metadata stored in an exported table's schema.
+
+    The scalar fields of the cruise, event and instrument headers are stored
+    under "<header>.<field>" keys and the parameter headers are stored as a
+    JSON list under "parameter_headers".
+    """
+
+    metadata = {"odf_filename": odf_filename, "file_specification": odf.file_specification}
+    for header in ("cruise_header", "event_header", "instrument_header"):
+        for field, value in getattr(odf, header).model_dump().items():
+            if isinstance(value, str | int | float):
+                metadata[f"{header}.{field}"] = str(value).strip("'")
+    metadata["parameter_headers"] = json.dumps(
+        [
+            {"code": ph.code, "name": ph.name, "units": ph.units, "type": ph.type, "null_string": ph.null_string}
+            for ph in odf.parameter_headers
+        ]
+    )
+    return {key.encode(): value.encode() for key, value in metadata.items()}
+
+
+def _metadata_frame(odf: OdfHeader, odf_filename: str, nrows: int) -> dict[str, np.ndarray]:
+    columns = {"odf_filename": np.full(nrows, odf_filename, dtype=object)}
+    for column, (header, field) in METADATA_COLUMNS.items():
+        columns[column] = np.full(nrows, _header_value(odf, header, field))
+    return columns
+
+
+def odf_to_wide_table(odf: OdfHeader, odf_filename: str) -> "pa.Table":
+    """
+    Convert the data records of an ODF object into a wide Arrow table.
+
+    Parameters
+    ----------
+    odf: OdfHeader
+        The ODF object to be converted.
+    odf_filename: str
+        Name of the ODF file the object was read from.
+
+    Returns
+    -------
+    table: pyarrow.Table
+        One column per ODF parameter plus ROW_NUMBER and the header metadata
+        columns. SYTM columns are converted to timestamps and quality flag
+        columns to int8.
+    """
+
+    _require_pyarrow()
+
+    data = odf.data.data_frame
+    nrows = len(data)
+    columns = _metadata_frame(odf, odf_filename, nrows)
+    columns["ROW_NUMBER"] = np.arange(1, nrows + 1, dtype=np.int32)
+    for code in data.columns:
+        values = data[code].to_numpy()
+        if code.startswith("SYTM"):
+            values = parse_sytm(values.astype(str), errors="coerce")
+        elif code.startswith("Q") and code != "QCFF_01":
+            values = pd.to_numeric(data[code], errors="coerce").fillna(0).to_numpy(dtype=np.int8)
+        columns[code] = values
+
+    table = pa.table(columns)
+    return table.replace_schema_metadata(odf_metadata(odf, odf_filename))
+
+
+def odf_to_long_table(odf: OdfHeader, odf_filename: str) -> "pa.Table":
+    """
+    Convert the data records of an ODF object into a long Arrow table.
+
+    The layout mirrors the Oracle ODF_DATA table: one row per data value with
+    its parameter code, sensor number, row number, quality flag and sample
+    time. Quality flag, SYTM and FFFF columns are folded into the value rows
+    as they are when loading ODF_DATA.
+
+    Parameters
+    ----------
+    odf: OdfHeader
+        The ODF object to be converted.
+    odf_filename: str
+        Name of the ODF file the object was read from.
+
+    Returns
+    -------
+    table: pyarrow.Table
+        The long format table, with the header metadata columns appended.
+    """
+
+    _require_pyarrow()
+
+    data = odf.data.data_frame
+    nrows = len(data)
+    codes = list(data.columns)
+
+    sytm_codes = [code for code in codes if code.startswith("SYTM")]
+    if sytm_codes:
+        sample_time = parse_sytm(data[sytm_codes[0]].to_numpy().astype(str), errors="coerce")
+    else:
+        sample_time = np.full(nrows, np.datetime64("NaT", "ns"))
+
+    value_codes = [
+        code
+        for code in codes
+        if not (code.startswith("Q") and code != "QCFF_01") and not code.startswith(("SYTM", "FFFF"))
+    ]
+    nparams = len(value_codes)
+
+    values = np.empty((nparams, nrows), dtype=np.float64)
+    flags = np.zeros((nparams, nrows), dtype=np.int8)
+    for i, code in enumerate(value_codes):
+        values[i] = pd.to_numeric(data[code], errors="coerce").to_numpy(dtype=np.float64)
+        if f"Q{code}" in data.columns:
+            flags[i] = pd.to_numeric(data[f"Q{code}"], errors="coerce").fillna(0).to_numpy(dtype=np.int8)
+
+    sensor_numbers = np.array([int(code.partition("_")[2] or 1) for code in value_codes], dtype=np.int16)
+
+    columns = {
+        "PARAMETER_CODE": np.repeat(np.array(value_codes, dtype=object), nrows),
+        "SENSOR_NUMBER": np.repeat(sensor_numbers, nrows),
+        "ROW_NUMBER": np.tile(np.arange(1, nrows + 1, dtype=np.int32), nparams),
+        "PARAMETER_VALUE": values.ravel(),
+        "QUALITY_FLAG": flags.ravel(),
+        "SAMPLE_TIME": np.tile(sample_time, nparams),
+    }
+    for column, value in _metadata_frame(odf, odf_filename, nparams * nrows).items():
+        columns[column.upper()] = value
+
+    table = pa.table(columns)
+    return table.replace_schema_metadata(odf_metadata(odf, odf_filename))
+
+
+def _partition_path(table: "pa.Table", root: Path, case=str.lower) -> Path:
+    path = root
+    for key in PARTITION_KEYS:
+        name = case(key)
+        value = table.column(name)[0].as_py() if table.num_rows else ""
+        path = path / f"{name}={value or '__HIVE_DEFAULT_PARTITION__'}"
+    return path
+
+
+def _write_table(table: "pa.Table", path: Path, export_format: str, compression: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if export_format == "parquet":
+        pq.write_table(table, path, compression=compression)
+    else:
+        feather.write_feather(table, path, compression=compression)
+
+
+def write_odf_dataset(
+    odf: OdfHeader,
+    odf_filename: str,
+    output_folder: Path,
+    export_format: str = "parquet",
+    compression: str = "zstd",
+) -> dict:
+    """
+    Write one ODF object into the wide and long datasets under output_folder.
+
+    The tables are written to "wide/" and "long/" sub-folders, Hive-partitioned
+    by cruise number and data type. The partition columns are dropped from the
+    files themselves since readers restore them from the directory names.
+
+    Parameters
+    ----------
+    odf: OdfHeader
+        The ODF object to be exported.
+    odf_filename: str
+        Name of the ODF file the object was read from.
+    output_folder: Path
+        Root folder of the dataset.
+    export_format: str
+        Either "parquet" or "arrow" (Arrow IPC file format).
+    compression: str
+        Compression codec passed on to pyarrow.
+
+    Returns
+    -------
+    summary: dict
+        The file name, number of data rows and number of long format rows written.
+    """
+
+    _require_pyarrow()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'; expected one of {sorted(EXPORT_FORMATS)}.")
+
+    output_folder = Path(output_folder)
+    file_name = Path(odf_filename).stem + EXPORT_FORMATS[export_format]
+
+    wide = odf_to_wide_table(odf, odf_filename)
+    long = odf_to_long_table(odf, odf_filename)
+
+    wide_path = _partition_path(wide, output_folder / "wide") / file_name
+    long_path = _partition_path(long, output_folder / "long", case=str.upper) / file_name
+    _write_table(wide.drop_columns(list(PARTITION_KEYS)), wide_path, export_format, compression)
+    _write_table(
+        long.drop_columns([key.upper() for key in PARTITION_KEYS]), long_path, export_format, compression
+    )
+
+    return {"odf_filename": odf_filename, "data_rows": wide.num_rows, "long_rows": long.num_rows}
+
+
+def _export_file(odf_file: Path, output_folder: Path, export_format: str, compression: str) -> dict:
+    odf = OdfHeader()
+    odf.read_odf(str(odf_file))
+    return write_odf_dataset(odf, odf_file.name, output_folder, export_format, compression)
+
+
+def iter_export_odf_folder(
+    odf_folder: Path,
+    output_folder: Path,
+    wildcard: str = "*.ODF",
+    export_format: str = "parquet",
+    compression: str = "zstd",
+    max_workers: int | None = None,
+) -> Iterator[dict]:
+    """
+    Export a folder of ODF files to Parquet/Arrow datasets, yielding as files finish.
+
+    Files are read and written in worker processes, each worker writing its
+    own dataset fragments, so only a short summary is returned to the parent.
+    At most two files per worker are in flight at any time so memory use stays
+    bounded however many files the folder contains.
+
+    Parameters
+    ----------
+    odf_folder: Path
+        The folder containing the ODF files.
+    output_folder: Path
+        Root folder of the wide and long datasets.
+    wildcard: str
+        Glob pattern selecting the ODF files.
+    export_format: str
+        Either "parquet" or "arrow" (Arrow IPC file format).
+    compression: str
+        Compression codec passed on to pyarrow.
+    max_workers: int | None
+        Number of worker processes; defaults to the number of CPUs.
+
+    Yields
+    ------
+    summary: dict
+        One summary per exported file, in completion order.
+    """
+
+    _require_pyarrow()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'; expected one of {sorted(EXPORT_FORMATS)}.")
+
+    files = iter(sorted(Path(odf_folder).glob(wildcard)))
+    max_workers = max_workers or os.process_cpu_count() or 1
+    max_pending = 2 * max_workers
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for odf_file in files:
+            pending.add(executor.submit(_export_file, odf_file, Path(output_folder), export_format, compression))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def export_odf_folder(
+    odf_folder: Path,
+    output_folder: Path,
+    wildcard: str = "*.ODF",
+    export_format: str = "parquet",
+    compression: str = "zstd",
+    max_workers: int | None = None,
+) -> list[dict]:
+    """Export a folder of ODF files and return the per-file summaries."""
+
+    summaries = []
+    for summary in iter_export_odf_folder(odf_folder, output_folder, wildcard, export_format, compression, max_workers):
+        print(f"Exported {summary['odf_filename']}: {summary['data_rows']} rows")
+        summaries.append(summary)
+    return summaries
+
+
+def main():
+
+    odf_folder = Path.cwd()
+    export_odf_folder(odf_folder, odf_folder / "odf_dataset")
+
+
+if __name__ == "__main__":
+    main()
@@ -73,6 +73,7 @@ from PySide6.QtWidgets import (
 # datashop_toolbox imports – keep originals so existing callers are unaffected
 from datashop_toolbox.log_window import SafeConsoleFilter
 from datashop_toolbox.odfhdr import OdfHeader  # CTD ODF reader
+from datashop_toolbox.sytm import parse_sytm
 from datashop_toolbox.thermograph import ThermographHeader  # Thermograph ODF reader
 
 # Optional – thermograph tool needs the metadata-picker sub-window
@@ -1443,9 +1444,9 @@ def qc_thermograph_data(
             param_map[display] = (col, flag_col)
 
         try:
-            dt = pd.to_datetime(sytm, format="%d-%b-%Y %H:%M:%S.%f")
-        except Exception:
-            dt = pd.to_datetime(sytm, infer_datetime_format=True, errors="coerce")
+            dt = pd.DatetimeIndex(parse_sytm(orig_df["SYTM_01"].to_numpy()))
+        except ValueError:
+            dt = pd.to_datetime(sytm, errors="coerce")
 
         df = pd.DataFrame({"Temperature": temp}, index=dt)
         for display, (data_col, flag_col) in param_map.items():
@@ -0,0 +1,282 @@
+"""
+Vectorized codec for ODF SYTM date/time strings.
+
+SYTM values have the fixed layout ``DD-MON-YYYY HH:MM:SS.ff`` (e.g. ``'01-JUL-2017 10:45:19.00'``).
+Rather than calling ``datetime.strptime`` once per value, whole arrays are viewed as fixed-width
+character code matrices and decoded column by column with numpy. Month abbreviations are looked up
+in a fixed table so the result does not depend on the locale. The ODF null date (17-NOV-1858 00:00:00)
+decodes to NaT and NaT encodes back to it.
+
+This module must stay free of datashop_toolbox imports since basehdr and validated_base depend on it.
+"""
+
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+MONTHS: tuple[str, ...] = ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+
+SYTM_NULL_DATETIME: datetime = datetime(1858, 11, 17)
+SYTM_NULL_DATETIME64: np.datetime64 = np.datetime64("1858-11-17T00:00:00", "ns")
+
+# Byte layout of a SYTM string: separators, digit columns and the start of the fractional seconds.
+_SEPARATORS = ((2, ord("-")), (6, ord("-")), (11, ord(" ")), (14, ord(":")), (17, ord(":")), (20, ord(".")))
+_DIGIT_COLUMNS = np.array([0, 1, 7, 8, 9, 10, 12, 13, 15, 16, 18, 19])
+_FRACTION_START = 21
+_MAX_FRACTION_DIGITS = 9
+_MIN_WIDTH = _FRACTION_START + _MAX_FRACTION_DIGITS
+
+# Month abbreviations packed into 24-bit keys, sorted for searchsorted lookups.
+_MONTH_BYTES = np.frombuffer("".join(MONTHS).encode("ascii"), dtype=np.uint8).reshape(12, 3)
+_MONTH_KEYS = (_MONTH_BYTES.astype(np.int64) << np.array([16, 8, 0])).sum(axis=1)
+_MONTH_ORDER = np.argsort(_MONTH_KEYS)
+_MONTH_KEYS_SORTED = _MONTH_KEYS[_MONTH_ORDER]
+
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+_NS_PER_SECOND = 1_000_000_000
+_NS_PER_DAY = 86_400 * _NS_PER_SECOND
+_NAT = np.iinfo(np.int64).min
+_NULL_NS = SYTM_NULL_DATETIME64.astype(np.int64)
+
+# datetime64[ns] covers 1677-09-21 to 2262-04-11; only whole years inside that span are accepted.
+_MIN_YEAR = 1678
+_MAX_YEAR = 2261
+# Bounds of datetime64[ns], in microseconds so comparing any datetime64 unit with them does not overflow.
+_MIN_DATETIME64 = np.datetime64("1677-09-21T00:12:43.145225", "us")
+_MAX_DATETIME64 = np.datetime64("2262-04-11T23:47:16.854775", "us")
+
+
+def _days_from_civil(y: np.ndarray, m: np.ndarray, d: np.ndarray) -> np.ndarray:
+    """Days since 1970-01-01 for proleptic Gregorian dates (H. Hinnant's algorithm)."""
+    y = y - (m <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * ((m + 9) % 12) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _civil_from_days(days: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Inverse of _days_from_civil: (year, month, day) for days since 1970-01-01."""
+    z = days + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    d = doy - (153 * mp + 2) // 5 + 1
+    m = np.where(mp < 10, mp + 3, mp - 9)
+    y = yoe + era * 400 + (m <= 2)
+    return y, m, d
+
+
+def _to_codes(values: Any) -> tuple[np.ndarray, np.ndarray]:
+    """Return an (n x width) uint8 character matrix and the stripped length of every value."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == "O":
+        arr = np.where(np.asarray(pd.isna(arr), dtype=bool), "", arr).astype(str)
+    elif arr.dtype.kind == "S":
+        arr = arr.astype(str)
+    if arr.dtype.kind != "U":
+        raise TypeError(f"SYTM values must be strings, got dtype {arr.dtype}")
+    arr = np.strings.strip(arr.ravel(), "' ")
+
+    # Pad single digit days ('1-JAN-2020') so every value shares the same layout.
+    short_day = np.strings.find(arr, "-") == 1
+    if short_day.any():
+        arr = np.where(short_day, np.strings.add("0", arr), arr)
+
+    # A unicode array is a fixed-width block of UCS4 code points, so it can be read as integers directly.
+    # Longer values are cut to the SYTM width here but still rejected through their length.
+    # Anything outside ASCII is invalid in SYTM and is folded onto DEL (127) before narrowing to uint8.
+    codes = arr.astype(f"U{_MIN_WIDTH}").view(np.uint32).reshape(arr.size, _MIN_WIDTH)
+    return np.minimum(codes, 127).astype(np.uint8), np.strings.str_len(arr)
+
+
+def _decode(values: Any) -> tuple[np.ndarray, np.ndarray, np.ndarray, tuple[int, ...]]:
+    """Decode SYTM strings into int64 nanoseconds; return (ns, valid, missing, shape)."""
+    shape = np.shape(values)
+    u, length = _to_codes(values)
+    missing = length == 0
+
+    valid = np.ones(u.shape[0], dtype=bool)
+    for col, char in _SEPARATORS:
+        valid &= u[:, col] == char
+
+    # uint8 subtraction wraps characters below '0' to large values, so one comparison checks for digits.
+    digits = u[:, _DIGIT_COLUMNS] - np.uint8(ord("0"))
+    valid &= (digits <= 9).all(axis=1)
+    digits = digits.astype(np.int64)
+    day = digits[:, 0] * 10 + digits[:, 1]
+    year = digits[:, 2] * 1000 + digits[:, 3] * 100 + digits[:, 4] * 10 + digits[:, 5]
+    hour = digits[:, 6] * 10 + digits[:, 7]
+    minute = digits[:, 8] * 10 + digits[:, 9]
+    second = digits[:, 10] * 10 + digits[:, 11]
+
+    # Clearing bit 0x20 upper-cases ASCII letters, making the month lookup case-insensitive.
+    letters = (u[:, 3:6] & np.uint8(0xDF)).astype(np.int64)
+    key = (letters[:, 0] << 16) | (letters[:, 1] << 8) | letters[:, 2]
+    pos = np.minimum(np.searchsorted(_MONTH_KEYS_SORTED, key), 11)
+    valid &= _MONTH_KEYS_SORTED[pos] == key
+    month = _MONTH_ORDER[pos] + 1
+
+    # Fractional seconds: 1 to 9 digits that run to the end of the string.
+    fraction_digits = u[:, _FRACTION_START:_MIN_WIDTH] - np.uint8(ord("0"))
+    is_digit = fraction_digits <= 9
+    n_digits = np.where(is_digit.all(axis=1), _MAX_FRACTION_DIGITS, np.argmin(is_digit, axis=1))
+    valid &= (n_digits >= 1) & (length == _FRACTION_START + n_digits)
+    fraction_digits[~is_digit] = 0
+    fraction = fraction_digits @ (10 ** np.arange(_MAX_FRACTION_DIGITS - 1, -1, -1, dtype=np.int64))
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days_in_month = _DAYS_IN_MONTH[month - 1] + ((month == 2) & leap)
+    valid &= (year >= _MIN_YEAR) & (year <= _MAX_YEAR)
+    valid &= (day >= 1) & (day <= days_in_month)
+    valid &= (hour < 24) & (minute < 60) & (second < 60)
+
+    seconds = ((_days_from_civil(year, month, day) * 24 + hour) * 60 + minute) * 60 + second
+    ns = np.where(valid, seconds * _NS_PER_SECOND + fraction, _NAT)
+    return ns, valid & ~missing, missing, shape
+
+
+def parse_sytm(values: Any, errors: str = "raise") -> np.ndarray | np.datetime64:
+    """
+    Convert SYTM strings to datetime64[ns] values.
+
+    Parameters
+    ----------
+    values: str or array-like of str
+        SYTM strings; surrounding single quotes and spaces are ignored and month
+        abbreviations are case-insensitive.
+    errors: str
+        "raise" to raise a ValueError for strings that are not in the SYTM format,
+        or "coerce" to return NaT for them.
+
+    Returns
+    -------
+    numpy.ndarray or numpy.datetime64
+        datetime64[ns] values with the same shape as the input. Empty strings, None
+        and the ODF null date (17-NOV-1858 00:00:00) are returned as NaT.
+    """
+    if errors not in ("raise", "coerce"):
+        raise ValueError(f"errors must be 'raise' or 'coerce', got {errors!r}")
+
+    ns, valid, missing, shape = _decode(values)
+    bad = ~valid & ~missing
+    if errors == "raise" and bad.any():
+        first = np.asarray(values).ravel()[np.argmax(bad)]
+        raise ValueError(f"Invalid date format: {first}. Expected %d-%b-%Y %H:%M:%S.%f")
+
+    ns = np.where(valid & (ns != _NULL_NS), ns, _NAT)
+    result = ns.view("datetime64[ns]").reshape(shape)
+    return result[()] if result.ndim == 0 else result
+
+
+def is_sytm(values: Any) -> np.ndarray | bool:
+    """Return True where a value is a well-formed SYTM string (the ODF null date included)."""
+    _, valid, _, shape = _decode(values)
+    result = valid.reshape(shape)
+    return bool(result) if result.ndim == 0 else result
+
+
+def _to_ns(values: Any) -> tuple[np.ndarray, tuple[int, ...]]:
+    """Return int64 nanoseconds and the original shape for datetime-like input."""
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = pd.to_datetime(values)
+        if getattr(values.dtype, "tz", None) is not None:
+            values = values.dt.tz_localize(None) if isinstance(values, pd.Series) else values.tz_localize(None)
+    elif isinstance(values, pd.Timestamp) and values.tzinfo is not None:
+        values = values.tz_localize(None)
+    elif isinstance(values, datetime) and values.tzinfo is not None:
+        values = values.replace(tzinfo=None)
+    arr = np.asarray(values, dtype="datetime64")
+    # Casting to nanoseconds wraps around silently outside the datetime64[ns] range
+    outside = (arr < _MIN_DATETIME64) | (arr > _MAX_DATETIME64)
+    if outside.any():
+        first = arr.ravel()[np.argmax(outside.ravel())]
+        raise ValueError(f"Date out of the supported range ({_MIN_DATETIME64} to {_MAX_DATETIME64}): {first}")
+    ns = arr.astype("datetime64[ns]")
+    return ns.ravel().view(np.int64), ns.shape
+
+
+def format_sytm(values: Any, digits: int = 2, quote: bool = False) -> np.ndarray | str:
+    """
+    Convert datetime values to upper-case SYTM strings.
+
+    Parameters
+    ----------
+    values: datetime-like or array-like of datetime-like
+        datetime64 arrays, pandas Series/DatetimeIndex, datetime objects or None.
+    digits: int
+        Number of fractional second digits to keep (truncated, as in ODF files).
+    quote: bool
+        Enclose each string in single quotes as written in ODF data records.
+
+    Returns
+    -------
+    numpy.ndarray or str
+        SYTM strings with the same shape as the input; NaT and None are returned
+        as the ODF null date.
+
+    Raises
+    ------
+    ValueError
+        If a date is outside the datetime64[ns] range (1677-09-21 to 2262-04-11).
+    """
+    if not 0 <= digits <= _MAX_FRACTION_DIGITS:
+        raise ValueError(f"digits must be between 0 and {_MAX_FRACTION_DIGITS}, got {digits}")
+
+    ns, shape = _to_ns(values)
+    ns = np.where(ns == _NAT, _NULL_NS, ns)
+    days, rem = np.divmod(ns, _NS_PER_DAY)
+    year, month, day = _civil_from_days(days)
+    seconds, fraction = np.divmod(rem, _NS_PER_SECOND)
+    hour, seconds = np.divmod(seconds, 3600)
+    minute, second = np.divmod(seconds, 60)
+
+    offset = int(quote)
+    body = 20 + (digits + 1 if digits else 0)
+    width = body + 2 * offset
+    out = np.empty((ns.size, width), dtype=np.uint8)
+    if quote:
+        out[:, 0] = out[:, -1] = ord("'")
+
+    def put(column: int, value: np.ndarray, n: int) -> None:
+        for k in range(n - 1, -1, -1):
+            value, digit = np.divmod(value, 10)
+            out[:, offset + column + k] = digit + ord("0")
+
+    put(0, day, 2)
+    out[:, offset + 3 : offset + 6] = _MONTH_BYTES[month - 1]
+    put(7, year, 4)
+    put(12, hour, 2)
+    put(15, minute, 2)
+    put(18, second, 2)
+    for col, char in _SEPARATORS[:5]:
+        out[:, offset + col] = char
+    if digits:
+        out[:, offset + 20] = ord(".")
+        put(21, fraction // 10 ** (_MAX_FRACTION_DIGITS - digits), digits)
+
+    result = out.view(f"S{width}").ravel().astype(f"U{width}").reshape(shape)
+    return str(result[()]) if result.ndim == 0 else result
+
+
+def normalize_sytm(value: str) -> str:
+    """Validate a single SYTM string and return it in the canonical two-digit, upper-case form."""
+    return format_sytm(parse_sytm(value))
+
+
+def main():
+
+    sytm = np.array(["01-JUL-2017 10:45:19.00", "'17-NOV-1858 00:00:00.000000'", "29-feb-2024 23:59:59.999"])
+    dt = parse_sytm(sytm)
+    print(dt)
+    print(format_sytm(dt))
+    print(is_sytm(["01-JUL-2017 10:45:19.00", "2017-07-01 10:45:19"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ from datashop_toolbox.lookup_parameter import lookup_parameter
 from datashop_toolbox.odfhdr import OdfHeader
 from datashop_toolbox.parameterhdr import ParameterHeader
 from datashop_toolbox.qualityhdr import QualityHeader
+from datashop_toolbox.sytm import format_sytm
 from datashop_toolbox.validated_base import get_current_date_time
 
 
@@ -150,24 +151,17 @@ class ThermographHeader(OdfHeader):
     def create_sytm(self, df: pd.DataFrame) -> pd.DataFrame:
         """ Updated the data frame with the proper SYTM column. """
         if 'date_time' in df.columns:
-            df['sytm'] = df['date_time'].map(lambda x: datetime.strftime(x, BaseHeader.SYTM_FORMAT)).str.upper()
+            df['sytm'] = format_sytm(df['date_time'], quote=True)
             df = df.drop('date_time', axis=1)
-            df['sytm'] = df['sytm'].str[:-4]
-            df['sytm'] = df['sytm'].map(lambda x: "'" + str(x) + "'")
         else:
-            df['dates'] = df['date'].map(lambda x: datetime.strptime(x, ThermographHeader.date_format).date())
-            df['dates'] = df['dates'].astype("string")
-            df['times'] = df['time'].map(lambda x: datetime.strptime(x, ThermographHeader.time_format).time())
-            df['times'] = df['times'].astype("string")
-            df['datetimes'] = df['dates'] + ' ' + df['times']
-            cols_to_drop = ['date', 'time', 'dates', 'times']
+            datetimes = pd.to_datetime(
+                df['date'].astype(str) + ' ' + df['time'].astype(str),
+                format=f"{ThermographHeader.date_format} {ThermographHeader.time_format}",
+            )
+            cols_to_drop = ['date', 'time']
             df.columns = df.columns.str.strip().str.lower()
             df = df.drop(columns=[c for c in cols_to_drop if c in df.columns])
-            df['datetimes'] = pd.to_datetime(df['datetimes'])
-            df['sytm'] = df['datetimes'].map(lambda x: datetime.strftime(x, BaseHeader.SYTM_FORMAT)).str.upper()
-            df = df.drop('datetimes', axis=1)
-            df['sytm'] = df['sytm'].str[:-4]
-            df['sytm'] = df['sytm'].map(lambda x: "'" + str(x) + "'")
+            df['sytm'] = format_sytm(datetimes, quote=True)
         return df
     
 
@@ -10,6 +10,7 @@ import pandas as pd
 from pydantic import BaseModel, ValidationInfo, field_validator
 
 from datashop_toolbox.basehdr import BaseHeader
+from datashop_toolbox.sytm import normalize_sytm
 
 
 class ValidatedBase(BaseModel):
@@ -55,8 +56,7 @@ class ValidatedBase(BaseModel):
         # Only validate if the field is a string and looks like a date
         if isinstance(v, str) and annotation is str and "date" in info.field_name.lower():
             try:
-                dt = datetime.strptime(v, BaseHeader.SYTM_FORMAT)
-                return dt.strftime(BaseHeader.SYTM_FORMAT)[:-4].upper()
+                return normalize_sytm(v)
             except ValueError as err:
                 raise ValueError(
                     f"Invalid date format for {info.field_name}: {v}. "
@@ -95,8 +95,7 @@ def check_datetime(value: str | None) -> str:
     if value is None or value == "":
         return BaseHeader.SYTM_NULL_VALUE
     try:
-        dt = datetime.strptime(value, BaseHeader.SYTM_FORMAT)
-        return datetime.strftime(dt, BaseHeader.SYTM_FORMAT)[:-4].upper()
+        return normalize_sytm(value)
     except ValueError as err:
         raise ValueError(f"Invalid date format: {value}. Expected {BaseHeader.SYTM_FORMAT}") from err
 
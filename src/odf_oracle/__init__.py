@@ -6,6 +6,7 @@ from odf_oracle.fix_null import fix_null
 from odf_oracle.general_cal_comments_to_oracle import general_cal_comments_to_oracle
 from odf_oracle.general_cal_equation_to_oracle import general_cal_equation_to_oracle
 from odf_oracle.general_cal_to_oracle import general_cal_to_oracle
+from odf_oracle.header_write_plan import CountingConnection, HeaderWritePlan
 from odf_oracle.history_to_oracle import history_to_oracle
 from odf_oracle.instrument_to_oracle import instrument_to_oracle
 from odf_oracle.meteo_comments_to_oracle import meteo_comments_to_oracle
@@ -15,9 +16,11 @@ from odf_oracle.polynomial_cal_to_oracle import polynomial_cal_to_oracle
 from odf_oracle.quality_comments_to_oracle import quality_comments_to_oracle
 from odf_oracle.quality_tests_to_oracle import quality_tests_to_oracle
 from odf_oracle.quality_to_oracle import quality_to_oracle
-from odf_oracle.sytm_to_timestamp import sytm_to_timestamp
+from odf_oracle.sytm_to_timestamp import sytm_to_timestamp, sytm_to_timestamps
 
 __all__ = [
+    "CountingConnection",
+    "HeaderWritePlan",
     "compass_cal_to_oracle",
     "cruise_event_to_oracle",
     "data_to_oracle",
@@ -36,4 +39,5 @@ __all__ = [
     "quality_comments_to_oracle",
     "quality_tests_to_oracle",
     "sytm_to_timestamp",
+    "sytm_to_timestamps",
 ]
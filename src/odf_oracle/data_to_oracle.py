@@ -1,6 +1,6 @@
 from datashop_toolbox.odfhdr import OdfHeader
 from datashop_toolbox.remove_parameter import remove_parameter
-from odf_oracle.sytm_to_timestamp import sytm_to_timestamp
+from odf_oracle.sytm_to_timestamp import sytm_to_timestamps
 
 
 def data_to_oracle(odfobj: OdfHeader, connection, infile: str):
@@ -53,6 +53,10 @@ def data_to_oracle(odfobj: OdfHeader, connection, infile: str):
         # Get the number of data rows and columns.
         nrows, ncols = data.shape
 
+        # Convert the whole SYTM column to timestamps once rather than once per parameter and row.
+        if sytm_present:
+            sample_times = sytm_to_timestamps(data.iloc[:, sytm_index].to_numpy())
+
         null_params = list()
 
         # Cycle through all the parameter headers.
@@ -96,13 +100,7 @@ def data_to_oracle(odfobj: OdfHeader, connection, infile: str):
                 # If there is a SYTM parameter column then add the appropriate
                 # TIMESTAMP to each data record; otherwise assign it as None.
                 if sytm_present:
-                    # NUMPY arrays containing the SYTM character arrays enclose
-                    # them with single quotes; therefore the single quotes
-                    # must be removed prior to converting the date/time to a
-                    # Python timestamp.
-                    sample_time = sytm_to_timestamp(
-                        data.loc[r].iloc[sytm_index].strip("'"), "datetime"
-                    )
+                    sample_time = sample_times[r]
                 else:
                     sample_time = None
 
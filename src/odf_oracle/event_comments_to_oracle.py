@@ -1,7 +1,12 @@
 from datashop_toolbox.odfhdr import OdfHeader
+from odf_oracle.header_write_plan import HeaderWritePlan
 
+EVENT_COMMENTS_INSERT = "INSERT INTO ODF_EVENT_COMMENTS (EVENT_COMMENTS, ODF_FILENAME) VALUES (:1, :2)"
 
-def event_comments_to_oracle(odfobj: OdfHeader, connection, infile: str) -> None:
+
+def event_comments_to_oracle(
+    odfobj: OdfHeader, connection, infile: str, plan: HeaderWritePlan | None = None
+) -> None:
     """
     Load the ODF object's event header comments into Oracle.
 
@@ -13,35 +18,26 @@ def event_comments_to_oracle(odfobj: OdfHeader, connection, infile: str) -> None
         Oracle database connection object.
     infile: str
         ODF file currently being loaded into the database.
+    plan: HeaderWritePlan, optional
+        Per-file write plan to add the rows to. When omitted the rows are
+        written and committed immediately.
 
     Returns
     -------
     None
     """
 
-    # Create a cursor to the open connection.
-    with connection.cursor() as cursor:
-        # Get the Event_Comments.
-        event_comments = odfobj.event_header.event_comments
-
-        if type(event_comments) is list:
-            # Loop through the Event_Comments.
-            for event_comment in event_comments:
-                # Execute the Insert SQL statement.
-                cursor.execute(
-                    "INSERT INTO ODF_EVENT_COMMENTS (EVENT_COMMENTS, "
-                    "ODF_FILENAME) VALUES (:comments, :filename)",
-                    {"comments": event_comment, "filename": infile},
-                )
-                connection.commit()
-
-        elif type(event_comments) is str:
-            # Execute the Insert SQL statement.
-            cursor.execute(
-                "INSERT INTO ODF_EVENT_COMMENTS (EVENT_COMMENTS, "
-                "ODF_FILENAME) VALUES (:comments, :filename)",
-                {"comments": event_comments, "filename": infile},
-            )
-            connection.commit()
-
-        print("Event_Header.Event_Comments successfully loaded into Oracle.")
+    local_plan = plan is None
+    if local_plan:
+        plan = HeaderWritePlan()
+
+    # Get the Event_Comments.
+    event_comments = odfobj.event_header.event_comments
+    if isinstance(event_comments, str):
+        event_comments = [event_comments]
+    plan.add(EVENT_COMMENTS_INSERT, ((event_comment, infile) for event_comment in event_comments))
+
+    if local_plan:
+        plan.flush(connection)
+
+    print("Event_Header.Event_Comments successfully loaded into Oracle.")
@@ -1,8 +1,18 @@
 from datashop_toolbox.generalhdr import GeneralCalHeader
+from odf_oracle.header_write_plan import HeaderWritePlan
+
+GENERAL_CAL_COMMENTS_INSERT = (
+    "INSERT INTO ODF_GENERAL_CAL_COMMENTS (GENERAL_CAL_HEADER_NUMBER, CALIBRATION_COMMENT_NUMBER, "
+    "CALIBRATION_COMMENT, ODF_FILENAME) VALUES (:1, :2, :3, :4)"
+)
 
 
 def general_cal_comments_to_oracle(
-    general_cal_header: GeneralCalHeader, connection, gg: int, filename: str
+    general_cal_header: GeneralCalHeader,
+    connection,
+    gg: int,
+    filename: str,
+    plan: HeaderWritePlan | None = None,
 ) -> None:
     """
     Load comments from a GENERAL_CAL_Header into Oracle.
@@ -16,54 +26,30 @@ def general_cal_comments_to_oracle(
         ODF file.
     filename: str
         The ODF file name.
+    plan: HeaderWritePlan, optional
+        Per-file write plan to add the rows to. When omitted the rows are
+        written and committed immediately.
 
     Returns
     -------
     None
     """
 
-    # Create a cursor to the open connection.
-    with connection.cursor() as cursor:
-        # Loop through the General_Cal_Header.General_Cal_Equation.
-        calibration_comments = general_cal_header.calibration_comments
-
-        # Check to see if the GENERAL_CAL_HEADER contains any CALIBRATION_COMMENTS.
-        if calibration_comments is None:
-            print("No General_Cal_Header.Calibration_Comments were present to load into Oracle.")
-
-        elif type(calibration_comments) is list:
-            for comment_number, calibration_comment in enumerate(calibration_comments):
-                # Execute the Insert SQL statement.
-                cursor.execute(
-                    "INSERT INTO ODF_GENERAL_CAL_COMMENTS "
-                    "(GENERAL_CAL_HEADER_NUMBER, CALIBRATION_COMMENT_NUMBER, "
-                    "CALIBRATION_COMMENT, ODF_FILENAME)"
-                    " VALUES (:calibration_comments_no, :comment_no, "
-                    ":comments, :fname)",
-                    {
-                        "calibration_comments_no": gg,
-                        "comment_no": comment_number,
-                        "comments": calibration_comment,
-                        "fname": filename,
-                    },
-                )
+    # Check to see if the GENERAL_CAL_HEADER contains any CALIBRATION_COMMENTS.
+    calibration_comments = general_cal_header.calibration_comments
+    if not calibration_comments:
+        print("No General_Cal_Header.Calibration_Comments were present to load into Oracle.")
+        return
 
-                connection.commit()
+    local_plan = plan is None
+    if local_plan:
+        plan = HeaderWritePlan()
 
-        elif type(calibration_comments) is str:
-            # Execute the Insert SQL statement.
-            cursor.execute(
-                "INSERT INTO ODF_GENERAL_CAL_COMMENTS "
-                "(GENERAL_CAL_HEADER_NUMBER, CALIBRATION_COMMENT_NUMBER, "
-                "CALIBRATION_COMMENT, ODF_FILENAME) "
-                "VALUES (:calibration_comments_no, :comment_no, "
-                ":comments, :fname)",
-                {
-                    "calibration_comments_no": gg,
-                    "comment_no": 1,
-                    "comments": calibration_comments,
-                    "fname": filename,
-                },
-            )
+    if isinstance(calibration_comments, str):
+        rows = [(gg, 1, calibration_comments, filename)]
+    else:
+        rows = [(gg, c, comment, filename) for c, comment in enumerate(calibration_comments)]
+    plan.add(GENERAL_CAL_COMMENTS_INSERT, rows)
 
-            connection.commit()
+    if local_plan:
+        plan.flush(connection)
@@ -1,8 +1,18 @@
 from datashop_toolbox.generalhdr import GeneralCalHeader
+from odf_oracle.header_write_plan import HeaderWritePlan
+
+GENERAL_CAL_EQUATION_INSERT = (
+    "INSERT INTO ODF_GENERAL_CAL_EQUATION (GENERAL_CAL_HEADER_NUMBER, CALIBRATION_EQUATION_NUMBER, "
+    "CALIBRATION_EQUATION, ODF_FILENAME) VALUES (:1, :2, :3, :4)"
+)
 
 
 def general_cal_equation_to_oracle(
-    general_cal_header: GeneralCalHeader, connection, gg: int, filename: str
+    general_cal_header: GeneralCalHeader,
+    connection,
+    gg: int,
+    filename: str,
+    plan: HeaderWritePlan | None = None,
 ) -> None:
     """
     Load a GENERAL_CAL_Header equation into Oracle.
@@ -16,34 +26,26 @@ def general_cal_equation_to_oracle(
         ODF file.
     filename: str
         The ODF file name.
+    plan: HeaderWritePlan, optional
+        Per-file write plan to add the rows to. When omitted the rows are
+        written and committed immediately.
 
     Returns
     -------
     None
     """
 
-    # Create a cursor to the open connection.
-    with connection.cursor() as cursor:
-        # Loop through the General_Cal_Header.General_Cal_Equation.
-        calibration_equation = general_cal_header.calibration_equation
-
-        # Check to see if the GENERAL_CAL_HEADER contains any CALIBRATION_EQUATION(s).
-        if calibration_equation is None:
-            print("No General_Cal_Header.Calibration_Equation was present to load into Oracle.")
-
-        elif type(calibration_equation) is str:
-            # Execute the Insert SQL statement.
-            cursor.execute(
-                "INSERT INTO ODF_GENERAL_CAL_EQUATION "
-                "(GENERAL_CAL_HEADER_NUMBER, CALIBRATION_EQUATION_NUMBER, "
-                "CALIBRATION_EQUATION, ODF_FILENAME) "
-                "VALUES (:cc_no, :equation_no, :equation, :fname)",
-                {
-                    "cc_no": gg,
-                    "equation_no": 1,
-                    "equation": calibration_equation,
-                    "fname": filename,
-                },
-            )
-
-            connection.commit()
+    # Check to see if the GENERAL_CAL_HEADER contains any CALIBRATION_EQUATION(s).
+    calibration_equation = general_cal_header.calibration_equation
+    if not calibration_equation:
+        print("No General_Cal_Header.Calibration_Equation was present to load into Oracle.")
+        return
+
+    local_plan = plan is None
+    if local_plan:
+        plan = HeaderWritePlan()
+
+    plan.add(GENERAL_CAL_EQUATION_INSERT, [(gg, 1, calibration_equation, filename)])
+
+    if local_plan:
+        plan.flush(connection)
@@ -0,0 +1,118 @@
+from collections import Counter
+from collections.abc import Iterable
+
+
+class HeaderWritePlan:
+    """
+    Collect the rows destined for the ODF header child tables of one file.
+
+    The header loaders (history, comments, quality tests and calibrations) add
+    their rows to a plan instead of executing one statement per header item.
+    `flush` then sends every table's rows with a single `executemany` and
+    commits them as one transaction.
+    """
+
+    def __init__(self) -> None:
+        self.rows: dict[str, list[tuple]] = {}
+
+    def add(self, statement: str, rows: Iterable[tuple]) -> None:
+        """Queue rows for an INSERT statement using positional binds."""
+        self.rows.setdefault(statement, []).extend(rows)
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.rows.values())
+
+    def flush(self, connection) -> int:
+        """
+        Write all queued rows in one transaction and empty the plan.
+
+        Parameters
+        ----------
+        connection: oracledb connection
+            Oracle database connection object.
+
+        Returns
+        -------
+        nrows: int
+            The number of rows written.
+        """
+
+        nrows = len(self)
+        if nrows == 0:
+            return 0
+
+        with connection.cursor() as cursor:
+            try:
+                for statement, rows in self.rows.items():
+                    if rows:
+                        cursor.executemany(statement, rows)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+        self.rows.clear()
+        return nrows
+
+
+class CountingConnection:
+    """
+    Wrap an oracledb connection and count the round trips made through it.
+
+    Statement executions, batch executions, commits and rollbacks are tallied
+    in `round_trips`; everything else is passed through to the wrapped
+    connection.
+    """
+
+    def __init__(self, connection) -> None:
+        self.connection = connection
+        self.round_trips: Counter = Counter()
+
+    def __getattr__(self, name: str):
+        return getattr(self.connection, name)
+
+    def cursor(self, *args, **kwargs) -> "_CountingCursor":
+        return _CountingCursor(self.connection.cursor(*args, **kwargs), self.round_trips)
+
+    def commit(self) -> None:
+        self.round_trips["commit"] += 1
+        self.connection.commit()
+
+    def rollback(self) -> None:
+        self.round_trips["rollback"] += 1
+        self.connection.rollback()
+
+    def total_round_trips(self) -> int:
+        return self.round_trips.total()
+
+    def reset_round_trips(self) -> None:
+        self.round_trips.clear()
+
+
+class _CountingCursor:
+    """Cursor proxy used by CountingConnection."""
+
+    def __init__(self, cursor, round_trips: Counter) -> None:
+        self._cursor = cursor
+        self._round_trips = round_trips
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+    def __enter__(self) -> "_CountingCursor":
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._cursor.__exit__(*exc_info)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, *args, **kwargs):
+        self._round_trips["execute"] += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._round_trips["executemany"] += 1
+        return self._cursor.executemany(*args, **kwargs)
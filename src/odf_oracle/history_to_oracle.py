@@ -1,8 +1,14 @@
 from datashop_toolbox.odfhdr import OdfHeader
+from odf_oracle.header_write_plan import HeaderWritePlan
 from odf_oracle.sytm_to_timestamp import sytm_to_timestamp
 
+HISTORY_INSERT = (
+    "INSERT INTO ODF_HISTORY (HIST_NUM, CREATION_DATE, PROCESS, ODF_FILENAME) "
+    "VALUES (:1, :2, :3, :4)"
+)
 
-def history_to_oracle(odfobj: OdfHeader, connection, infile: str):
+
+def history_to_oracle(odfobj: OdfHeader, connection, infile: str, plan: HeaderWritePlan | None = None):
     """
     Load the ODF object's history header metadata into Oracle.
 
@@ -14,6 +20,9 @@ def history_to_oracle(odfobj: OdfHeader, connection, infile: str):
         Oracle database connection object.
     infile: str
         ODF file currently being loaded into the database.
+    plan: HeaderWritePlan, optional
+        Per-file write plan to add the rows to. When omitted the rows are
+        written and committed immediately.
 
     Returns
     -------
@@ -23,49 +32,29 @@ def history_to_oracle(odfobj: OdfHeader, connection, infile: str):
     # Check to see if the ODF structure contains a History_Header.
     if not odfobj.history_headers:
         print("No History_Header was present to load into Oracle.")
-
-    else:
-        # Create a cursor to the open connection.
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "ALTER SESSION SET NLS_DATE_FORMAT = 'YYYY-MM-DD HH24:MI:SS'"
-                " NLS_TIMESTAMP_FORMAT = 'YYYY-MM-DD HH24:MI:SS.FF'"
-            )
-
-            # Loop through the HISTORY_HEADERs.
-            for h, history_header in enumerate(odfobj.history_headers):
-                # Loop through the HISTORY_HEADER's PROCESS lines.
-                process_list = history_header.processes
-                cdt = history_header.creation_date
-                cdate = sytm_to_timestamp(cdt, "datetime")
-                hp = []
-                if type(process_list) is list:
-                    for p in process_list:
-                        hp.append((h, cdate, p, infile))
-
-                    # Execute the Insert SQL statement and commit to the database.
-                    cursor.prepare(
-                        "INSERT INTO ODF_HISTORY (HIST_NUM, CREATION_DATE, "
-                        "PROCESS, ODF_FILENAME) VALUES (:1, :2, :3, :4)"
-                    )
-                    cursor.executemany(None, hp)
-                    connection.commit()
-
-                elif type(process_list) is str:
-                    # Execute the Insert SQL statement.
-                    cursor.execute(
-                        "INSERT INTO ODF_HISTORY (HIST_NUM, CREATION_DATE, "
-                        "PROCESS, ODF_FILENAME) VALUES (:hist_num, "
-                        ":creation_date, :process, :filename)",
-                        {
-                            "hist_num": h,
-                            "creation_date": cdate,
-                            "process": process_list,
-                            "filename": infile,
-                        },
-                    )
-
-                    # Commit the changes to the database.
-                    connection.commit()
-
-            print("History_Headers successfully loaded into Oracle.")
+        return
+
+    # The session formats apply to the queued inserts too, since they are
+    # written through the same connection.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "ALTER SESSION SET NLS_DATE_FORMAT = 'YYYY-MM-DD HH24:MI:SS'"
+            " NLS_TIMESTAMP_FORMAT = 'YYYY-MM-DD HH24:MI:SS.FF'"
+        )
+
+    local_plan = plan is None
+    if local_plan:
+        plan = HeaderWritePlan()
+
+    # Loop through the HISTORY_HEADERs and their PROCESS lines.
+    for h, history_header in enumerate(odfobj.history_headers):
+        cdate = sytm_to_timestamp(history_header.creation_date, "datetime")
+        processes = history_header.processes
+        if isinstance(processes, str):
+            processes = [processes]
+        plan.add(HISTORY_INSERT, ((h, cdate, process, infile) for process in processes))
+
+    if local_plan:
+        plan.flush(connection)
+
+    print("History_Headers successfully loaded into Oracle.")
@@ -1,7 +1,12 @@
 from datashop_toolbox.odfhdr import OdfHeader
+from odf_oracle.header_write_plan import HeaderWritePlan
 
+METEO_COMMENTS_INSERT = (
+    "INSERT INTO ODF_METEO_COMMENTS (METEO_COMMENT_NUMBER, METEO_COMMENT, ODF_FILENAME) VALUES (:1, :2, :3)"
+)
 
-def meteo_comments_to_oracle(odfobj: OdfHeader, connection, infile):
+
+def meteo_comments_to_oracle(odfobj: OdfHeader, connection, infile, plan: HeaderWritePlan | None = None):
     """
     Load the meteo header comments into Oracle.
 
@@ -13,6 +18,9 @@ def meteo_comments_to_oracle(odfobj: OdfHeader, connection, infile):
         Oracle database connection object.
     infile: str
         ODF file currently being loaded into the database.
+    plan: HeaderWritePlan, optional
+        Per-file write plan to add the rows to. When omitted the rows are
+        written and committed immediately.
 
     Returns
     -------
@@ -22,32 +30,21 @@ def meteo_comments_to_oracle(odfobj: OdfHeader, connection, infile):
     # Check to see if the ODF object contains an METEO_HEADER.
     if odfobj.meteo_header is None:
         print("No METEO_HEADER Comments to load into Oracle.")
+        return
+
+    local_plan = plan is None
+    if local_plan:
+        plan = HeaderWritePlan()
 
+    # Loop through the Meteo_Header.Meteo_Comments.
+    meteo_comments = odfobj.meteo_header.meteo_comments
+    if isinstance(meteo_comments, str):
+        rows = [(1, meteo_comments.strip("'"), infile)]
     else:
-        # Create a cursor to the open connection.
-        with connection.cursor() as cursor:
-            # Loop through the Meteo_Header.Meteo_Comments.
-            meteo_comments = odfobj.meteo_header.meteo_comments
-
-            if type(meteo_comments) is list:
-                for j, meteo_comment in enumerate(meteo_comments):
-                    # Execute the Insert SQL statement.
-                    cursor.execute(
-                        "INSERT INTO ODF_METEO_COMMENTS (METEO_COMMENT_NUMBER, "
-                        "METEO_COMMENT, ODF_FILENAME) "
-                        "VALUES (:comment_no, :comments, :filename)",
-                        {"comment_no": j, "comments": meteo_comment.strip("'"), "filename": infile},
-                    )
-                    connection.commit()
-
-            elif type(meteo_comments) is str:
-                meteo_comments.strip("' ")
-
-                # Execute the Insert SQL statement.
-                cursor.execute(
-                    "INSERT INTO ODF_METEO_COMMENTS (METEO_COMMENT_NUMBER, METEO_COMMENT, ODF_FILENAME) VALUES (:comment_no, :comments, :filename)",
-                    {"comment_no": 1, "comments": meteo_comments.strip("'"), "filename": infile},
-                )
-                connection.commit()
-
-            print("Meteo_Header.Meteo_Comments successfully loaded into Oracle.")
+        rows = [(j, meteo_comment.strip("'"), infile) for j, meteo_comment in enumerate(meteo_comments)]
+    plan.add(METEO_COMMENTS_INSERT, rows)
+
+    if local_plan:
+        plan.flush(connection)
+
+    print("Meteo_Header.Meteo_Comments successfully loaded into Oracle.")
@@ -10,6 +10,7 @@ from odf_oracle.data_to_oracle import data_to_oracle
 from odf_oracle.database_connection_pool import get_database_pool
 from odf_oracle.event_comments_to_oracle import event_comments_to_oracle
 from odf_oracle.general_cal_to_oracle import general_cal_to_oracle
+from odf_oracle.header_write_plan import CountingConnection, HeaderWritePlan
 from odf_oracle.history_to_oracle import history_to_oracle
 from odf_oracle.instrument_to_oracle import instrument_to_oracle
 from odf_oracle.meteo_comments_to_oracle import meteo_comments_to_oracle
@@ -49,7 +50,10 @@ def odf_to_oracle(
     # Acquire a connection from the pool (will always have the new date and
     # timestamp formats).
     pool = get_database_pool()
-    connection = pool.acquire()
+    pooled_connection = pool.acquire()
+
+    # Count the round trips made for each file so the effect of batching can be checked.
+    connection = CountingConnection(pooled_connection)
 
     print(
         f"\nAttempting to load the ODF files in the folder << {mypath} >> "
@@ -68,6 +72,7 @@ def odf_to_oracle(
     # Loop through the list of ODF files.
     for filename in filelist:
         print(f"\nWorking on loading ODF file << {filename} >>:")
+        connection.reset_round_trips()
 
         odf = OdfHeader()
 
@@ -81,45 +86,54 @@ def odf_to_oracle(
         # # Load the Cruise_Header and Event_Header information into Oracle.
         odf_file = cruise_event_to_oracle(odf, connection, filename)
 
+        # Rows for the header child tables (comments, tests, calibrations and
+        # history) are collected in one plan and written in a single transaction.
+        plan = HeaderWritePlan()
+
         # # Load the Event_Header.Event_Comments into Oracle.
-        event_comments_to_oracle(odf, connection, odf_file)
+        event_comments_to_oracle(odf, connection, odf_file, plan)
 
         # # Load the Meteo_Header information into Oracle.
         meteo_to_oracle(odf, connection, odf_file)
 
         # # Load the Meteo_Header.Meteo_Comments into Oracle.
-        meteo_comments_to_oracle(odf, connection, odf_file)
+        meteo_comments_to_oracle(odf, connection, odf_file, plan)
 
         # # Load the Quality_Header information into Oracle.
         quality_to_oracle(odf, connection, odf_file)
 
         # # Load the Quality_Header.Quality_Tests into Oracle.
-        quality_tests_to_oracle(odf, connection, odf_file)
+        quality_tests_to_oracle(odf, connection, odf_file, plan)
 
         # # Load the Quality_Header.Quality_Comments into Oracle.
-        quality_comments_to_oracle(odf, connection, odf_file)
+        quality_comments_to_oracle(odf, connection, odf_file, plan)
 
         # # Load the Instrument_Header information into Oracle.
         instrument_to_oracle(odf, connection, odf_file)
 
         # # Load the General_Cal_Header information into Oracle.
-        general_cal_to_oracle(odf, connection, odf_file)
+        general_cal_to_oracle(odf, connection, odf_file, plan)
 
         # # Load the Polynomial_Cal_Header information into Oracle.
-        polynomial_cal_to_oracle(odf, connection, odf_file)
+        polynomial_cal_to_oracle(odf, connection, odf_file, plan)
 
         # # Load the Compass_Cal_Header information into Oracle.
-        compass_cal_to_oracle(odf, connection, odf_file)
+        compass_cal_to_oracle(odf, connection, odf_file, plan)
 
         # # Load the History_Header information into Oracle.
-        history_to_oracle(odf, connection, odf_file)
+        history_to_oracle(odf, connection, odf_file, plan)
+
+        # Write the queued header rows.
+        nrows = plan.flush(connection)
+        print(f"{nrows} header rows written in one transaction.")
 
         # # Load the Data into Oracle.
         data_to_oracle(odf, connection, odf_file)
 
-        print(f"\n<< {filename} >> was successfully loaded into Oracle.\n")
+        print(f"\n<< {filename} >> was successfully loaded into Oracle.")
+        print(f"Database round trips: {connection.total_round_trips()} {dict(connection.round_trips)}\n")
 
-    pool.drop(connection)
+    pool.drop(pooled_connection)
     pool.close()
 
 
@@ -1,7 +1,13 @@
 from datashop_toolbox.odfhdr import OdfHeader
+from odf_oracle.header_write_plan import HeaderWritePlan
 
+QUALITY_COMMENTS_INSERT = (
+    "INSERT INTO ODF_QUALITY_COMMENTS (QUALITY_COMMENT_NUMBER, QUALITY_COMMENT, ODF_FILENAME) "
+    "VALUES (:1, :2, :3)"
+)
 
-def quality_comments_to_oracle(odfobj: OdfHeader, connection, infile: str):
+
+def quality_comments_to_oracle(odfobj: OdfHeader, connection, infile: str, plan: HeaderWritePlan | None = None):
     """
     Load the ODF object's quality header comments into Oracle.
 
@@ -13,6 +19,9 @@ def quality_comments_to_oracle(odfobj: OdfHeader, connection, infile: str):
         Oracle database connection object.
     infile: str
         ODF file currently being loaded into the database.
+    plan: HeaderWritePlan, optional
+        Per-file write plan to add the rows to. When omitted the rows are
+        written and committed immediately.
 
     Returns
     -------
@@ -21,32 +30,21 @@ def quality_comments_to_oracle(odfobj: OdfHeader, connection, infile: str):
 
     if odfobj.quality_header is None:
         print("No QUALITY_HEADER Comments were present to load into Oracle.")
+        return
+
+    local_plan = plan is None
+    if local_plan:
+        plan = HeaderWritePlan()
 
+    # Loop through the Quality_Header.Quality_Comments.
+    quality_comments = odfobj.quality_header.quality_comments
+    if isinstance(quality_comments, str):
+        rows = [(1, quality_comments, infile)]
     else:
-        # Create a cursor to the open connection.
-        with connection.cursor() as cursor:
-            # Loop through the Quality_Header.Quality_Comments.
-            quality_comments = odfobj.quality_header.quality_comments
-
-            if type(quality_comments) is list:
-                for q, quality_comment in enumerate(quality_comments):
-                    # Execute the Insert SQL statement.
-                    cursor.execute(
-                        "INSERT INTO ODF_QUALITY_COMMENTS (QUALITY_COMMENT_NUMBER, "
-                        "QUALITY_COMMENT, ODF_FILENAME) VALUES "
-                        "(:comment_no, :comments, :fname)",
-                        {"comment_no": q, "comments": quality_comment, "fname": infile},
-                    )
-                    connection.commit()
-
-            elif type(quality_comments) is str:
-                # Execute the Insert SQL statement.
-                cursor.execute(
-                    "INSERT INTO ODF_QUALITY_COMMENTS (QUALITY_COMMENT_NUMBER, "
-                    "QUALITY_COMMENT, ODF_FILENAME) VALUES ("
-                    ":comment_no, :comments, :fname)",
-                    {"comment_no": 1, "comments": quality_comments, "fname": infile},
-                )
-                connection.commit()
-
-            print("Quality_Header.Quality_Comments successfully loaded into Oracle.")
+        rows = [(q, quality_comment, infile) for q, quality_comment in enumerate(quality_comments)]
+    plan.add(QUALITY_COMMENTS_INSERT, rows)
+
+    if local_plan:
+        plan.flush(connection)
+
+    print("Quality_Header.Quality_Comments successfully loaded into Oracle.")
@@ -1,7 +1,12 @@
 from datashop_toolbox.odfhdr import OdfHeader
+from odf_oracle.header_write_plan import HeaderWritePlan
 
+QUALITY_TESTS_INSERT = (
+    "INSERT INTO ODF_QUALITY_TESTS (QUALITY_TEST_NUMBER, QUALITY_TEST, ODF_FILENAME) VALUES (:1, :2, :3)"
+)
 
-def quality_tests_to_oracle(odfobj: OdfHeader, connection, infile: str):
+
+def quality_tests_to_oracle(odfobj: OdfHeader, connection, infile: str, plan: HeaderWritePlan | None = None):
     """
     Load the ODF object's quality header tests into Oracle.
 
@@ -13,6 +18,9 @@ def quality_tests_to_oracle(odfobj: OdfHeader, connection, infile: str):
         Oracle database connection object.
     infile: str
         ODF file currently being loaded into the database.
+    plan: HeaderWritePlan, optional
+        Per-file write plan to add the rows to. When omitted the rows are
+        written and committed immediately.
 
     Returns
     -------
@@ -21,31 +29,21 @@ def quality_tests_to_oracle(odfobj: OdfHeader, connection, infile: str):
 
     if odfobj.quality_header is None:
         print("No QUALITY_HEADER Tests were present to load into Oracle.")
+        return
+
+    local_plan = plan is None
+    if local_plan:
+        plan = HeaderWritePlan()
 
+    # Loop through the Quality_Header.Quality_Tests.
+    quality_tests = odfobj.quality_header.quality_tests
+    if isinstance(quality_tests, str):
+        rows = [(1, quality_tests, infile)]
     else:
-        # Create a cursor to the open connection.
-        with connection.cursor() as cursor:
-            # Loop through the Quality_Header.Quality_Tests.
-            quality_tests = odfobj.quality_header.quality_tests
-            if type(quality_tests) is list:
-                for q, quality_test in enumerate(quality_tests):
-                    # Execute the Insert SQL statement.
-                    cursor.execute(
-                        "INSERT INTO ODF_QUALITY_TESTS (QUALITY_TEST_NUMBER, "
-                        "QUALITY_TEST, ODF_FILENAME) VALUES ("
-                        ":test_no, :test, :filename)",
-                        {"test_no": q, "test": quality_test, "filename": infile},
-                    )
-                    connection.commit()
-
-            elif type(quality_tests) is str:
-                # Execute the Insert SQL statement.
-                cursor.execute(
-                    "INSERT INTO ODF_QUALITY_TESTS (QUALITY_TEST_NUMBER, "
-                    "QUALITY_TEST, ODF_FILENAME) VALUES (:test_no, "
-                    ":test, :filename)",
-                    {"test_no": 1, "test": quality_tests, "filename": infile},
-                )
-                connection.commit()
-
-            print("Quality_Header.Quality_Tests successfully loaded into Oracle.")
+        rows = [(q, quality_test, infile) for q, quality_test in enumerate(quality_tests)]
+    plan.add(QUALITY_TESTS_INSERT, rows)
+
+    if local_plan:
+        plan.flush(connection)
+
+    print("Quality_Header.Quality_Tests successfully loaded into Oracle.")
@@ -2,6 +2,8 @@ from datetime import datetime
 
 import numpy as np
 
+from datashop_toolbox.sytm import SYTM_NULL_DATETIME, parse_sytm
+
 
 def sytm_to_timestamp(sytm: str, strid: str) -> datetime:
     """
@@ -17,34 +19,35 @@ def sytm_to_timestamp(sytm: str, strid: str) -> datetime:
 
     Returns
     -------
-    dstr: str
-        A date string in Oracle's date or timestamp format according to
-        the datainsert function in MATLAB's Database toolbox.
+    dt_object: datetime
+        The date/time as a Python datetime. Empty strings and the ODF null
+        value are returned as 17-NOV-1858 00:00:00.
+
+    """
+
+    return sytm_to_timestamps(np.asarray([sytm]))[0]
+
+
+def sytm_to_timestamps(sytm: np.ndarray) -> list[datetime]:
+    """
+    Convert an array of SYTM strings to Python datetimes in one pass.
+
+    Parameters
+    ----------
+    sytm: numpy.ndarray
+        SYTM strings, optionally enclosed in single quotes as in ODF data records.
+
+    Returns
+    -------
+    list[datetime]
+        One datetime per input value; empty strings and the ODF null value
+        are returned as 17-NOV-1858 00:00:00.
 
     """
 
-    dstr = ""
-    if type(sytm) is np.str_:
-        ndt = sytm.tolist()
-        new_sytm = ndt.replace("'", "")
-        dt_object = datetime.strptime(new_sytm, "%d-%b-%Y %H:%M:%S.%f")
-    else:
-        if len(sytm) != 0:
-            dt_object = datetime.strptime(sytm, "%d-%b-%Y %H:%M:%S.%f")
-        else:
-            dt_object = datetime.strptime("17-NOV-1858 00:00:00.00", "%d-%b-%Y %H:%M:%S.%f")
-    if strid == "datetime":
-        dstr = dt_object.strftime("%Y-%m-%d %H:%M:%S.%f")
-    elif strid == "date":
-        dstr = dt_object.strftime("%Y-%m-%d")
-
-    # Check to make sure the dstr is not the ODF null value; if it is then change dstr to an empty string
-    # so that it is entered into Oracle as a null.
-    if dstr[0:10] == "1858-11-17":
-        dstr = ""
-
-    # return dstr
-    return dt_object
+    dt = parse_sytm(sytm)
+    dt = np.where(np.isnat(dt), np.datetime64(SYTM_NULL_DATETIME, "ns"), dt)
+    return dt.astype("datetime64[us]").tolist()
 
 
 def main():
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from numpy import ma
+
+from cotede.anomaly_detection import FitCache, anomaly_detection, estimate_p_optimal, fit_tests, threshold_errors
+
+
+def loop_p_optimal(prob, binflag, step=0.1):
+    """Previous implementation, one pass over the data per threshold"""
+    p_limit = prob[np.nonzero(binflag)].min() - 0.1
+    P = -np.arange(0, -p_limit, step)
+    err = np.empty(P.size)
+    for i, p in enumerate(P):
+        err[i] = np.nonzero(prob[np.nonzero(binflag)] < p)[0].size + \
+            np.nonzero(prob[np.nonzero(~binflag)] > p)[0].size
+    return P[err.argmin()], float(err.min()) / prob.size
+
+
+class TestEstimatePOptimal(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        N = 5000
+        self.binflag = rng.random(N) > 0.1
+        self.prob = np.where(self.binflag, rng.normal(-2, 1, N), rng.normal(-6, 2, N))
+        self.prob = -np.abs(np.round(self.prob, 2))
+
+    def test_matches_loop(self):
+        self.assertEqual(
+            estimate_p_optimal(self.prob, self.binflag),
+            loop_p_optimal(self.prob, self.binflag))
+
+    def test_masked(self):
+        prob = ma.masked_array(self.prob)
+        prob[::7] = ma.masked
+        binflag = ma.masked_array(self.binflag)
+        binflag[::5] = ma.masked
+        self.assertEqual(
+            estimate_p_optimal(prob, binflag),
+            loop_p_optimal(prob, binflag))
+
+    def test_resolution(self):
+        p_coarse, err_coarse = estimate_p_optimal(self.prob, self.binflag)
+        p_fine, err_fine = estimate_p_optimal(self.prob, self.binflag, resolution=0.01)
+        self.assertEqual((p_fine, err_fine), loop_p_optimal(self.prob, self.binflag, 0.01))
+        p_exact, err_exact = estimate_p_optimal(self.prob, self.binflag, resolution=None)
+        self.assertLessEqual(err_exact, err_fine)
+        self.assertLessEqual(err_fine, err_coarse)
+
+    def test_threshold_errors(self):
+        thresholds = np.array([0, -1, -2.5, -10])
+        fn, fp = threshold_errors(self.prob, self.binflag, thresholds)
+        for i, p in enumerate(thresholds):
+            self.assertEqual(fn[i], (self.prob[self.binflag] < p).sum())
+            self.assertEqual(fp[i], (self.prob[~self.binflag] > p).sum())
+
+
+class TestFitTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.features = {
+            "spike": np.abs(rng.standard_t(3, 2000)),
+            "gradient": np.abs(rng.normal(0, 2, 2000)),
+            "tukey53H": ma.masked_array(np.abs(rng.laplace(0, 1, 2000))),
+        }
+        self.features["tukey53H"][::10] = ma.masked
+        self.features["gradient"][::9] = np.nan
+
+    def test_parallel_matches_serial(self):
+        serial = fit_tests(self.features, n_jobs=1)
+        parallel = fit_tests(self.features, n_jobs=2)
+        self.assertEqual(list(serial), list(self.features))
+        self.assertEqual(serial, parallel)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "fit.json")
+            expected = fit_tests(self.features, n_jobs=1, cache=filename)
+            self.assertTrue(os.path.exists(filename))
+
+            cache = FitCache(filename)
+            self.assertEqual(len(cache), 3)
+            with mock.patch.object(anomaly_detection, "_fit_exponweib") as fit:
+                self.assertEqual(fit_tests(self.features, n_jobs=1, cache=cache), expected)
+                fit.assert_not_called()
+
+            # Only the modified feature or a different q is fitted again
+            features = dict(self.features, spike=self.features["spike"] * 2)
+            with mock.patch.object(anomaly_detection, "_fit_exponweib",
+                                   wraps=anomaly_detection._fit_exponweib) as fit:
+                fit_tests(features, n_jobs=1, cache=cache)
+                self.assertEqual(fit.call_count, 1)
+                fit_tests(features, q=0.8, n_jobs=1, cache=cache)
+                self.assertEqual(fit.call_count, 4)
+
+    def test_serial_by_default(self):
+        with mock.patch.object(anomaly_detection, "ProcessPoolExecutor") as executor:
+            self.assertEqual(fit_tests(self.features), fit_tests(self.features, n_jobs=1))
+            executor.assert_not_called()
+
+    def test_warm_start_not_cached(self):
+        cold = fit_tests(self.features)
+        cache = FitCache()
+        features = dict(self.features, spike=self.features["spike"] * 2)
+        fit_tests(features, cache=cache, warm_start=cold)
+        # Only the features without a guess (none here) are cached
+        self.assertEqual(len(cache), 0)
+        fit_tests(features, cache=cache, warm_start={"spike": cold["spike"]})
+        self.assertEqual(len(cache), 2)
+
+    def test_warm_start(self):
+        cold = fit_tests(self.features, n_jobs=1)
+        warm = fit_tests(self.features, n_jobs=1, warm_start=cold)
+        # Starting from a previous fit can only improve the likelihood
+        for f in cold:
+            self.assertEqual(warm[f]["qlimit"], cold[f]["qlimit"])
+            samp = ma.compressed(self.features[f])
+            samp = samp[samp > cold[f]["qlimit"]]
+            nll_cold = -anomaly_detection.exponweib.logpdf(samp, *cold[f]["param"]).sum()
+            nll_warm = -anomaly_detection.exponweib.logpdf(samp, *warm[f]["param"]).sum()
+            self.assertLessEqual(nll_warm, nll_cold + 1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from cotede.qctests import location_at_sea
+from cotede.qctests.location_at_sea import LocationAtSea, get_bathymetry
+from cotede.utils.bathymetry import BathymetryService
+
+
+def synthetic_grid(step=1.0, repeat_last=False):
+    """Global grid, from north to south, with height = 100 * lat - 4000"""
+    lat = np.arange(90, -90 - step / 2, -step)
+    nlon = int(360 / step) + int(repeat_last)
+    lon = -180 + step * np.arange(nlon)
+    height = np.repeat((100 * lat - 4000)[:, None], nlon, axis=1)
+    # A seamount at (10N, 0E) that reaches the surface
+    height[lat == 10, lon == 0] = 500
+    return lat, lon, height
+
+
+class Station:
+    def __init__(self, lat, lon):
+        self.attrs = {"LATITUDE": lat, "LONGITUDE": lon}
+        self.data = {"TEMP": np.array([20.0, 19.0])}
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def keys(self):
+        return self.data.keys()
+
+
+class TestBathymetryService(unittest.TestCase):
+    def setUp(self):
+        self.service = BathymetryService(tile_size=8, grid=synthetic_grid())
+
+    def test_linear(self):
+        rng = np.random.default_rng(0)
+        lat = rng.uniform(-90, 90, 1000)
+        lon = rng.uniform(-540, 540, 1000)
+        lat[lat > 5] = -lat[lat > 5]
+        np.testing.assert_allclose(self.service.height_at(lat, lon), 100 * lat - 4000)
+        np.testing.assert_allclose(self.service.depth_at(lat, lon), 4000 - 100 * lat)
+
+    def test_grid_nodes_and_wrap(self):
+        # Exactly at the seamount, in any longitude reference
+        self.assertEqual(self.service.height_at(10, 0), 500)
+        self.assertEqual(self.service.height_at(10, 360), 500)
+        # Across the grid seam, between 179E and 180W
+        np.testing.assert_allclose(self.service.height_at(0, 179.5), -4000)
+        np.testing.assert_allclose(self.service.height_at(0, -180.5), -4000)
+        # Half way between the seamount and its neighbour
+        np.testing.assert_allclose(self.service.height_at(10, 0.5), (500 + 1000 - 4000) / 2)
+        # Poles
+        np.testing.assert_allclose(self.service.height_at([90, -90], [0, 0]), [5000, -13000])
+
+    def test_repeated_seam_column(self):
+        service = BathymetryService(tile_size=8, grid=synthetic_grid(repeat_last=True))
+        lat, lon = [10, 0, 5], [0, 179.5, 123.4]
+        np.testing.assert_allclose(service.height_at(lat, lon), self.service.height_at(lat, lon))
+
+    def test_invalid(self):
+        h = self.service.height_at([np.nan, 95, 10, 10], [0, 0, np.nan, 0])
+        np.testing.assert_array_equal(np.isnan(h), [True, True, True, False])
+
+    def test_shape(self):
+        lat = np.linspace(-60, 60, 12).reshape(3, 4)
+        self.assertEqual(self.service.depth_at(lat, lat).shape, (3, 4))
+        self.assertEqual(self.service.depth_at(10, 20).shape, ())
+
+    def test_tiles_are_cached(self):
+        lat = np.linspace(-2, 2, 5000)
+        lon = np.linspace(-3, 3, 5000)
+        self.service.height_at(lat, lon)
+        info = self.service.cache_info()
+        self.assertLessEqual(info["misses"], 4)
+        self.service.height_at(lat[::-1], lon[::-1])
+        self.assertEqual(self.service.cache_info()["misses"], info["misses"])
+
+    def test_lru(self):
+        service = BathymetryService(tile_size=8, maxtiles=2, grid=synthetic_grid())
+        for lon in (0, 20, 40, 0):
+            service.height_at(0, lon)
+        self.assertEqual(service.cache_info()["size"], 2)
+        self.assertEqual(service.cache_info()["misses"], 4)
+
+
+class TestLocationAtSea(unittest.TestCase):
+    def setUp(self):
+        service = BathymetryService(grid=synthetic_grid())
+        patcher = mock.patch.object(location_at_sea, "bathymetry_service", return_value=service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_bathymetry(self):
+        output = get_bathymetry([0, 10], [30, 0])
+        np.testing.assert_array_equal(output["bathymetry"], [4000, -500])
+        self.assertEqual(output["bathymetry"].dtype, np.dtype("f8"))
+        # Same dtype whether or not some positions can't be interpolated
+        output = get_bathymetry([0, np.nan], [30, 0])
+        self.assertEqual(output["bathymetry"].dtype, np.dtype("f8"))
+        self.assertEqual(output["bathymetry"][0], 4000)
+        self.assertTrue(np.isnan(output["bathymetry"][1]))
+
+    def test_location_at_sea(self):
+        y = LocationAtSea(Station(0, 30))
+        np.testing.assert_array_equal(y.flags["location_at_sea"], [1])
+        y = LocationAtSea(Station(10, 0))
+        np.testing.assert_array_equal(y.flags["location_at_sea"], [3])
+
+    def test_track(self):
+        track = Station(None, None)
+        track.attrs = {}
+        track.data["LATITUDE"] = np.array([0, 10, 10])
+        track.data["LONGITUDE"] = np.array([30, 0, np.nan])
+        y = LocationAtSea(track)
+        np.testing.assert_array_equal(y.flags["location_at_sea"], [1, 3, 0])
+
+    def test_legacy(self):
+        np.testing.assert_array_equal(location_at_sea.location_at_sea(Station(0, 30)), [1])
+        np.testing.assert_array_equal(location_at_sea.location_at_sea(Station(10, 0)), [3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+from numpy import ma
+
+from cotede.qctests.bin_spike import bin_spike
+
+
+def bin_spike_loop(x, number_of_points):
+    """Point by point reference ignoring masked and non-finite values"""
+    x = ma.masked_invalid(x)
+    N = len(x)
+    half_window = number_of_points // 2
+    bin = ma.masked_all(N)
+    for i in range(half_window, N - half_window):
+        if x.mask[i] or ma.compressed(x[i - half_window:i + half_window]).size < 3:
+            continue
+        neighbors = ma.concatenate([x[i - half_window:i], x[i + 1:i + half_window + 1]])
+        bin[i] = (x[i] - ma.median(x[i - half_window:i + half_window])) / neighbors.std()
+    return bin
+
+
+class TestBinSpike(unittest.TestCase):
+    def test_matches_loop(self):
+        rng = np.random.default_rng(0)
+        for n in (0, 1, 5, 11, 300):
+            for number_of_points in (2, 4, 10):
+                x = rng.normal(size=n)
+                x[rng.random(n) < 0.2] = np.nan
+                for data in (x, ma.masked_invalid(x)):
+                    result = bin_spike(data, number_of_points)
+                    expected = bin_spike_loop(data, number_of_points)
+                    np.testing.assert_array_equal(ma.getmaskarray(result), ma.getmaskarray(expected))
+                    np.testing.assert_allclose(result.compressed(), expected.compressed(), rtol=1e-12)
+
+    def test_masked_values_are_ignored(self):
+        x = ma.masked_values([1.0, 2.0, 1.0, 1e6, 2.0, 1.0, 2.0, 1.0], 1e6)
+        result = bin_spike(x, 4)
+        self.assertTrue(result.mask[3])
+        self.assertLess(np.abs(result).max(), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+from datetime import datetime
+
+import numpy as np
+from numpy import ma
+
+from cotede.qc import ProfileQC, ProfileQCCollection
+from cotede.utils.climatology import ClimatologySession, climatology_session
+
+
+class FakeVariable:
+    def __init__(self):
+        self.calls = 0
+
+    def extract(self, var, doy, depth, lat, lon):
+        self.calls += 1
+        return {v: ma.masked_array(np.asarray(depth, dtype="f8") + lat + lon + doy) for v in var}
+
+    track = extract
+
+
+class TestClimatologySession(unittest.TestCase):
+    def setUp(self):
+        self.variable = FakeVariable()
+        self.session = ClimatologySession(maxsize=2)
+        self.session._databases["WOA"] = {"TEMP": self.variable}
+
+    def test_identical_queries_are_extracted_once(self):
+        query = {"doy": 136, "depth": np.array([0.0, 10.0]), "lat": 17.5, "lon": -37.5}
+        results = self.session.extract_many("WOA", "TEMP", ["mean"], [query, query, query])
+        self.assertEqual(self.variable.calls, 1)
+        np.testing.assert_array_equal(results[0]["mean"], results[2]["mean"])
+
+    def test_queries_are_grouped_by_position(self):
+        queries = [
+            {"doy": 136, "depth": np.array([0.0, 10.0, 50.0]), "lat": 17.5, "lon": -37.5},
+            {"doy": 136, "depth": np.array([5.0, 10.0]), "lat": 17.5, "lon": -37.5},
+            {"doy": 136, "depth": np.array([50.0, 0.0, 100.0]), "lat": 17.5, "lon": -37.5},
+            {"doy": 137, "depth": np.array([0.0]), "lat": 17.5, "lon": -37.5},
+            {"doy": 136, "depth": np.array([0.0]), "lat": 18.5, "lon": -37.5},
+        ]
+        results = self.session.extract_many("WOA", "TEMP", ["mean"], queries)
+        # One extraction for the first three, and one for each of the others
+        self.assertEqual(self.variable.calls, 3)
+
+        reference = ClimatologySession()
+        reference._databases["WOA"] = {"TEMP": FakeVariable()}
+        for query, result in zip(queries, results, strict=True):
+            expected = reference.extract("WOA", "TEMP", ["mean"], **query)
+            np.testing.assert_array_equal(result["mean"], expected["mean"])
+
+    def test_track_queries_are_not_grouped(self):
+        query = {"doy": 136, "depth": np.array([0.0]), "lat": np.array([17.5, 17.6]),
+                 "lon": np.array([-37.5, -37.5]), "mode": "track"}
+        self.session.extract_many("WOA", "TEMP", ["mean"], [query, dict(query, depth=np.array([5.0]))])
+        self.assertEqual(self.variable.calls, 2)
+
+    def test_prefetch(self):
+        requests = [
+            {"dbname": "WOA", "vtype": "TEMP", "var": ["mean"], "doy": 136, "depth": np.array([0.0, 10.0]),
+             "lat": 17.5, "lon": -37.5, "mode": "profile"},
+            {"dbname": "WOA", "vtype": "TEMP", "var": ["mean"], "doy": 136, "depth": np.array([5.0]),
+             "lat": 17.5, "lon": -37.5, "mode": "profile"},
+        ]
+        with self.session.prefetch(requests):
+            self.assertEqual(self.variable.calls, 1)
+            result = self.session.extract("WOA", "TEMP", ["mean"], 136, np.array([5.0]), 17.5, -37.5)
+            self.assertEqual(self.variable.calls, 1)
+            np.testing.assert_array_equal(result["mean"], [121.0])
+        # The unused result is dropped on exit
+        self.assertEqual(self.session._prefetched, {})
+        self.session.extract("WOA", "TEMP", ["mean"], 136, np.array([0.0, 10.0]), 17.5, -37.5)
+        self.assertEqual(self.variable.calls, 2)
+
+    def test_results_are_copies(self):
+        first = self.session.extract("WOA", "TEMP", ["mean"], 1, [0.0, 5.0], 10.0, 20.0)
+        first["mean"][:] = -1
+        second = self.session.extract("WOA", "TEMP", ["mean"], 1, [0.0, 5.0], 10.0, 20.0)
+        np.testing.assert_array_equal(second["mean"], [31.0, 36.0])
+
+    def test_lru_eviction(self):
+        for lat in (1.0, 2.0, 3.0, 1.0):
+            self.session.extract("WOA", "TEMP", ["mean"], 1, [0.0], lat, 0.0)
+        self.assertEqual(self.variable.calls, 4)
+        self.assertEqual(self.session.cache_info()["size"], 2)
+
+
+class DummyProfile:
+    def __init__(self, lat, depth):
+        self.attrs = {"time": datetime(2020, 5, 15), "LATITUDE": lat, "LONGITUDE": -37.5}
+        self.data = {"DEPTH": ma.masked_array(depth), "TEMP": ma.masked_array(np.full(len(depth), 150.0))}
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def keys(self):
+        return self.data.keys()
+
+
+class TestCollectionPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.session = climatology_session()
+        self.session.clear()
+        self.databases = dict(self.session._databases)
+        self.variable = FakeVariable()
+        self.session._databases["WOA"] = {"TEMP": self.variable}
+
+    def tearDown(self):
+        self.session._databases.clear()
+        self.session._databases.update(self.databases)
+        self.session.clear()
+
+    def test_one_extraction_per_position(self):
+        profiles = {
+            "cast1": DummyProfile(17.5, [0.0, 10.0, 20.0]),
+            "cast2": DummyProfile(17.5, [0.0, 5.0]),
+            "cast3": DummyProfile(17.5, [-1.0, 10.0, 30.0]),
+            "cast4": DummyProfile(18.5, [0.0, 10.0]),
+        }
+        cfg = {"sea_water_temperature": {"woa_normbias": {"procedure": "WOA_NormBias", "threshold": 6}}}
+        collection = ProfileQCCollection(profiles, cfg, n_jobs=1)
+        self.assertEqual(self.variable.calls, 2)
+
+        for profile_id, profile in profiles.items():
+            self.session.clear()
+            expected = ProfileQC(profile, cfg=cfg).flags["TEMP"]["woa_normbias"]
+            np.testing.assert_array_equal(collection[profile_id]["TEMP"]["woa_normbias"], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+from numpy import ma
+
+from cotede.qctests.constant_cluster_size import constant_cluster_size
+
+
+def constant_cluster_size_loop(x, tol=0):
+    """Previous O(n**2) implementation, kept as the reference"""
+    tol = tol + 1e-5 * tol
+    ivalid = np.nonzero(~ma.getmaskarray(ma.fix_invalid(x)))[0]
+    dx = np.diff(np.atleast_1d(x)[ivalid])
+    cluster_size = np.zeros(np.shape(x), dtype='i')
+    for i, iv in enumerate(ivalid):
+        idx = np.absolute(dx[i:].cumsum()) > tol
+        if True in idx:
+            cluster_size[iv] += np.nonzero(idx)[0].min()
+        else:
+            cluster_size[iv] += idx.size
+        idx = np.absolute(dx[0:i][::-1].cumsum()) > tol
+        if True in idx:
+            cluster_size[iv] += np.nonzero(idx)[0].min()
+        else:
+            cluster_size[iv] += idx.size
+    return cluster_size
+
+
+class TestConstantClusterSize(unittest.TestCase):
+    def assert_same(self, x, tol=0):
+        np.testing.assert_array_equal(constant_cluster_size(x, tol), constant_cluster_size_loop(x, tol))
+
+    def test_random(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            n = int(rng.integers(1, 200))
+            # Values on a binary grid keep the reference cumulative sums exact.
+            x = np.round(np.cumsum(rng.choice([-1, 0, 0, 0, 1], n) * rng.integers(1, 4, n)) * 0.25, 2)
+            x[rng.random(n) < 0.1] = np.nan
+            for tol in (0, 0.25, 0.5, 1.0, 3.0):
+                self.assert_same(x, tol)
+                self.assert_same(ma.masked_invalid(x), tol)
+
+    def test_edge_cases(self):
+        for x in ([], [1.0], [np.nan], [np.nan, np.nan], [1.0, 1.0], [1, 2, 1, 2], [5.0] * 20,
+                  [1.0, np.inf, 1.0, -np.inf, 1.0]):
+            self.assert_same(np.array(x, dtype=float))
+            self.assert_same(np.array(x, dtype=float), tol=1)
+        self.assert_same(ma.masked_values([1.0, -99.0, 1.0, 1.0, 2.0], -99.0))
+
+    def test_long_series(self):
+        x = np.repeat(np.arange(5000.0), 100)
+        self.assertEqual(constant_cluster_size(x).max(), 99)
+        self.assertEqual(constant_cluster_size(x, tol=1).max(), 299)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+from numpy import ma
+
+from cotede.qctests import cum_rate_of_change as croc
+
+
+def cum_rate_of_change_loop(x, memory):
+    """Previous element by element implementation, kept as the reference"""
+    y = np.nan * np.ones_like(x)
+    y[1:] = np.absolute(np.diff(x))
+    for i in range(2, y.size):
+        if y[i] < y[i - 1]:
+            y[i] = (1 - memory) * y[i] + memory * y[i - 1]
+    return y
+
+
+class TestCumRateOfChange(unittest.TestCase):
+    def test_bit_identical(self):
+        rng = np.random.default_rng(0)
+        for n in (0, 1, 2, 3, 1000):
+            x = rng.normal(size=n).cumsum()
+            x[rng.random(n) < 0.05] = np.nan
+            expected = cum_rate_of_change_loop(x, 0.8)
+            np.testing.assert_array_equal(croc.cum_rate_of_change(x, 0.8), expected)
+            y = np.nan * np.ones_like(x)
+            y[1:] = np.absolute(np.diff(x))
+            np.testing.assert_array_equal(croc._recurrence_python(y, 0.8), expected)
+
+    def test_masked_input_is_not_modified(self):
+        x = ma.masked_array(np.sin(np.arange(30.0)))
+        x[4] = ma.masked
+        original = x.copy()
+        y = croc.cum_rate_of_change(x, 0.8)
+        self.assertTrue(np.isnan(y[4]))
+        np.testing.assert_array_equal(x.data, original.data)
+        np.testing.assert_array_equal(x.mask, original.mask)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+from numpy import ma
+
+from cotede.qc import ProfileQC
+from cotede.qctests import FeatureCache, Spike
+from cotede.qctests.spike import spike
+
+CFG = {
+    "sea_water_temperature": {
+        "spike": {"threshold": 2.0},
+        "gradient": {"threshold": 10},
+        "rate_of_change": {"threshold": 4},
+        "digit_roll_over": {"threshold": 10},
+        "morello2014": {
+            "output": {"low": None, "high": None},
+            "features": {
+                "spike": {
+                    "weight": 1,
+                    "low": {"type": "zmf", "params": [0.07, 0.2]},
+                    "high": {"type": "zmf", "params": [2, 6]},
+                },
+                "gradient": {
+                    "weight": 1,
+                    "low": {"type": "zmf", "params": [0.5, 1.5]},
+                    "high": {"type": "zmf", "params": [3, 4]},
+                },
+            },
+        },
+    }
+}
+
+
+class DummyProfile:
+    def __init__(self, n=100):
+        rng = np.random.default_rng(0)
+        temp = 25 * np.exp(-np.linspace(0, 5, n)) + rng.normal(0, 0.3, n)
+        temp[[10, 50]] += 8
+        self.attrs = {}
+        self.data = {"PRES": ma.masked_array(np.linspace(0, 1000, n)), "TEMP": ma.masked_array(temp)}
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def keys(self):
+        return self.data.keys()
+
+
+class TestFeatureCache(unittest.TestCase):
+    def test_get(self):
+        cache = FeatureCache()
+        calls = []
+
+        def feature(x, scale=1):
+            calls.append(scale)
+            return x * scale
+
+        self.assertEqual(cache.get("TEMP", "f", feature, 2, scale=3), 6)
+        self.assertEqual(cache.get("TEMP", "f", feature, 2, scale=3), 6)
+        self.assertEqual(cache.get("TEMP", "f", feature, 2, scale=4), 8)
+        self.assertEqual(calls, [3, 4])
+        report = {tuple(r["params"].items()): r["reused"] for r in cache.report()}
+        self.assertEqual(report, {(("scale", 3),): 1, (("scale", 4),): 0})
+
+    def test_check_uses_cache(self):
+        profile = DummyProfile()
+        cache = FeatureCache()
+        first = Spike(profile, "TEMP", {"threshold": 2}, feature_cache=cache)
+        second = Spike(profile, "TEMP", {"threshold": 4}, feature_cache=cache)
+        self.assertIs(first.features["spike"], second.features["spike"])
+        np.testing.assert_array_equal(first.features["spike"], spike(profile["TEMP"].copy()))
+
+    def test_profileqc_shares_features(self):
+        pqc = ProfileQC(DummyProfile(), cfg=CFG)
+        reused = {r["feature"]: r["reused"] for r in pqc.feature_timing()}
+        self.assertEqual(reused, {"normalize_input": 4, "spike": 1, "gradient": 1, "rate_of_change": 1})
+        self.assertIn("morello2014", pqc.flags["TEMP"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from cotede.misc import FlagTable, combined_flag
+
+
+class TestFlagTable(unittest.TestCase):
+    def setUp(self):
+        self.flags = {
+            "global_range": np.array([1, 1, 4, 1, 9], dtype="i1"),
+            "spike": np.array([1, 3, 1, 0, 9], dtype="i1"),
+            "gradient": np.array([2, 1, 1, 1, 9], dtype="i1"),
+        }
+
+    def test_behaves_like_dict(self):
+        table = FlagTable(5, capacity=1)
+        for k, v in self.flags.items():
+            table[k] = v
+        self.assertEqual(list(table.keys()), list(self.flags))
+        for k in self.flags:
+            np.testing.assert_array_equal(table[k], self.flags[k])
+        self.assertEqual(table.array.shape, (3, 5))
+        table["common"] = 1
+        np.testing.assert_array_equal(table["common"], np.ones(5))
+        del table["spike"]
+        self.assertEqual(list(table), ["global_range", "gradient", "common"])
+        np.testing.assert_array_equal(table["gradient"], self.flags["gradient"])
+
+    def test_combined(self):
+        table = FlagTable(5)
+        for k, v in self.flags.items():
+            table[k] = v
+        expected = combined_flag(self.flags)
+        np.testing.assert_array_equal(expected, [2, 3, 4, 1, 9])
+        np.testing.assert_array_equal(combined_flag(table), expected)
+        np.testing.assert_array_equal(
+            combined_flag(table, ["spike", "gradient"]), combined_flag(self.flags, ["spike", "gradient"]))
+
+    def test_to_frame_without_copy(self):
+        table = FlagTable(5)
+        for k, v in self.flags.items():
+            table[k] = v
+        df = table.to_frame()
+        self.assertEqual(list(df.columns), list(self.flags))
+        self.assertTrue(np.shares_memory(df.to_numpy(), table.array))
+        np.testing.assert_array_equal(df["spike"], self.flags["spike"])
+
+
+if __name__ == "__main__":
+    unittest.main()
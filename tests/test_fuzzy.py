@@ -0,0 +1,24 @@
+import unittest
+
+import numpy as np
+
+from cotede.fuzzy.defuzz import defuzz, defuzz_bisector
+
+
+class TestDefuzzBisector(unittest.TestCase):
+    def test_matches_scalar_defuzz(self):
+        rng = np.random.default_rng(0)
+        x = np.linspace(0, 1, 100)
+        mfx = rng.random((500, 100)) * (rng.random((500, 100)) < 0.3)
+        expected = [defuzz(x, row, "bisector") for row in mfx]
+        np.testing.assert_array_equal(defuzz_bisector(x, mfx), expected)
+
+    def test_zero_area(self):
+        x = np.linspace(0, 1, 10)
+        result = defuzz_bisector(x, np.vstack([np.zeros(10), np.ones(10)]))
+        self.assertTrue(np.isnan(result[0]))
+        self.assertEqual(result[1], defuzz(x, np.ones(10), "bisector"))
+
+
+if __name__ == "__main__":
+    unittest.main()
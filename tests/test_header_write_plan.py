@@ -0,0 +1,237 @@
+import unittest
+from datetime import datetime
+
+from datashop_toolbox.compasshdr import CompassCalHeader
+from datashop_toolbox.generalhdr import GeneralCalHeader
+from datashop_toolbox.historyhdr import HistoryHeader
+from datashop_toolbox.meteohdr import MeteoHeader
+from datashop_toolbox.odfhdr import OdfHeader
+from datashop_toolbox.polynomialhdr import PolynomialCalHeader
+from datashop_toolbox.qualityhdr import QualityHeader
+from odf_oracle import (
+    CountingConnection,
+    HeaderWritePlan,
+    compass_cal_to_oracle,
+    event_comments_to_oracle,
+    general_cal_to_oracle,
+    history_to_oracle,
+    meteo_comments_to_oracle,
+    polynomial_cal_to_oracle,
+    quality_comments_to_oracle,
+    quality_tests_to_oracle,
+)
+from odf_oracle.compass_cal_to_oracle import COMPASS_CAL_INSERT
+from odf_oracle.event_comments_to_oracle import EVENT_COMMENTS_INSERT
+from odf_oracle.general_cal_comments_to_oracle import GENERAL_CAL_COMMENTS_INSERT
+from odf_oracle.general_cal_equation_to_oracle import GENERAL_CAL_EQUATION_INSERT
+from odf_oracle.general_cal_to_oracle import GENERAL_CAL_INSERT
+from odf_oracle.history_to_oracle import HISTORY_INSERT
+from odf_oracle.meteo_comments_to_oracle import METEO_COMMENTS_INSERT
+from odf_oracle.polynomial_cal_to_oracle import POLYNOMIAL_CAL_INSERT
+from odf_oracle.quality_comments_to_oracle import QUALITY_COMMENTS_INSERT
+from odf_oracle.quality_tests_to_oracle import QUALITY_TESTS_INSERT
+
+FILENAME = "MTR_BCD2020999_001_01_DN.ODF"
+CAL_DATE = datetime(2020, 5, 1, 12, 0)
+APP_DATE = datetime(2020, 6, 1)
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, statement, binds=None):
+        self.connection.log.append(("execute", statement, binds))
+
+    def executemany(self, statement, rows):
+        if self.connection.fail:
+            raise RuntimeError("ORA-00001: unique constraint violated")
+        self.connection.log.append(("executemany", statement, list(rows)))
+
+
+class FakeConnection:
+    """Record the statements, commits and rollbacks sent to the database."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.log = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.log.append(("commit",))
+
+    def rollback(self):
+        self.log.append(("rollback",))
+
+    def rows(self):
+        """Rows inserted, by statement."""
+        rows = {}
+        for entry in self.log:
+            if entry[0] == "executemany":
+                rows.setdefault(entry[1], []).extend(entry[2])
+        return rows
+
+
+def make_odf():
+    odf = OdfHeader()
+    odf.event_header.event_comments = ["First event comment", "Second event comment"]
+    odf.meteo_header = MeteoHeader(meteo_comments=["'Calm seas'"])
+    odf.quality_header = QualityHeader(
+        quality_tests=["QUALITY_TEST_1", "QUALITY_TEST_2"], quality_comments=["Checked"])
+    odf.history_headers = [
+        HistoryHeader(creation_date="01-MAY-2020 12:00:00.00", processes=["Read", "Despiked"]),
+        HistoryHeader(creation_date="01-JUN-2020 00:00:00.00", processes=["Written"]),
+    ]
+    odf.general_cal_headers = [
+        GeneralCalHeader(
+            parameter_code="TEMP_01", calibration_type="POLY", calibration_date="01-MAY-2020 12:00:00.00",
+            application_date="01-JUN-2020 00:00:00.00", number_coefficients=2, coefficients=[0.1, 1.0],
+            calibration_equation="y = a + b * x", calibration_comments=["Pre-cruise", "Post-cruise"]),
+        GeneralCalHeader(
+            parameter_code="PRES_01", calibration_type="POLY", calibration_date="01-MAY-2020 12:00:00.00",
+            application_date="01-JUN-2020 00:00:00.00", number_coefficients=1, coefficients=[2.5]),
+    ]
+    odf.polynomial_cal_headers = [
+        PolynomialCalHeader(
+            parameter_code="CNDC_01", calibration_date="01-MAY-2020 12:00:00.00",
+            application_date="01-JUN-2020 00:00:00.00", number_coefficients=2, coefficients=[0.0, 0.5]),
+    ]
+    odf.compass_cal_headers = [
+        CompassCalHeader(
+            parameter_code="HCDT_01", calibration_date="01-MAY-2020 12:00:00.00",
+            application_date="01-JUN-2020 00:00:00.00", directions=[0.0, 90.0], corrections=[1.5, -2.0]),
+    ]
+    return odf
+
+
+LOADERS = [
+    event_comments_to_oracle,
+    meteo_comments_to_oracle,
+    quality_tests_to_oracle,
+    quality_comments_to_oracle,
+    general_cal_to_oracle,
+    polynomial_cal_to_oracle,
+    compass_cal_to_oracle,
+    history_to_oracle,
+]
+
+EXPECTED_ROWS = {
+    EVENT_COMMENTS_INSERT: [("First event comment", FILENAME), ("Second event comment", FILENAME)],
+    METEO_COMMENTS_INSERT: [(0, "Calm seas", FILENAME)],
+    QUALITY_TESTS_INSERT: [(0, "QUALITY_TEST_1", FILENAME), (1, "QUALITY_TEST_2", FILENAME)],
+    QUALITY_COMMENTS_INSERT: [(0, "Checked", FILENAME)],
+    GENERAL_CAL_INSERT: [
+        ("TEMP_01", "POLY", CAL_DATE, APP_DATE, 0, 0.1, FILENAME),
+        ("TEMP_01", "POLY", CAL_DATE, APP_DATE, 1, 1.0, FILENAME),
+        ("PRES_01", "POLY", CAL_DATE, APP_DATE, 0, 2.5, FILENAME),
+    ],
+    GENERAL_CAL_EQUATION_INSERT: [(0, 1, "y = a + b * x", FILENAME)],
+    GENERAL_CAL_COMMENTS_INSERT: [(1, 0, "Pre-cruise", FILENAME), (1, 1, "Post-cruise", FILENAME)],
+    POLYNOMIAL_CAL_INSERT: [
+        ("CNDC_01", CAL_DATE, APP_DATE, 0, 0.0, FILENAME),
+        ("CNDC_01", CAL_DATE, APP_DATE, 1, 0.5, FILENAME),
+    ],
+    COMPASS_CAL_INSERT: [
+        ("HCDT_01", CAL_DATE, APP_DATE, 0.0, 1.5, FILENAME),
+        ("HCDT_01", CAL_DATE, APP_DATE, 90.0, -2.0, FILENAME),
+    ],
+    HISTORY_INSERT: [
+        (0, CAL_DATE, "Read", FILENAME),
+        (0, CAL_DATE, "Despiked", FILENAME),
+        (1, APP_DATE, "Written", FILENAME),
+    ],
+}
+
+
+class TestHeaderWritePlan(unittest.TestCase):
+    def test_flush(self):
+        plan = HeaderWritePlan()
+        plan.add("INSERT A", [(1,), (2,)])
+        plan.add("INSERT B", [(3,)])
+        plan.add("INSERT A", iter([(4,)]))
+        self.assertEqual(len(plan), 4)
+
+        connection = FakeConnection()
+        self.assertEqual(plan.flush(connection), 4)
+        self.assertEqual(connection.log, [
+            ("executemany", "INSERT A", [(1,), (2,), (4,)]),
+            ("executemany", "INSERT B", [(3,)]),
+            ("commit",),
+        ])
+        self.assertEqual(len(plan), 0)
+
+        # Nothing left to write
+        self.assertEqual(plan.flush(connection), 0)
+        self.assertEqual(len(connection.log), 3)
+
+    def test_failed_flush_rolls_back(self):
+        plan = HeaderWritePlan()
+        plan.add("INSERT A", [(1,)])
+        connection = FakeConnection(fail=True)
+        with self.assertRaises(RuntimeError):
+            plan.flush(connection)
+        self.assertEqual(connection.log, [("rollback",)])
+        # The rows are kept so the flush can be retried
+        self.assertEqual(len(plan), 1)
+
+    def test_counting_connection(self):
+        fake = FakeConnection()
+        connection = CountingConnection(fake)
+        plan = HeaderWritePlan()
+        plan.add("INSERT A", [(1,), (2,)])
+        plan.add("INSERT B", [(3,)])
+        plan.flush(connection)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM DUAL")
+        self.assertEqual(dict(connection.round_trips), {"executemany": 2, "commit": 1, "execute": 1})
+        self.assertEqual(connection.total_round_trips(), 4)
+        self.assertEqual(connection.log, fake.log)
+        connection.reset_round_trips()
+        self.assertEqual(connection.total_round_trips(), 0)
+
+
+class TestHeaderLoaders(unittest.TestCase):
+    def test_with_plan(self):
+        odf = make_odf()
+        connection = CountingConnection(FakeConnection())
+        plan = HeaderWritePlan()
+        for loader in LOADERS:
+            loader(odf, connection, FILENAME, plan)
+        # Only the session setup of history_to_oracle is sent before the flush
+        self.assertEqual(dict(connection.round_trips), {"execute": 1})
+
+        self.assertEqual(plan.flush(connection), sum(len(rows) for rows in EXPECTED_ROWS.values()))
+        self.assertEqual(connection.rows(), EXPECTED_ROWS)
+        self.assertEqual(
+            dict(connection.round_trips), {"execute": 1, "executemany": len(EXPECTED_ROWS), "commit": 1})
+
+    def test_without_plan(self):
+        odf = make_odf()
+        connection = FakeConnection()
+        for loader in LOADERS:
+            loader(odf, connection, FILENAME)
+        self.assertEqual(connection.rows(), EXPECTED_ROWS)
+        self.assertEqual(sum(entry[0] == "commit" for entry in connection.log), len(LOADERS))
+        self.assertEqual(connection.log[-3][0], "execute")
+        self.assertIn("ALTER SESSION", connection.log[-3][1])
+
+    def test_empty_headers(self):
+        odf = OdfHeader()
+        connection = FakeConnection()
+        plan = HeaderWritePlan()
+        for loader in LOADERS:
+            loader(odf, connection, FILENAME, plan)
+        self.assertEqual(len(plan), 0)
+        self.assertEqual(connection.log, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
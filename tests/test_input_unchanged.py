@@ -0,0 +1,91 @@
+import copy
+import unittest
+
+import numpy as np
+from numpy import ma
+
+from cotede import qctests
+from cotede.qc import ProfileQC
+from cotede.qctests.core import normalize_input
+
+CFG = {
+    "sea_water_temperature": {
+        "global_range": {"minval": -2.5, "maxval": 40},
+        "spike": {"threshold": 2.0},
+        "spike_depthconditional": {"pressure_threshold": 500, "shallow_max": 6.0, "deep_max": 2.0},
+        "gradient": {"threshold": 10},
+        "gradient_depthconditional": {"pressure_threshold": 500, "shallow_max": 9.0, "deep_max": 3.0},
+        "rate_of_change": {"threshold": 4},
+        "digit_roll_over": {"threshold": 10},
+        "tukey53H": {"threshold": 1.5, "l": 12},
+        "cum_rate_of_change": {"threshold": 4, "memory": 0.8},
+        "constant_cluster_size": {"threshold": 5},
+        "stuck_value": {},
+        "profile_envelop": [["> 0", "<= 25", -2, 37], ["> 25", "<= 12000", -2, 36]],
+    }
+}
+
+
+class DummyProfile:
+    def __init__(self, n=200):
+        rng = np.random.default_rng(3)
+        temp = 25 * np.exp(-np.linspace(0, 5, n)) + rng.normal(0, 0.3, n)
+        temp[[10, 50]] += 8
+        self.attrs = {"LATITUDE": 15, "LONGITUDE": -38}
+        self.data = {
+            "PRES": ma.masked_array(np.linspace(0, 1000, n), mask=rng.random(n) < 0.05),
+            "TEMP": ma.masked_array(temp, mask=rng.random(n) < 0.1),
+        }
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def keys(self):
+        return self.data.keys()
+
+
+def assert_same(a, b):
+    np.testing.assert_array_equal(ma.getmaskarray(a), ma.getmaskarray(b))
+    np.testing.assert_array_equal(ma.getdata(a), ma.getdata(b))
+
+
+class TestInputUnchanged(unittest.TestCase):
+    def test_profileqc(self):
+        profile = DummyProfile()
+        original = copy.deepcopy(profile.data)
+        ProfileQC(profile, cfg=CFG)
+        for v in original:
+            assert_same(profile[v], original[v])
+
+    def test_checks_on_shared_input(self):
+        """The checks themselves do not modify the input, even without the copy done by ProfileQC"""
+        profile = DummyProfile()
+        original = copy.deepcopy(profile.data)
+        cache = qctests.FeatureCache()
+        cfg = ProfileQC(profile, cfg=CFG).cfg["variables"]["sea_water_temperature"]
+        for c in cfg:
+            Procedure = qctests.catalog(cfg[c]["procedure"])
+            y = Procedure(profile, "TEMP", cfg=cfg[c], feature_cache=cache)
+            self.assertTrue(y.flags)
+            for v in original:
+                assert_same(profile[v], original[v])
+
+    def test_normalize_input(self):
+        x = np.array([1.0, 2.0, np.nan])
+        values, valid = normalize_input(x)
+        self.assertTrue(np.shares_memory(values, x))
+        self.assertFalse(values.flags.writeable)
+        np.testing.assert_array_equal(valid, [True, True, False])
+
+        x = ma.masked_array([1, 2, 3], mask=[False, True, False])
+        values, valid = normalize_input(x)
+        np.testing.assert_array_equal(values, [1.0, np.nan, 3.0])
+        np.testing.assert_array_equal(valid, [True, False, True])
+        np.testing.assert_array_equal(x.data, [1, 2, 3])
+
+        values, _ = normalize_input(np.array([1, 2], dtype="f4"))
+        self.assertEqual(values.dtype, np.float32)
+
+
+if __name__ == "__main__":
+    unittest.main()
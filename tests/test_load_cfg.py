@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cotede.utils import load_cfg
+from cotede.utils.config import _cfg_cache, clear_cfg_cache
+
+
+class TestLoadCfgCache(unittest.TestCase):
+    def setUp(self):
+        clear_cfg_cache()
+
+    def test_returns_independent_copies(self):
+        cfg = load_cfg("gtspp_bio")
+        cfg["variables"]["sea_water_temperature"].clear()
+        self.assertTrue(load_cfg("gtspp_bio")["variables"]["sea_water_temperature"])
+
+    def test_builtin_cached_once(self):
+        load_cfg("gtspp")
+        load_cfg("gtspp")
+        self.assertEqual(list(_cfg_cache), ["gtspp"])
+
+    def test_inline_cfg(self):
+        cfg = {"inherit": "gtspp", "sea_water_temperature": {"gradient": 2}}
+        first = load_cfg(cfg)
+        self.assertEqual(first, load_cfg(dict(cfg)))
+        self.assertEqual(first["variables"]["sea_water_temperature"]["gradient"]["threshold"], 2)
+        self.assertEqual(len(_cfg_cache), 2)
+        self.assertEqual(load_cfg(first), first)
+
+    def test_user_cfg_reloaded_when_modified(self):
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch.dict(os.environ, {"COTEDE_DIR": tmpdir}):
+            os.mkdir(os.path.join(tmpdir, "cfg"))
+            filename = os.path.join(tmpdir, "cfg", "mycfg.json")
+            with open(filename, "w") as f:
+                json.dump({"sea_water_temperature": {"gradient": 5}}, f)
+            self.assertEqual(load_cfg("mycfg")["variables"]["sea_water_temperature"]["gradient"]["threshold"], 5)
+
+            with open(filename, "w") as f:
+                json.dump({"sea_water_temperature": {"gradient": 7}}, f)
+            stat = os.stat(filename)
+            os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertEqual(load_cfg("mycfg")["variables"]["sea_water_temperature"]["gradient"]["threshold"], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
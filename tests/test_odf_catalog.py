@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+from datashop_toolbox.odf_catalog import OdfCatalog, catalog_entry
+from datashop_toolbox.odfhdr import OdfHeader
+from datashop_toolbox.parameterhdr import ParameterHeader
+
+
+def make_odf(data_type="CTD", cruise_number="HUD2020001", latitude=44.5, longitude=-63.2,
+             start="01-JUL-2017 10:45:00.00", end="17-NOV-1858 00:00:00.00", parameters=("PRES_01", "TEMP_01")):
+    odf = OdfHeader()
+    odf.cruise_header.cruise_number = cruise_number
+    odf.cruise_header.cruise_name = "Fall survey"
+    odf.event_header.data_type = data_type
+    odf.event_header.initial_latitude = latitude
+    odf.event_header.initial_longitude = longitude
+    odf.event_header.start_date_time = start
+    odf.event_header.end_date_time = end
+    lines = [" ".join(f"{i + j:.1f}" for j in range(len(parameters))) for i in range(5)]
+    odf.data.populate_object(list(parameters), {}, lines)
+    for i, code in enumerate(parameters):
+        odf.parameter_headers.append(ParameterHeader(
+            type="DOUB", code=code, name=code, null_string="-99.0000000",
+            print_field_order=i + 1, print_field_width=10, print_decimal_places=4,
+            minimum_value=0.0, maximum_value=50.0))
+    return odf
+
+
+class TestCatalogEntry(unittest.TestCase):
+    def test_null_end_date(self):
+        entry = catalog_entry(make_odf())
+        self.assertEqual(entry["start_time"], "2017-07-01T10:45:00.000")
+        self.assertEqual(entry["end_time"], "2017-07-01T10:45:00.000")
+
+    def test_no_dates(self):
+        entry = catalog_entry(make_odf(start="17-NOV-1858 00:00:00.00"))
+        self.assertIsNone(entry["start_time"])
+        self.assertIsNone(entry["end_time"])
+
+
+class TestOdfCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.datadir = os.path.join(self.tmp.name, "data")
+        os.makedirs(os.path.join(self.datadir, "sub"))
+        self.files = {
+            "CTD_001_DN.ODF": make_odf(),
+            "sub/CTD_002_DN.ODF": make_odf(
+                cruise_number="HUD2021002", latitude=60.0, longitude=-50.0,
+                start="01-JUL-2021 00:00:00.00", end="02-JUL-2021 00:00:00.00",
+                parameters=("PRES_01", "PSAL_01")),
+            "sub/MTR_003.ODF": make_odf(
+                data_type="MTR", cruise_number="BCD2019999",
+                start="01-JAN-2019 00:00:00.00", end="31-DEC-2019 00:00:00.00",
+                parameters=("TE90_01",)),
+        }
+        for name, odf in self.files.items():
+            odf.write_odf(self.path(name))
+        self.catalog = OdfCatalog(os.path.join(self.tmp.name, "catalog.db"))
+
+    def tearDown(self):
+        self.catalog.close()
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.datadir, name)
+
+    def names(self, **filters):
+        return [p.name for p in self.catalog.paths(**filters)]
+
+    def test_scan(self):
+        counts = self.catalog.scan(self.datadir, max_workers=1)
+        self.assertEqual(counts, {"added": 3, "updated": 0, "unchanged": 0, "removed": 0, "failed": 0})
+        self.assertEqual(len(self.catalog), 3)
+
+        counts = self.catalog.scan(self.datadir, max_workers=1)
+        self.assertEqual(counts, {"added": 0, "updated": 0, "unchanged": 3, "removed": 0, "failed": 0})
+
+        # Touched, but with the same contents
+        stat = os.stat(self.path("CTD_001_DN.ODF"))
+        os.utime(self.path("CTD_001_DN.ODF"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        counts = self.catalog.scan(self.datadir, max_workers=1)
+        self.assertEqual(counts, {"added": 0, "updated": 0, "unchanged": 3, "removed": 0, "failed": 0})
+
+        self.files["sub/MTR_003.ODF"].cruise_header.cruise_name = "Changed"
+        self.files["sub/MTR_003.ODF"].write_odf(self.path("sub/MTR_003.ODF"))
+        os.remove(self.path("sub/CTD_002_DN.ODF"))
+        counts = self.catalog.scan(self.datadir, max_workers=1)
+        self.assertEqual(counts, {"added": 0, "updated": 1, "unchanged": 1, "removed": 1, "failed": 0})
+        self.assertEqual(len(self.catalog), 2)
+        self.assertEqual(self.catalog.query(data_type="MTR")["cruise_name"].tolist(), ["Changed"])
+
+    def test_failed(self):
+        with open(self.path("BROKEN.ODF"), "w") as f:
+            f.write("not an ODF file\n")
+        with self.assertLogs("datashop_toolbox.odf_catalog", level="WARNING"):
+            counts = self.catalog.scan(self.datadir, max_workers=1)
+        self.assertEqual(counts["added"], 3)
+        self.assertEqual(counts["failed"], 1)
+        self.assertEqual(list(self.catalog.failed), [os.path.realpath(self.path("BROKEN.ODF"))])
+
+    def test_query(self):
+        self.catalog.scan(self.datadir, max_workers=1)
+        self.assertEqual(self.names(), ["CTD_001_DN.ODF", "MTR_003.ODF", "CTD_002_DN.ODF"])
+        self.assertEqual(self.names(data_type="CTD"), ["CTD_001_DN.ODF", "CTD_002_DN.ODF"])
+        self.assertEqual(self.names(cruise_number="HUD%"), ["CTD_001_DN.ODF", "CTD_002_DN.ODF"])
+        self.assertEqual(self.names(parameter="PSAL"), ["CTD_002_DN.ODF"])
+        self.assertEqual(self.names(parameter="TE90_01"), ["MTR_003.ODF"])
+        self.assertEqual(self.names(parameter="TE90_02"), [])
+        self.assertEqual(self.names(start="2017-01-01", end="2018-01-01"), ["CTD_001_DN.ODF"])
+        self.assertEqual(self.names(start="2019-06-01", end="2021-07-01"), ["MTR_003.ODF"])
+        self.assertEqual(self.names(bbox=(-55.0, 55.0, -45.0, 65.0)), ["CTD_002_DN.ODF"])
+        self.assertEqual(self.names(text="002_dn"), ["CTD_002_DN.ODF"])
+        self.assertEqual(self.names(data_type="CTD", text="fall survey", parameter="TEMP"), ["CTD_001_DN.ODF"])
+
+    def test_parameter_codes(self):
+        self.catalog.scan(self.datadir, max_workers=1)
+        self.assertEqual(sorted(self.catalog.parameter_codes(self.path("sub/CTD_002_DN.ODF"))), ["PRES_01", "PSAL_01"])
+        self.assertEqual(self.catalog.parameter_codes(self.path("missing.ODF")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+import numpy as np
+
+from datashop_toolbox.odf_to_exchange_format import format_fixed, get_expocode, odf2exchange, odf_flags_to_woce
+from datashop_toolbox.odfhdr import OdfHeader
+from datashop_toolbox.parameterhdr import ParameterHeader
+
+PARAMETERS = ["PRES_01", "QPRES_01", "TE90_01", "QTE90_01", "PSAL_01", "QPSAL_01", "DOXY_01", "QDOXY_01"]
+
+
+def write_ctd(filename, event_number, seed, size=30):
+    rng = np.random.default_rng(seed)
+    odf = OdfHeader()
+    odf.cruise_header.cruise_number = "HUD2020001"
+    odf.cruise_header.platform = "HUDSON"
+    odf.cruise_header.start_date = "12-MAY-2020 00:00:00.00"
+    odf.event_header.data_type = "CTD"
+    odf.event_header.event_number = f"{event_number:03d}"
+    odf.event_header.start_date_time = "14-MAY-2020 10:45:00.00"
+    odf.event_header.initial_latitude = 56.5
+    odf.event_header.initial_longitude = -52.6
+    odf.event_header.sounding = 3400.0
+    pres = np.arange(size) * 2.0
+    temp = 4 + rng.normal(0, 0.5, size)
+    psal = 34.9 + rng.normal(0, 0.05, size)
+    doxy = 6 + rng.normal(0, 0.3, size)
+    flags = rng.integers(0, 5, (4, size))
+    lines = [
+        f"{p:.1f} {fp} {t:.4f} {ft} {s:.4f} {fs} {o:.3f} {fo}"
+        for p, t, s, o, fp, ft, fs, fo in zip(pres, temp, psal, doxy, *flags, strict=True)
+    ]
+    odf.data.populate_object(PARAMETERS, {}, lines)
+    for i, code in enumerate(PARAMETERS):
+        odf.parameter_headers.append(ParameterHeader(
+            type="DOUB", code=code, name=code, null_string="-99.0000000",
+            print_field_order=i + 1, print_field_width=10, print_decimal_places=4,
+            minimum_value=0.0, maximum_value=50.0))
+    odf.write_odf(filename)
+    return odf
+
+
+class TestFormatFixed(unittest.TestCase):
+    def test_matches_str_format(self):
+        rng = np.random.default_rng(0)
+        values = np.concatenate([
+            rng.normal(0, 100, 5000),
+            rng.normal(0, 1e-3, 500),
+            np.round(rng.normal(0, 100, 1000), 3),
+            # Nulls, non-finite values, negative zero, halfway cases and overflowing widths
+            [np.nan, np.inf, -np.inf, -0.0, 0.0, -99.0, -99.9999, 0.05, 0.15, 0.25, -0.05, 0.00005, -0.00004],
+            [9.99995, 1e16, -1e20, 123456789.12345],
+        ])
+        for width, decimals in [(8, 1), (10, 4), (8, 3), (1, 0), (3, 0)]:
+            expected = [f"{v:{width}.{decimals}f}" for v in values]
+            self.assertEqual(format_fixed(values, width, decimals).tolist(), expected)
+
+    def test_empty(self):
+        self.assertEqual(format_fixed([], 8, 1).size, 0)
+
+
+class TestWoceFlags(unittest.TestCase):
+    def test_mapping(self):
+        np.testing.assert_array_equal(odf_flags_to_woce(range(10)), [0, 2, 3, 3, 4, 5, 6, 7, 8, 9])
+        np.testing.assert_array_equal(odf_flags_to_woce([1.0, 2.0, 12.0]), [2, 3, 12])
+
+    def test_missing_flags(self):
+        with self.assertRaises(ValueError):
+            odf_flags_to_woce([1, np.nan])
+
+
+class TestOdf2Exchange(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folders = []
+        for name in ("serial", "parallel"):
+            folder = os.path.join(self.tmp.name, name)
+            os.mkdir(folder)
+            for event in range(1, 5):
+                write_ctd(os.path.join(folder, f"CTD_HUD2020001_{event:03d}_01_DN.ODF"), event, event)
+            self.folders.append(folder)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_serial_and_parallel(self):
+        serial = odf2exchange(self.folders[0], "*_DN.ODF", max_workers=1)
+        parallel = odf2exchange(self.folders[1], "*_DN.ODF", max_workers=4)
+        self.assertEqual([f.name for f in serial], [f"18HU20200512_{event}_ct1.csv" for event in range(1, 5)])
+        self.assertEqual([f.name for f in parallel], [f.name for f in serial])
+        for a, b in zip(serial, parallel, strict=True):
+            with open(a) as fa, open(b) as fb:
+                self.assertEqual(fa.read(), fb.read())
+
+        with zipfile.ZipFile(os.path.join(self.folders[0], "Exchange_Format", "18HU20200512_ct1.zip")) as zf:
+            self.assertEqual(sorted(zf.namelist()), sorted(f.name for f in serial))
+
+    def test_content(self):
+        odf = write_ctd(os.path.join(self.tmp.name, "CTD_HUD2020001_009_01_DN.ODF"), 9, 9)
+        self.assertEqual(get_expocode(odf), "18HU20200512")
+        (output_file,) = odf2exchange(self.tmp.name, "*_DN.ODF", max_workers=1, combine=False)
+        with open(output_file) as f:
+            lines = f.read().split("\n")
+
+        self.assertIn("STNNBR = 9", lines)
+        self.assertIn("DATE = 20200514", lines)
+        self.assertEqual(lines[-1], "END_DATA")
+        data = odf.data.data_frame
+        formats = ["{:8.1f}", "{:>1d}", "{:10.4f}", "{:>1d}", "{:10.4f}", "{:>1d}", "{:8.3f}", "{:>1d}"]
+        woce = {1: 2, 2: 3}
+        expected = [
+            ",".join(
+                fmt.format(woce.get(int(v), int(v)) if code.startswith("Q") else v)
+                for code, fmt, v in zip(PARAMETERS, formats, row, strict=True)
+            )
+            for row in data[PARAMETERS].itertuples(index=False)
+        ]
+        self.assertEqual(lines[-len(expected) - 1:-1], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from datashop_toolbox.odf_to_parquet import PYARROW_AVAILABLE, export_odf_folder, odf_to_long_table, odf_to_wide_table
+from datashop_toolbox.odfhdr import OdfHeader
+from datashop_toolbox.parameterhdr import ParameterHeader
+
+if PYARROW_AVAILABLE:
+    import pyarrow.dataset as ds
+
+
+def write_odf(filename, cruise_number, data_type, size):
+    odf = OdfHeader()
+    odf.cruise_header.cruise_number = cruise_number
+    odf.event_header.data_type = data_type
+    parameters = ["PRES_01", "TEMP_01", "QTEMP_01"]
+    lines = [f"{i:.1f} {10 + i / 10:.4f} {i % 2}" for i in range(size)]
+    odf.data.populate_object(parameters, {}, lines)
+    for i, code in enumerate(parameters):
+        odf.parameter_headers.append(ParameterHeader(
+            type="DOUB", code=code, name=code, null_string="-99.0000000",
+            print_field_order=i + 1, print_field_width=10, print_decimal_places=4,
+            minimum_value=0.0, maximum_value=50.0))
+    odf.write_odf(filename)
+
+
+@unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+class TestOdfToParquet(unittest.TestCase):
+    def setUp(self):
+        self.odf = OdfHeader()
+        self.odf.cruise_header.cruise_number = "HUD2020001"
+        self.odf.event_header.data_type = "CTD"
+        parameters = ["PRES_01", "TEMP_01", "QTEMP_01", "SYTM_01"]
+        lines = [f"{i}.0 {10 + i / 10} {i % 2} '01-JUL-2017 10:45:1{i}.00'" for i in range(4)]
+        self.odf.data.populate_object(parameters, {}, lines)
+
+    def test_wide_table(self):
+        table = odf_to_wide_table(self.odf, "CTD_HUD2020001_001_1_DN.ODF")
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(str(table.schema.field("SYTM_01").type), "timestamp[ns]")
+        self.assertEqual(str(table.schema.field("QTEMP_01").type), "int8")
+        self.assertEqual(table.schema.metadata[b"cruise_header.cruise_number"], b"HUD2020001")
+
+    def test_long_table_mirrors_odf_data(self):
+        table = odf_to_long_table(self.odf, "CTD_HUD2020001_001_1_DN.ODF")
+        self.assertEqual(table.num_rows, 8)
+        self.assertEqual(table.column("PARAMETER_CODE").to_pylist(), ["PRES_01"] * 4 + ["TEMP_01"] * 4)
+        self.assertEqual(table.column("ROW_NUMBER").to_pylist(), [1, 2, 3, 4] * 2)
+        self.assertEqual(table.column("QUALITY_FLAG").to_pylist(), [0, 0, 0, 0, 0, 1, 0, 1])
+        np.testing.assert_allclose(table.column("PARAMETER_VALUE").to_numpy()[4:], [10.0, 10.1, 10.2, 10.3])
+        self.assertEqual(str(table.column("SAMPLE_TIME")[1].as_py()), "2017-07-01 10:45:11")
+        self.assertEqual(set(table.column("ODF_FILENAME").to_pylist()), {"CTD_HUD2020001_001_1_DN.ODF"})
+
+
+@unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+class TestExportOdfFolder(unittest.TestCase):
+    FILES = {
+        "CTD_HUD2020001_001_1_DN.ODF": ("HUD2020001", "CTD", 5),
+        "CTD_HUD2020001_002_1_DN.ODF": ("HUD2020001", "CTD", 7),
+        "MTR_BCD2021002_003_1_DN.ODF": ("BCD2021002", "MTR", 3),
+    }
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.odf_folder = os.path.join(self.tmp.name, "odf")
+        os.mkdir(self.odf_folder)
+        for name, (cruise_number, data_type, size) in self.FILES.items():
+            write_odf(os.path.join(self.odf_folder, name), cruise_number, data_type, size)
+        self.output_folder = os.path.join(self.tmp.name, "dataset")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        summaries = export_odf_folder(self.odf_folder, self.output_folder, max_workers=2)
+        self.assertEqual(
+            sorted((s["odf_filename"], s["data_rows"], s["long_rows"]) for s in summaries),
+            [(name, size, 2 * size) for name, (_, _, size) in sorted(self.FILES.items())],
+        )
+
+        wide = ds.dataset(os.path.join(self.output_folder, "wide"), format="parquet", partitioning="hive")
+        self.assertEqual(
+            sorted(os.path.relpath(f, self.output_folder) for f in wide.files),
+            sorted(
+                os.path.join("wide", f"cruise_number={c}", f"data_type={t}", name.replace(".ODF", ".parquet"))
+                for name, (c, t, _) in self.FILES.items()
+            ),
+        )
+        table = wide.to_table()
+        self.assertEqual(table.num_rows, 15)
+        counts = table.group_by(["cruise_number", "data_type"]).aggregate([("PRES_01", "count")])
+        self.assertEqual(
+            sorted(zip(*counts.to_pydict().values(), strict=True)),
+            [("BCD2021002", "MTR", 3), ("HUD2020001", "CTD", 12)],
+        )
+        mtr = wide.to_table(filter=ds.field("data_type") == "MTR")
+        np.testing.assert_allclose(mtr.column("TEMP_01").to_numpy(), [10.0, 10.1, 10.2])
+
+        long = ds.dataset(os.path.join(self.output_folder, "long"), format="parquet", partitioning="hive")
+        table = long.to_table(filter=ds.field("CRUISE_NUMBER") == "HUD2020001")
+        self.assertEqual(table.num_rows, 2 * 12)
+        self.assertEqual(set(table.column("DATA_TYPE").to_pylist()), {"CTD"})
+        self.assertEqual(long.count_rows(), 2 * 15)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+
+import numpy as np
+from numpy import ma
+
+from cotede.plan import QCPlan, clear_plan_cache, compile_plan, validate_thresholds
+from cotede.qc import ProfileQC
+from cotede.utils import load_cfg
+
+CFG = {
+    "sea_water_temperature": {
+        "global_range": {"minval": -2.5, "maxval": 40},
+        "gradient": {"threshold": 10},
+        "spike": {"threshold": 2.0},
+    },
+    "sea_water_salinity": {
+        "global_range": {"minval": 0, "maxval": 41},
+    },
+}
+
+
+class Profile:
+    def __init__(self, size=30):
+        rng = np.random.default_rng(0)
+        temp = 20 * np.exp(-np.linspace(0, 3, size)) + rng.normal(0, 0.3, size)
+        temp[size // 2] += 8
+        self.attrs = {}
+        self.data = {
+            "PRES": ma.masked_array(np.linspace(0, 500, size)),
+            "TEMP": ma.masked_array(temp),
+            "sea_water_temperature2": ma.masked_array(temp + 0.1),
+            "PSAL": ma.masked_array(35 + rng.normal(0, 0.05, size)),
+        }
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def keys(self):
+        return self.data.keys()
+
+
+class TestQCPlan(unittest.TestCase):
+    def setUp(self):
+        clear_plan_cache()
+
+    def test_reused(self):
+        plan = compile_plan(CFG)
+        self.assertIs(compile_plan(dict(CFG)), plan)
+        self.assertIs(compile_plan("gtspp"), compile_plan("gtspp"))
+        self.assertIsNot(compile_plan("gtspp"), plan)
+
+        pqc = ProfileQC(Profile(), cfg=CFG)
+        self.assertIs(pqc.plan, plan)
+
+    def test_steps(self):
+        plan = compile_plan(CFG)
+        self.assertEqual(
+            [s.name for s in plan.variables["sea_water_temperature"]],
+            ["global_range", "gradient", "spike"])
+        self.assertEqual(plan.vartype("TEMP"), "sea_water_temperature")
+        self.assertEqual(plan.vartype("sea_water_temperature2"), "sea_water_temperature")
+        self.assertEqual(plan.vartype("PSAL"), "sea_water_salinity")
+        self.assertIsNone(plan.vartype("PRES"))
+
+    def test_invalid_threshold(self):
+        cfg = {"sea_water_temperature": {"spike": {"threshold": "2.0"}}}
+        with self.assertRaises(ValueError):
+            compile_plan(cfg)
+        with self.assertRaises(ValueError):
+            ProfileQC(Profile(), cfg=cfg)
+        with self.assertRaises(ValueError):
+            validate_thresholds("global_range", {"minval": True, "maxval": 40})
+        validate_thresholds("global_range", {"minval": -2, "maxval": 40.0})
+
+    def test_explicit_plan(self):
+        reference = ProfileQC(Profile(), cfg=CFG)
+        plan = QCPlan(load_cfg(CFG))
+        pqc = ProfileQC(Profile(), plan=plan)
+        self.assertEqual(list(pqc.flags), list(reference.flags))
+        for v in reference.flags:
+            self.assertEqual(list(pqc.flags[v]), list(reference.flags[v]))
+            for f in reference.flags[v]:
+                np.testing.assert_array_equal(pqc.flags[v][f], reference.flags[v][f])
+
+    def test_timing(self):
+        plan = QCPlan(load_cfg(CFG))
+        calls = []
+        plan.add_hook(lambda varname, step, seconds: calls.append((varname, step)))
+        pqc = ProfileQC(Profile(), plan=plan)
+
+        expected = [
+            (v, s) for v in ("TEMP", "sea_water_temperature2") for s in ("global_range", "gradient", "spike")
+        ] + [("PSAL", "global_range")]
+        self.assertEqual(sorted(calls), sorted(expected))
+        timing = pqc.step_timing()
+        self.assertEqual(sorted((t["varname"], t["step"]) for t in timing), sorted(expected))
+        self.assertTrue(all(t["seconds"] >= 0 for t in timing))
+
+        ProfileQC(Profile(), plan=plan)
+        report = plan.report()
+        self.assertEqual(len(report), len(expected))
+        self.assertTrue(all(r["calls"] == 2 for r in report))
+        plan.reset_timing()
+        self.assertEqual(plan.report(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+from numpy import ma
+
+from cotede.qctests.profile_envelop import ProfileEnvelop, compile_layers, parse_bound
+from cotede.utils import load_cfg
+
+
+def reference_flags(x, z, layers):
+    """Layer selection as it was done with eval, for unmasked input"""
+    flag = np.zeros(np.shape(x), dtype="i1")
+    for layer in layers:
+        ind = np.nonzero(eval(f"(z {layer[0]}) & (z {layer[1]})"))[0]
+        f = eval(f"(x[ind] > {layer[2]}) & (x[ind] < {layer[3]})")
+        flag[ind[f]] = 1
+        flag[ind[~f]] = 4
+    flag[~np.isfinite(x)] = 9
+    return flag
+
+
+class TestProfileEnvelop(unittest.TestCase):
+    def test_same_flags_as_eval(self):
+        rng = np.random.default_rng(42)
+        configs = [
+            load_cfg("gtspp")["variables"]["sea_water_temperature"]["profile_envelop"]["layers"],
+            [[">= 0", "< 100", 0, 10], ["> 50", "<= 200", -1, 5], ["== 300", ">= 300", 2, 3]],
+        ]
+        for dtype in ("f4", "f8"):
+            for layers in configs:
+                z = np.concatenate([rng.uniform(-10, 13000, 200), [0, 25, 50, 100, 300, 5500, 12000, np.nan]])
+                z = z.astype(dtype)
+                x = rng.uniform(-5, 45, z.size).astype(dtype)
+                x[::17] = np.nan
+                y = ProfileEnvelop({"TEMP": x, "PRES": z}, "TEMP", {"layers": layers})
+                np.testing.assert_array_equal(y.flags["profile_envelop"], reference_flags(x, z, layers))
+
+    def test_masked_input_is_not_modified(self):
+        x = ma.masked_array([10.0, 50.0, 3.0], mask=[False, False, True])
+        z = ma.masked_array([10.0, 20.0, 2000.0], mask=[False, True, False])
+        layers = [["> 0", "<= 25", -2, 37], ["> 25", "<= 3000", -2, 18]]
+        y = ProfileEnvelop({"TEMP": x, "PRES": z}, "TEMP", {"layers": layers})
+        np.testing.assert_array_equal(y.flags["profile_envelop"], [1, 0, 9])
+        np.testing.assert_array_equal(x.data, [10.0, 50.0, 3.0])
+
+    def test_invalid_bound(self):
+        self.assertEqual(parse_bound("<= 1e3"), ("<=", 1000.0))
+        with self.assertRaises(ValueError):
+            parse_bound("> 0) | (__import__('os')")
+
+    def test_table_is_cached(self):
+        layers = (("> 0", "<= 25", -2, 37), ("> 25", "<= 50", -2, 36))
+        self.assertIs(compile_layers(layers, "<f8"), compile_layers(layers, "<f8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
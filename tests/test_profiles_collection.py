@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from cotede.qc import ProfileQC, ProfilesQCPandasCollection
+from cotede.utils.profiles import ODFProfile, find_profiles
+from datashop_toolbox.odfhdr import OdfHeader
+from datashop_toolbox.parameterhdr import ParameterHeader
+
+try:
+    import pyarrow  # noqa: F401
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+CFG = {
+    "sea_water_temperature": {
+        "global_range": {"minval": -2.5, "maxval": 40},
+        "gradient": {"threshold": 10},
+        "spike": {"threshold": 2.0},
+    }
+}
+
+
+def write_odf(filename, seed, size=20):
+    rng = np.random.default_rng(seed)
+    odf = OdfHeader()
+    odf.cruise_header.cruise_number = "HUD2020001"
+    odf.event_header.data_type = "CTD"
+    odf.event_header.initial_latitude = 44.5
+    odf.event_header.initial_longitude = -63.2
+    odf.event_header.start_date_time = "01-JUL-2017 10:45:00.00"
+    temp = 15 * np.exp(-np.linspace(0, 3, size)) + rng.normal(0, 0.3, size)
+    temp[size // 2] = 45
+    temp[3] = -99
+    parameters = ["PRES_01", "TEMP_01", "QTEMP_01"]
+    lines = [f"{i * 10:.1f} {t:.4f} 0" for i, t in enumerate(temp)]
+    odf.data.populate_object(parameters, {}, lines)
+    for i, code in enumerate(parameters):
+        odf.parameter_headers.append(ParameterHeader(
+            type="DOUB", code=code, name=code, null_string="-99.0000000",
+            print_field_order=i + 1, print_field_width=10, print_decimal_places=4,
+            minimum_value=0.0, maximum_value=50.0))
+    odf.write_odf(filename)
+
+
+class TestProfilesQCPandasCollection(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.datadir = self.tmp.name
+        os.mkdir(os.path.join(self.datadir, "sub"))
+        for i, name in enumerate(["CTD_001_DN.ODF", "sub/CTD_002_DN.ODF", "sub/CTD_003_DN.odf"]):
+            write_odf(os.path.join(self.datadir, name), i)
+        with open(os.path.join(self.datadir, "notes.txt"), "w") as f:
+            f.write("not a profile")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_find_profiles(self):
+        self.assertEqual(
+            find_profiles(self.datadir),
+            ["CTD_001_DN.ODF", "sub/CTD_002_DN.ODF", "sub/CTD_003_DN.odf"])
+
+    def test_odf_profile(self):
+        profile = ODFProfile(os.path.join(self.datadir, "CTD_001_DN.ODF"))
+        self.assertEqual(sorted(profile.keys()), ["PRES", "TEMP"])
+        self.assertTrue(profile["TEMP"].mask[3])
+        self.assertEqual(profile.attrs["LATITUDE"], 44.5)
+        self.assertEqual(profile.attrs["datetime"].year, 2017)
+
+    def test_matches_profileqc(self):
+        db = ProfilesQCPandasCollection(self.datadir, cfg=CFG, n_jobs=2)
+        self.assertEqual(len(db), 3)
+        self.assertEqual(list(db.keys()), ["TEMP"])
+        self.assertEqual(db.flags["TEMP"].index.names, ["profile_id", "position"])
+        self.assertTrue(db.data.index.equals(db.flags["TEMP"].index))
+        self.assertTrue(db.data.index.equals(db.features["TEMP"].index))
+
+        filename = os.path.join(self.datadir, "sub/CTD_002_DN.ODF")
+        pqc = ProfileQC(ODFProfile(filename), cfg=CFG)
+        for test, values in pqc.flags["TEMP"].items():
+            np.testing.assert_array_equal(db.flags["TEMP"].loc["sub/CTD_002_DN.ODF", test], values)
+        np.testing.assert_allclose(
+            db.features["TEMP"].loc["sub/CTD_002_DN.ODF", "spike"],
+            np.ma.filled(pqc.features["TEMP"]["spike"], np.nan))
+        self.assertEqual(set(db.data["profilename"]), {"CTD_001_DN.ODF", "CTD_002_DN.ODF", "CTD_003_DN.odf"})
+
+    def test_serial_and_parallel_agree(self):
+        serial = ProfilesQCPandasCollection(self.datadir, cfg=CFG, n_jobs=1)
+        parallel = ProfilesQCPandasCollection(self.datadir, cfg=CFG, n_jobs=2)
+        self.assertTrue(serial.flags["TEMP"].equals(parallel.flags["TEMP"]))
+
+    def test_to_frame(self):
+        db = ProfilesQCPandasCollection(self.datadir, cfg=CFG, n_jobs=1)
+        frame = db.to_frame("TEMP")
+        for c in ["profileid", "profilename", "PRES", "TEMP", "flag_overall", "spike"]:
+            self.assertIn(c, frame.columns)
+        self.assertTrue(frame.index.is_unique)
+
+    def test_invalid_file(self):
+        with open(os.path.join(self.datadir, "broken.odf"), "w") as f:
+            f.write("garbage")
+        db = ProfilesQCPandasCollection(self.datadir, cfg=CFG, n_jobs=1)
+        self.assertEqual(list(db.errors), ["broken.odf"])
+        self.assertEqual(len(db), 3)
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_cache(self):
+        cache = os.path.join(self.datadir, "qc.parquet")
+        db = ProfilesQCPandasCollection(self.datadir, cfg=CFG, n_jobs=1, cache=cache)
+        self.assertTrue(os.path.exists(cache))
+
+        # Nothing to evaluate, everything comes from the cache
+        cached = ProfilesQCPandasCollection(self.datadir, cfg=CFG, n_jobs=1, cache=cache)
+        self.assertTrue(db.flags["TEMP"].equals(cached.flags["TEMP"]))
+        self.assertTrue(db.features["TEMP"].equals(cached.features["TEMP"]))
+        self.assertTrue(db.data.equals(cached.data))
+
+        # Only the modified file is evaluated again
+        filename = os.path.join(self.datadir, "CTD_001_DN.ODF")
+        write_odf(filename, 42, size=25)
+        os.utime(filename, ns=(0, os.stat(filename).st_mtime_ns + 10**9))
+        updated = ProfilesQCPandasCollection(self.datadir, cfg=CFG, n_jobs=1, cache=cache)
+        self.assertEqual(len(updated.flags["TEMP"].loc["CTD_001_DN.ODF"]), 25)
+        self.assertTrue(updated.flags["TEMP"].loc["sub/CTD_002_DN.ODF"].equals(
+            db.flags["TEMP"].loc["sub/CTD_002_DN.ODF"]))
+
+        # A different configuration invalidates the cache
+        cfg = {"sea_water_temperature": {"global_range": {"minval": -2.5, "maxval": 40}}}
+        other = ProfilesQCPandasCollection(self.datadir, cfg=cfg, n_jobs=1, cache=cache)
+        self.assertEqual(list(other.flags["TEMP"].columns), ["global_range", "overall"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+from numpy import ma
+
+from cotede.qc import ProfileQC, ProfileQCCollection, qc_many
+
+CFG = {
+    "sea_water_temperature": {
+        "global_range": {"minval": -2.5, "maxval": 40},
+        "gradient": {"threshold": 10},
+        "spike": {"threshold": 2.0},
+    }
+}
+
+
+class DummyProfile:
+    def __init__(self, seed, size):
+        rng = np.random.default_rng(seed)
+        self.attrs = {"LATITUDE": 10.0, "LONGITUDE": -30.0}
+        temp = 25 * np.exp(-np.linspace(0, 5, size)) + rng.normal(0, 0.5, size)
+        temp[rng.integers(0, size, 3)] = 60
+        self.data = {"PRES": ma.masked_array(np.linspace(0, 1000, size)), "TEMP": ma.masked_array(temp)}
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def keys(self):
+        return self.data.keys()
+
+
+class TestQCMany(unittest.TestCase):
+    def setUp(self):
+        self.profiles = {f"cast{i}": DummyProfile(i, 30 + i) for i in range(5)}
+
+    def test_matches_profileqc(self):
+        flags = qc_many(self.profiles, CFG, n_jobs=2)
+        self.assertEqual(flags.index.names, ["profile_id", "position"])
+        for profile_id, profile in self.profiles.items():
+            expected = ProfileQC(profile, cfg=CFG).flags["TEMP"]
+            for test, values in expected.items():
+                np.testing.assert_array_equal(flags.loc[profile_id, ("TEMP", test)].to_numpy(), values)
+
+    def test_serial_and_parallel_agree(self):
+        serial = ProfileQCCollection(self.profiles, CFG, n_jobs=1)
+        parallel = ProfileQCCollection(self.profiles, CFG, n_jobs=2)
+        self.assertEqual(list(serial.keys()), list(self.profiles))
+        self.assertTrue(serial.to_frame().equals(parallel.to_frame()))
+
+    def test_sequence_ids(self):
+        flags = qc_many(list(self.profiles.values()), CFG, n_jobs=1)
+        self.assertEqual(sorted(flags.index.unique("profile_id")), list(range(5)))
+        self.assertEqual(flags.dtypes.unique().tolist(), [np.dtype("i1")])
+
+
+if __name__ == "__main__":
+    unittest.main()
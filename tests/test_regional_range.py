@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+from numpy import ma
+
+from cotede.qctests.regional_range import RegionalRange, prepared_region
+
+CFG = {
+    "regions": [
+        {"name": "red_sea", "region": "POLYGON ((40 10, 50 20, 30 30, 40 10))", "minval": 21.7, "maxval": 40},
+        {"name": "box", "region": "POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))", "minval": 0, "maxval": 10},
+    ]
+}
+
+
+class DummyData(dict):
+    def __init__(self, attrs=None, **kwargs):
+        super().__init__(**kwargs)
+        self.attrs = attrs or {}
+
+
+class TestRegionalRange(unittest.TestCase):
+    def test_profile(self):
+        temp = ma.masked_array([5.0, 25.0, 45.0, 30.0], mask=[False, False, False, True])
+        y = RegionalRange(DummyData({"LATITUDE": 20, "LONGITUDE": 40}, TEMP=temp), "TEMP", CFG)
+        np.testing.assert_array_equal(y.flags["regional_range"], [4, 1, 4, 9])
+
+        y = RegionalRange(DummyData({"LATITUDE": -20, "LONGITUDE": 40}, TEMP=temp), "TEMP", CFG)
+        np.testing.assert_array_equal(y.flags["regional_range"], [0, 0, 0, 9])
+
+    def test_track(self):
+        temp = ma.masked_array([5.0, 25.0, 5.0, 25.0, 5.0])
+        lat = ma.masked_array([20.0, 20.0, 5.0, 5.0, 5.0], mask=[False, False, False, False, True])
+        lon = np.array([40.0, 40.0, 5.0, 5.0, 5.0])
+        y = RegionalRange(DummyData(TEMP=temp, LATITUDE=lat, LONGITUDE=lon), "TEMP", CFG)
+        np.testing.assert_array_equal(y.flags["regional_range"], [4, 1, 1, 4, 0])
+
+    def test_boundary_is_inside(self):
+        temp = ma.masked_array([5.0])
+        y = RegionalRange(DummyData({"LATITUDE": 10, "LONGITUDE": 5}, TEMP=temp), "TEMP", CFG)
+        np.testing.assert_array_equal(y.flags["regional_range"], [1])
+
+    def test_prepared_region_is_cached(self):
+        self.assertIs(prepared_region(CFG["regions"][0]["region"]), prepared_region(CFG["regions"][0]["region"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
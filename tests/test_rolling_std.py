@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from numpy import ma
+
+from cotede.qctests.rolling_std import RollingStd, rolling_std
+
+
+class TestRollingStd(unittest.TestCase):
+    def test_matches_pandas_rolling(self):
+        rng = np.random.default_rng(0)
+        for n in (0, 1, 2, 3, 1000):
+            x = rng.normal(size=n).cumsum()
+            x[rng.random(n) < 0.1] = np.nan
+            for window in (2, 3, 7):
+                expected = pd.Series(x).rolling(window, min_periods=max(window - 1, 2)).std()
+                np.testing.assert_allclose(rolling_std(x, window), expected, rtol=1e-9, atol=1e-12)
+
+    def test_adaptive_threshold(self):
+        x = ma.masked_array(np.tile([10.0, 10.0, 11.0], 20))
+        x[30] = ma.masked
+        data = {"TEMP": x}
+        # std of [10, 10, 11] is 0.577, the threshold 2 * sqrt(1 / 60) = 0.258
+        cfg = {"threshold": 2.0, "sample_interval": 1, "reference_interval": 60, "flag_bad": 2}
+        flags = RollingStd(data, "TEMP", cfg).flags["rolling_std"]
+        self.assertEqual(flags[0], 0)
+        self.assertEqual(flags[1], 1)
+        self.assertTrue((flags[2:30] == 2).all())
+        self.assertEqual(flags[30], 9)
+        flags = RollingStd(data, "TEMP", {"threshold": 2.0}).flags["rolling_std"]
+        self.assertTrue((flags[1:30] == 1).all())
+        self.assertTrue((flags[31:] == 1).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from datashop_toolbox.basehdr import BaseHeader
+from datashop_toolbox.sytm import format_sytm, is_sytm, normalize_sytm, parse_sytm
+
+
+class TestSytmCodec(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        seconds = rng.integers(0, 500 * 365 * 86400, 2000)
+        micros = rng.integers(0, 1_000_000, 2000)
+        base = datetime(1700, 1, 1)
+        self.datetimes = [
+            base + timedelta(seconds=int(s), microseconds=int(u)) for s, u in zip(seconds, micros, strict=True)
+        ]
+
+    def test_parse_matches_strptime(self):
+        strings = [dt.strftime(BaseHeader.SYTM_FORMAT) for dt in self.datetimes]
+        expected = np.array([datetime.strptime(s, BaseHeader.SYTM_FORMAT) for s in strings], dtype="datetime64[ns]")
+        np.testing.assert_array_equal(parse_sytm(strings), expected)
+
+    def test_format_matches_strftime(self):
+        expected = [dt.strftime(BaseHeader.SYTM_FORMAT)[:-4].upper() for dt in self.datetimes]
+        result = format_sytm(np.array(self.datetimes, dtype="datetime64[ns]"))
+        self.assertEqual(result.tolist(), expected)
+
+    def test_null_sentinel(self):
+        self.assertTrue(np.isnat(parse_sytm(BaseHeader.SYTM_NULL_VALUE)))
+        self.assertTrue(np.isnat(parse_sytm("")))
+        self.assertEqual(format_sytm(np.datetime64("NaT")), "17-NOV-1858 00:00:00.00")
+        self.assertTrue(is_sytm(BaseHeader.SYTM_NULL_VALUE))
+
+    def test_quotes_case_and_short_day(self):
+        self.assertEqual(normalize_sytm("'1-jul-2017 10:45:19.5'"), "01-JUL-2017 10:45:19.50")
+        self.assertEqual(format_sytm(datetime(2017, 7, 1), quote=True), "'01-JUL-2017 00:00:00.00'")
+
+    def test_format_out_of_range(self):
+        for value in (np.datetime64("1500-01-01"), np.datetime64("2300-01-01T00:00"), datetime(1600, 1, 1)):
+            with self.assertRaises(ValueError):
+                format_sytm(value)
+        with self.assertRaises(ValueError):
+            format_sytm(np.array(["2017-07-01", "NaT", "3000-01-01"], dtype="datetime64[D]"))
+        result = format_sytm(np.array(["1678-01-01", "NaT", "2261-12-31"], dtype="datetime64[D]"))
+        self.assertEqual(
+            result.tolist(), ["01-JAN-1678 00:00:00.00", "17-NOV-1858 00:00:00.00", "31-DEC-2261 00:00:00.00"])
+        self.assertEqual(format_sytm([datetime(2017, 7, 1, 10, 45, 19, 500000), None]).tolist(),
+                         ["01-JUL-2017 10:45:19.50", "17-NOV-1858 00:00:00.00"])
+
+    def test_invalid_values(self):
+        invalid = [
+            "2023-09-10 10:45:43.000",
+            "31-FEB-2020 00:00:00.00",
+            "01-JAN-2020 00:00:00",
+            "01-XYZ-2020 00:00:00.00",
+        ]
+        self.assertFalse(is_sytm(invalid).any())
+        self.assertTrue(np.isnat(parse_sytm(invalid, errors="coerce")).all())
+        with self.assertRaises(ValueError):
+            parse_sytm(invalid)
+
+
+if __name__ == "__main__":
+    unittest.main()
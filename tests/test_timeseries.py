@@ -0,0 +1,134 @@
+import unittest
+
+import numpy as np
+from numpy import ma
+
+from cotede.qc import ProfileQC
+from cotede.timeseries import StreamingQC, TimeSeriesQC, _halo
+
+CFG = {
+    "sea_water_temperature": {
+        "global_range": {"minval": -2, "maxval": 30},
+        "spike": {"threshold": 2},
+        "gradient": {"threshold": 3},
+        "rate_of_change": {"threshold": 3},
+        "tukey53H": {"threshold": 1.0},
+        "constant_cluster_size": {"threshold": 50},
+        "cum_rate_of_change": {"memory": 0.8, "threshold": 1.0},
+        "stuck_value": None,
+    }
+}
+
+
+def thermograph(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    t = 10 + np.cumsum(rng.normal(0, 0.05, n))
+    t[rng.integers(0, n, 20)] += 5
+    t = np.round(t, 1)
+    # A logger stuck for a while
+    t[1000:1300] = t[1000]
+    x = ma.masked_array(t)
+    x[rng.random(n) < 0.03] = ma.masked
+    return {"TEMP": x}
+
+
+class TestTimeSeriesQC(unittest.TestCase):
+    def assertSameFlags(self, cfg, chunksizes=(1, 7, 97, 1000, 10**6)):
+        series = thermograph()
+        reference = ProfileQC(series, cfg=cfg, saveauxiliary=False).flags["TEMP"]
+        for chunksize in chunksizes:
+            flags = TimeSeriesQC(series, cfg=cfg, chunksize=chunksize).flags["TEMP"]
+            self.assertEqual(list(flags), list(reference))
+            for f in reference:
+                np.testing.assert_array_equal(
+                    flags[f], reference[f], err_msg=f"{f} with chunksize {chunksize}")
+
+    def test_chunks_match_whole_series(self):
+        self.assertSameFlags(CFG)
+
+    def test_cluster_fraction(self):
+        cfg = {"sea_water_temperature": {"constant_cluster_size": {"threshold": "5%"}}}
+        self.assertSameFlags(cfg)
+
+    def test_stuck_value(self):
+        series = {"TEMP": ma.masked_array(np.full(500, 12.5))}
+        series["TEMP"][10] = ma.masked
+        flags = TimeSeriesQC(series, cfg=CFG, chunksize=64).flags["TEMP"]["stuck_value"]
+        self.assertEqual(flags[10], 9)
+        self.assertTrue((np.delete(flags, 10) == 4).all())
+
+    def test_features(self):
+        series = thermograph()
+        reference = ProfileQC(series, cfg=CFG).features["TEMP"]
+        features = TimeSeriesQC(series, cfg=CFG, chunksize=97, saveauxiliary=True).features["TEMP"]
+        for f in ("spike", "gradient", "rate_of_change", "tukey53H", "cum_rate_of_change"):
+            np.testing.assert_array_equal(features[f], ma.filled(reference[f], np.nan), err_msg=f)
+
+    def test_unsupported(self):
+        cfg = {"sea_water_temperature": {
+            "spike": {"threshold": 2},
+            "rate_of_change": {"threshold": 3, "sd_scale": True},
+        }}
+        with self.assertLogs("cotede.timeseries", level="WARNING"):
+            ts = TimeSeriesQC(thermograph(), cfg=cfg)
+        self.assertEqual(list(ts.flags["TEMP"]), ["spike", "overall"])
+
+    def test_halo(self):
+        valid = np.ones(100, dtype=bool)
+        valid[40:60] = False
+        self.assertEqual(_halo(valid, 60, 70, 5), (35, 75))
+        self.assertEqual(_halo(valid, 2, 98, 5), (0, 100))
+        self.assertEqual(_halo(valid, 30, 40, 3), (27, 63))
+
+
+class TestStreamingQC(unittest.TestCase):
+    cfg = {
+        "sea_water_temperature": {
+            "global_range": {"minval": -2, "maxval": 30},
+            "spike": {"threshold": 2},
+            "gradient": {"threshold": 3},
+            "rate_of_change": {"threshold": 3},
+            "tukey53H": {"threshold": 1.0},
+            "cum_rate_of_change": {"memory": 0.8, "threshold": 1.0},
+            "rolling_std": {"threshold": 2.0, "sample_interval": 1, "reference_interval": 60},
+        }
+    }
+
+    def test_matches_whole_series(self):
+        x = thermograph()["TEMP"]
+        reference = TimeSeriesQC({"TEMP": x}, cfg=self.cfg).flags["TEMP"]
+        rng = np.random.default_rng(1)
+        sqc = StreamingQC(self.cfg)
+        output, i = [], 0
+        while i < x.size:
+            n = int(rng.integers(0, 20))
+            flags = sqc.append({"TEMP": x[i:i + n]})["TEMP"]
+            i = min(i + n, x.size)
+            self.assertEqual(sqc.flagged["TEMP"], max(0, i - sqc.lag["TEMP"]))
+            output.append(flags)
+        output.append(sqc.flush()["TEMP"])
+
+        self.assertEqual(sqc.lag["TEMP"], 4)
+        self.assertEqual(sqc.flagged["TEMP"], x.size)
+        for f in reference:
+            np.testing.assert_array_equal(
+                np.concatenate([flags[f] for flags in output]), reference[f], err_msg=f)
+
+    def test_bounded_buffer(self):
+        sqc = StreamingQC(self.cfg)
+        sqc.append({"TEMP": np.linspace(10, 12, 10000), "PRES": np.ones(10000)})
+        for i in range(10):
+            flags = sqc.append({"TEMP": [12.0 + i * 0.01]})
+            self.assertEqual(len(flags["TEMP"]["overall"]), 1)
+        self.assertLessEqual(sqc._streams["TEMP"].buffer.size, 8)
+        self.assertNotIn("PRES", sqc.flagged)
+
+    def test_unbounded_checks(self):
+        cfg = {"sea_water_temperature": {"spike": {"threshold": 2}, "stuck_value": None}}
+        with self.assertLogs("cotede.timeseries", level="WARNING"):
+            flags = StreamingQC(cfg).append({"TEMP": [1.0, 2.0, 3.0]})
+        self.assertEqual(list(flags["TEMP"]), ["spike", "overall"])
+
+
+if __name__ == "__main__":
+    unittest.main()
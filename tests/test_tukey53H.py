@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from numpy import ma
+
+from cotede.qctests.tukey53H import tukey53H
+
+
+def tukey53H_pandas(x):
+    """Previous pandas rolling implementation, kept as the reference"""
+    x = pd.Series(x)
+    u1 = x.rolling(5, center=True).median()
+    u2 = u1.rolling(3, center=True).median()
+    u3 = 0.25 * (u2.shift(-1) + 2 * u2 + u2.shift(1))
+    return np.array(x - u3)
+
+
+class TestTukey53H(unittest.TestCase):
+    def test_matches_pandas_rolling(self):
+        rng = np.random.default_rng(0)
+        for n in (0, 1, 4, 5, 6, 17, 1000):
+            x = rng.normal(size=n)
+            x[rng.random(n) < 0.05] = np.nan
+            np.testing.assert_array_equal(tukey53H(x), tukey53H_pandas(x))
+
+    def test_masked_input_is_not_modified(self):
+        x = ma.masked_array(np.arange(20.0) ** 0.5)
+        x[7] = ma.masked
+        original = x.copy()
+        delta = tukey53H(x)
+        self.assertTrue(np.isnan(delta[7]))
+        np.testing.assert_array_equal(x.data, original.data)
+        np.testing.assert_array_equal(x.mask, original.mask)
+
+    def test_dataframe(self):
+        df = pd.DataFrame({"a": np.sin(np.arange(40.0)), "b": np.cos(np.arange(40.0))})
+        delta = tukey53H(df)
+        self.assertEqual(delta.shape, df.shape)
+        np.testing.assert_array_equal(delta[:, 1], tukey53H_pandas(df["b"]))
+
+
+if __name__ == "__main__":
+    unittest.main()